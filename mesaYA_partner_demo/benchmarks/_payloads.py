@@ -0,0 +1,37 @@
+"""Shared webhook payloads and signing secret for benchmark scripts."""
+
+import json
+from typing import Any
+
+SECRET = "whsec_benchmark_secret_0123456789abcdef"
+
+EVENT_TYPES = ("payment.created", "payment.succeeded", "payment.failed")
+
+
+def make_payload(index: int = 0, size: int | None = None) -> dict[str, Any]:
+    """
+    A payment webhook payload similar to what MesaYA sends.
+
+    Args:
+        index: Makes ids (and so bodies and signatures) distinct; also
+            cycles through ``EVENT_TYPES``
+        size: Pad the encoded body to roughly this many bytes
+    """
+    payload: dict[str, Any] = {
+        "event": EVENT_TYPES[index % len(EVENT_TYPES)],
+        "timestamp": "2026-01-22T15:30:00Z",
+        "payment_id": f"pay-{index:08d}",
+        "amount": "25.00",
+        "currency": "USD",
+        "status": "succeeded",
+        "metadata": {"reservation_id": f"res-{index:08d}", "table": index % 40},
+    }
+    if size is not None:
+        payload["padding"] = ""
+        payload["padding"] = "x" * max(size - len(json.dumps(payload)), 0)
+    return payload
+
+
+def make_body(index: int = 0, size: int | None = None) -> bytes:
+    """``make_payload`` encoded as a request body."""
+    return json.dumps(make_payload(index, size)).encode()
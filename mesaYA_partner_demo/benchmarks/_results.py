@@ -0,0 +1,97 @@
+"""Shared helpers for benchmark scripts: timing, percentiles and JSON results."""
+
+import json
+import platform
+import subprocess
+import timeit
+from collections.abc import Callable
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def git_commit() -> str:
+    """Get the short hash of the checked-out commit ("unknown" outside git)."""
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return out.stdout.strip()
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def latency_summary(latencies: list[float]) -> dict[str, float]:
+    """Summarize latencies (seconds) as milliseconds."""
+    values = sorted(latencies)
+    ms = lambda v: round(v * 1000, 3)  # noqa: E731
+    return {
+        "p50_ms": ms(percentile(values, 50)),
+        "p95_ms": ms(percentile(values, 95)),
+        "p99_ms": ms(percentile(values, 99)),
+        "max_ms": ms(values[-1]) if values else 0.0,
+        "mean_ms": ms(sum(values) / len(values)) if values else 0.0,
+    }
+
+
+def time_call(fn: Callable[[], Any], number: int, repeat: int = 5) -> dict[str, float]:
+    """
+    Time ``fn`` with ``timeit`` (best of ``repeat`` runs of ``number`` calls).
+
+    Returns:
+        ops/s and µs/op of the best run
+    """
+    best = min(timeit.repeat(fn, number=number, repeat=repeat))
+    return {
+        "ops_per_sec": round(number / best, 1),
+        "us_per_op": round(best / number * 1e6, 3),
+    }
+
+
+def write_results(name: str, results: dict[str, Any], output: str | None) -> Path:
+    """
+    Save results as JSON, tagged with commit, time and interpreter.
+
+    Args:
+        name: Benchmark name, used in the default file name
+        results: Measurements to store
+        output: Explicit output path; defaults to results/<name>-<commit>.json
+
+    Returns:
+        The path written
+    """
+    commit = git_commit()
+    path = Path(output) if output else RESULTS_DIR / f"{name}-{commit}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    document = {
+        "benchmark": name,
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    path.write_text(json.dumps(document, indent=2) + "\n")
+    return path
+
+
+def print_row(label: str, measurement: dict[str, float]) -> None:
+    print(
+        f"{label:<32} {measurement['ops_per_sec']:>12,.0f} ops/s"
+        f"  {measurement['us_per_op']:8.2f} µs/op"
+    )
+
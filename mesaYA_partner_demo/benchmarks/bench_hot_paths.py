@@ -0,0 +1,89 @@
+"""
+Microbenchmarks for the webhook ingestion hot paths.
+
+Covers signature generation/verification, EventStore inserts and stats,
+and event serialization. Results are printed and saved as JSON (by default
+to results/hot_paths-<commit>.json) for comparison with compare.py.
+
+Run with:
+    uv run python benchmarks/bench_hot_paths.py [--number 20000] [--output FILE]
+"""
+
+import argparse
+from datetime import datetime
+from uuid import uuid4
+
+from _payloads import SECRET, make_body, make_payload
+from _results import print_row, time_call, write_results
+
+from mesaya_partner_demo import json_codec
+from mesaya_partner_demo.models import EventStatus, EventStore, WebhookEvent
+from mesaya_partner_demo.webhook_service import WebhookService
+
+
+def make_event(index: int = 0) -> WebhookEvent:
+    payload = make_payload(index)
+    return WebhookEvent(
+        id=str(uuid4()),
+        event_type=payload["event"],
+        timestamp=datetime.utcnow(),
+        payload=payload,
+        status=EventStatus.VERIFIED,
+        signature="t=0,v1=00",
+        partner_id="partner-1",
+    )
+
+
+def run(number: int) -> dict[str, dict[str, float]]:
+    body = make_body()
+    header, _ = WebhookService.generate_signature(body, SECRET)
+    assert WebhookService.verify_signature(header, body, SECRET) == (True, None)
+
+    # A store already at steady state: full ring, so inserts also evict
+    store = EventStore(max_events=10_000)
+    events = [make_event(i) for i in range(10_000)]
+    for event in events:
+        store.add_received(event)
+    insert_events = iter([make_event(i) for i in range(number * 6)])
+
+    event = events[-1]
+    cases = {
+        "generate_signature": lambda: WebhookService.generate_signature(body, SECRET),
+        "verify_signature": lambda: WebhookService.verify_signature(header, body, SECRET),
+        "store.add_received": lambda: store.add_received(next(insert_events)),
+        "store.get_stats": store.get_stats,
+        "store.get_all_received(100)": lambda: store.get_all_received(limit=100),
+        "event.to_dict": event.to_dict,
+        "json_codec.dumps(to_dict)": lambda: json_codec.dumps(event.to_dict()),
+        "event.to_json (cached)": event.to_json,
+        "store.stats_json (cached)": store.stats_json,
+        "events page(100) from cached JSON": lambda: b",".join(
+            e.to_json() for e in store.query("received", None, 100)[0]
+        ),
+    }
+
+    results = {}
+    for label, fn in cases.items():
+        results[label] = time_call(fn, number)
+        print_row(label, results[label])
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--number", type=int, default=20000, help="calls per run")
+    parser.add_argument("--output", help="results file (default: results/hot_paths-<commit>.json)")
+    args = parser.parse_args()
+
+    print(f"json backend: {json_codec.BACKEND}")
+    results = run(args.number)
+    path = write_results(
+        "hot_paths",
+        {"json_backend": json_codec.BACKEND, "number": args.number, "cases": results},
+        args.output,
+    )
+    print(f"saved {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Memory retained per received event at a full EventStore.
+
+Ingests ``--events`` webhooks through ``WebhookService.process_webhook``
+into a store of the same capacity, then reports the bytes held per event
+(measured with tracemalloc) and the ingestion rate. Results are saved as
+JSON (by default to results/memory-<commit>.json) for comparison with
+compare.py.
+
+Run with:
+    uv run python benchmarks/bench_memory.py [--events 100000] [--output FILE]
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+from _payloads import make_body
+from _results import write_results
+
+from mesaya_partner_demo import json_codec
+from mesaya_partner_demo import webhook_service as webhook_module
+from mesaya_partner_demo.models import EventStore
+from mesaya_partner_demo.webhook_service import WebhookService
+
+
+def run(count: int) -> dict[str, float]:
+    store = EventStore(max_events=count)
+    webhook_module.event_store = store
+
+    gc.collect()
+    # Traced from before the bodies exist: events keep their raw body, and
+    # those bytes are part of what an event costs
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    bodies = [make_body(i) for i in range(count)]
+    start = time.perf_counter()
+    for index, body in enumerate(bodies):
+        WebhookService.process_webhook(body, None, partner_id=f"partner-{index % 4}")
+    elapsed = time.perf_counter() - start
+    # Only what the store still references counts
+    del bodies, body
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    return {
+        "events": count,
+        "retained_mb": round(retained / 2**20, 2),
+        "bytes_per_event": round(retained / count, 1),
+        # Includes tracemalloc overhead; compare between runs only
+        "ingest_per_sec": round(count / elapsed, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=100_000, help="events retained")
+    parser.add_argument("--output", help="results file (default: results/memory-<commit>.json)")
+    args = parser.parse_args()
+
+    print(f"json backend: {json_codec.BACKEND}")
+    results = run(args.events)
+    for key, value in results.items():
+        print(f"{key:<20} {value:>14,}")
+    path = write_results("memory", {"json_backend": json_codec.BACKEND, **results}, args.output)
+    print(f"saved {path}")
+
+
+if __name__ == "__main__":
+    main()
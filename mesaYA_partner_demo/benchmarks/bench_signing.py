@@ -0,0 +1,93 @@
+"""
+Microbenchmark: webhook signature verification before/after the HMAC key cache.
+
+"before" is the previous verification: it builds the signed message as a
+str and re-keys HMAC from the secret on every call. "after" is the current
+``WebhookService.verify_signature``, which feeds the raw bytes to a copy of a
+precomputed keyed state. Results are printed and saved as JSON (by default
+to results/signing-<commit>.json) for comparison with compare.py.
+
+Run with:
+    uv run python benchmarks/bench_signing.py [--size 2048] [--number 20000] [--output FILE]
+"""
+
+import argparse
+import hashlib
+import hmac
+import time
+
+from _payloads import SECRET, make_body
+from _results import print_row, time_call, write_results
+
+from mesaya_partner_demo.webhook_service import WebhookService
+
+
+def verify_rekeying(signature_header: str, payload: str, secret: str) -> bool:
+    """Verification as implemented before the key cache (keys HMAC per call)."""
+    parts = signature_header.split(",")
+    timestamp_part = next((p for p in parts if p.startswith("t=")), None)
+    signature_part = next((p for p in parts if p.startswith("v1=")), None)
+    if not timestamp_part or not signature_part:
+        return False
+    timestamp = int(timestamp_part[2:])
+    received_signature = signature_part[3:]
+    if abs(int(time.time()) - timestamp) > WebhookService.SIGNATURE_VALIDITY_SECONDS:
+        return False
+    signed_payload = f"{timestamp}.{payload}"
+    expected_signature = hmac.new(
+        secret.encode(),
+        signed_payload.encode(),
+        hashlib.sha256,
+    ).hexdigest()
+    return hmac.compare_digest(expected_signature, received_signature)
+
+
+def run(size: int, number: int) -> dict[str, dict[str, float]]:
+    payload = make_body(size=size)
+    header, _ = WebhookService.generate_signature(payload, SECRET)
+    payload_str = payload.decode()
+    assert verify_rekeying(header, payload_str, SECRET)
+    assert WebhookService.verify_signature(header, payload, SECRET) == (True, None)
+
+    print(f"payload={len(payload)} bytes")
+    cases = {
+        "verify (re-key per call)": lambda: verify_rekeying(header, payload_str, SECRET),
+        "verify (cached key)": lambda: WebhookService.verify_signature(header, payload, SECRET),
+        "generate (cached key)": lambda: WebhookService.generate_signature(payload, SECRET),
+    }
+
+    results = {}
+    for label, fn in cases.items():
+        results[label] = time_call(fn, number)
+        print_row(label, results[label])
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=int, default=2048, help="payload bytes")
+    parser.add_argument("--number", type=int, default=20000, help="calls per run")
+    parser.add_argument("--output", help="results file (default: results/signing-<commit>.json)")
+    args = parser.parse_args()
+
+    results = run(args.size, args.number)
+    speedup = (
+        results["verify (cached key)"]["ops_per_sec"]
+        / results["verify (re-key per call)"]["ops_per_sec"]
+    )
+    print(f"speedup: {speedup:.2f}x")
+    path = write_results(
+        "signing",
+        {
+            "size": args.size,
+            "number": args.number,
+            "speedup": round(speedup, 2),
+            "cases": results,
+        },
+        args.output,
+    )
+    print(f"saved {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Cold start of the partner service: import times and time to first response.
+
+Every measurement runs in a fresh interpreter, as after a pod restart:
+
+- ``import mesaya_partner_demo`` and the CLI module (must not load the app)
+- ``import mesaya_partner_demo.app`` (FastAPI, pydantic, Jinja2, httpx...)
+- ``mesaya-partner`` started in production mode until /health answers,
+  then the first dashboard request
+
+Each is repeated ``--runs`` times; the median and best are reported and
+saved as JSON (by default to results/startup-<commit>.json) for comparison
+with compare.py.
+
+Run with:
+    uv run python benchmarks/bench_startup.py [--runs 5] [--port 8099]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+from _results import write_results
+
+IMPORTS = {
+    "import_package": "import mesaya_partner_demo",
+    "import_cli": "import mesaya_partner_demo.cli",
+    "import_app": "import mesaya_partner_demo.app",
+}
+
+
+def time_import(statement: str) -> float:
+    """Seconds a fresh interpreter takes to run ``statement`` (minus startup)."""
+    code = (
+        "import time; start = time.perf_counter(); "
+        f"{statement}; print(time.perf_counter() - start)"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def time_server(port: int, timeout: float = 30.0) -> tuple[float, float]:
+    """
+    Start the service and time it until /health answers, then the dashboard.
+
+    Returns:
+        Seconds from spawn to the first /health response, and the duration
+        of the first dashboard request
+    """
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "mesaya_partner_demo", "--port", str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=5.0) as client:
+            while True:
+                if time.perf_counter() - start > timeout:
+                    raise RuntimeError(f"server not ready after {timeout}s")
+                try:
+                    if client.get("/health").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    time.sleep(0.01)
+            ready = time.perf_counter() - start
+
+            request_start = time.perf_counter()
+            client.get("/").raise_for_status()
+            first_dashboard = time.perf_counter() - request_start
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+    return ready, first_dashboard
+
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    return {
+        "median_ms": round(statistics.median(samples) * 1000, 2),
+        "best_ms": round(min(samples) * 1000, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes per measurement")
+    parser.add_argument("--port", type=int, default=8099, help="port for the server runs")
+    parser.add_argument("--output", help="results file (default: results/startup-<commit>.json)")
+    args = parser.parse_args()
+
+    results: dict[str, dict[str, float]] = {}
+    for name, statement in IMPORTS.items():
+        results[name] = summarize([time_import(statement) for _ in range(args.runs)])
+
+    ready: list[float] = []
+    dashboard: list[float] = []
+    for _ in range(args.runs):
+        ready_s, dashboard_s = time_server(args.port)
+        ready.append(ready_s)
+        dashboard.append(dashboard_s)
+    results["server_ready"] = summarize(ready)
+    results["first_dashboard"] = summarize(dashboard)
+
+    for name, summary in results.items():
+        print(f"{name:<20} median {summary['median_ms']:>9.2f} ms  best {summary['best_ms']:>9.2f} ms")
+    path = write_results("startup", results, args.output)
+    print(f"saved {path}")
+
+
+if __name__ == "__main__":
+    main()
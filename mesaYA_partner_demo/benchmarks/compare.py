@@ -0,0 +1,65 @@
+"""
+Compare two benchmark result files (e.g. from two commits).
+
+Every numeric measurement present in both files is listed with its
+relative change. Throughputs (``*_per_sec``, ``*_rps``) are better when
+higher; everything else (latencies, µs/op) is better when lower.
+
+Run with:
+    uv run python benchmarks/compare.py results/hot_paths-abc123.json results/hot_paths-def456.json
+"""
+
+import argparse
+import json
+from typing import Any
+
+
+def flatten(data: Any, prefix: str = "") -> dict[str, float]:
+    """Flatten nested results into ``a.b.c -> number``."""
+    flat: dict[str, float] = {}
+    if isinstance(data, dict):
+        for key, value in data.items():
+            flat.update(flatten(value, f"{prefix}{key}."))
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        flat[prefix.rstrip(".")] = float(data)
+    return flat
+
+
+def higher_is_better(key: str) -> bool:
+    return key.endswith(("_per_sec", "_rps"))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=5.0,
+        help="percent change flagged as a regression/improvement",
+    )
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    print(f"{baseline['benchmark']}: {baseline['commit']} -> {candidate['commit']}")
+    before = flatten(baseline["results"])
+    after = flatten(candidate["results"])
+    for key in [k for k in before if k in after]:
+        old, new = before[key], after[key]
+        if old == 0:
+            continue
+        change = (new - old) / old * 100
+        better = change > 0 if higher_is_better(key) else change < 0
+        flag = ""
+        if abs(change) >= args.threshold:
+            flag = "improved" if better else "REGRESSED"
+        print(f"{key:<48} {old:>12.3f} {new:>12.3f} {change:+8.1f}%  {flag}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+End-to-end load generator: fires signed webhooks at /api/webhook at a fixed rate.
+
+Requests are scheduled open-loop (request i goes out at start + i/rate, no
+matter how slow earlier ones were), and latency is measured from the
+scheduled time, so a stalled server shows up in the percentiles instead of
+just lowering the request rate. Throughput, p50/p95/p99 latency and status
+codes are printed and saved as JSON (results/load_webhooks-<commit>.json).
+
+The server must verify with the same secret: pass --install-secret to
+install it through /api/secret/rotate first.
+
+Run with (server already running):
+    uv run python benchmarks/load_webhooks.py --rate 500 --duration 10 --install-secret
+"""
+
+import argparse
+import asyncio
+import time
+from collections import Counter
+
+import httpx
+from _payloads import SECRET, make_body
+from _results import latency_summary, write_results
+
+from mesaya_partner_demo.webhook_service import WebhookService
+
+
+async def run_load(
+    url: str,
+    secret: str,
+    rate: float,
+    duration: float,
+    concurrency: int,
+) -> dict:
+    total = int(rate * duration)
+    latencies: list[float] = []
+    statuses: Counter[str] = Counter()
+    limit = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=30.0) as client:
+
+        async def fire(index: int, scheduled: float) -> None:
+            body = make_body(index)
+            header, _ = WebhookService.generate_signature(body, secret)
+            headers = {
+                "Content-Type": "application/json",
+                "X-Webhook-Signature": header,
+                "X-Partner-Id": "load-test",
+            }
+            async with limit:
+                try:
+                    response = await client.post(url, content=body, headers=headers)
+                    statuses[str(response.status_code)] += 1
+                except httpx.HTTPError as e:
+                    statuses[type(e).__name__] += 1
+            latencies.append(time.perf_counter() - scheduled)
+
+        start = time.perf_counter()
+        tasks = []
+        for index in range(total):
+            scheduled = start + index / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(fire(index, scheduled)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+
+    ok = statuses.get("200", 0)
+    return {
+        "target_rate": rate,
+        "duration_s": round(elapsed, 3),
+        "requests": total,
+        "throughput_rps": round(total / elapsed, 1),
+        "success_rps": round(ok / elapsed, 1),
+        "statuses": dict(statuses),
+        "latency": latency_summary(latencies),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", default="http://localhost:8088")
+    parser.add_argument("--rate", type=float, default=200, help="requests per second")
+    parser.add_argument("--duration", type=float, default=10, help="seconds")
+    parser.add_argument("--concurrency", type=int, default=100, help="max in-flight requests")
+    parser.add_argument("--secret", default=SECRET)
+    parser.add_argument(
+        "--install-secret",
+        action="store_true",
+        help="install --secret on the server via /api/secret/rotate first",
+    )
+    parser.add_argument("--output", help="results file (default: results/load_webhooks-<commit>.json)")
+    args = parser.parse_args()
+
+    base_url = args.base_url.rstrip("/")
+    if args.install_secret:
+        httpx.post(f"{base_url}/api/secret/rotate", json={"secret": args.secret}).raise_for_status()
+
+    results = asyncio.run(
+        run_load(
+            f"{base_url}/api/webhook",
+            args.secret,
+            args.rate,
+            args.duration,
+            args.concurrency,
+        )
+    )
+    latency = results["latency"]
+    print(
+        f"{results['requests']} requests in {results['duration_s']}s: "
+        f"{results['throughput_rps']} req/s ({results['success_rps']} ok/s), "
+        f"statuses {results['statuses']}"
+    )
+    print(
+        f"latency p50 {latency['p50_ms']} ms, p95 {latency['p95_ms']} ms, "
+        f"p99 {latency['p99_ms']} ms, max {latency['max_ms']} ms"
+    )
+    path = write_results("load_webhooks", {"base_url": base_url, **results}, args.output)
+    print(f"saved {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,86 @@
-"""MesaYA Partner Demo - B2B Webhook Interoperability Demo."""
-
-from mesaya_partner_demo.app import app
-
-
-def main():
-    """Run the partner demo service."""
-    import uvicorn
-
-    uvicorn.run(
-        "mesaya_partner_demo.app:app",
-        host="0.0.0.0",
-        port=8088,
-        reload=True,
-    )
-
-
-__all__ = ["app", "main"]
+"""MesaYA Partner Demo - B2B Webhook Interoperability Demo."""
+
+from typing import Any
+
+
+def __getattr__(name: str) -> Any:
+    # The ASGI app (FastAPI, pydantic, Jinja2, httpx...) is only imported
+    # when asked for, so the CLI subcommands start without it
+    if name == "app":
+        from mesaya_partner_demo.app import app
+
+        # Importing the submodule bound its module object to this name
+        globals()["app"] = app
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def main(argv: list[str] | None = None):
+    """
+    Run the partner demo service.
+
+    By default this is the production server: one process, no reload and
+    no access log. ``--workers N`` runs N such processes sharing partner
+    registration and events through a SQLite file (``--state``).
+    ``--reload`` is the development server, restarted on code changes.
+
+    ``export`` and ``replay`` dump the event history and re-send it to a
+    MesaYA for load testing (see ``cli.py``).
+    """
+    import argparse
+    import os
+
+    from mesaya_partner_demo.cli import add_subcommands
+    from mesaya_partner_demo.config import config
+
+    parser = argparse.ArgumentParser(prog="mesaya-partner", description=main.__doc__)
+    parser.add_argument("--host", default=config.host)
+    parser.add_argument("--port", type=int, default=config.port)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="run N worker processes with shared state",
+    )
+    parser.add_argument(
+        "--state",
+        default=os.getenv("PARTNER_SHARED_STATE", "partner-state.db"),
+        help="SQLite file shared by the workers (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--reload",
+        action="store_true",
+        help="development mode: reload on code changes, log every request",
+    )
+    subparsers = parser.add_subparsers(dest="command", metavar="{export,replay}")
+    add_subcommands(subparsers)
+    args = parser.parse_args(argv)
+
+    if args.command is not None:
+        raise SystemExit(args.handler(args))
+
+    import uvicorn
+
+    if args.reload:
+        if args.workers is not None:
+            parser.error("--reload runs a single process; drop --workers")
+        uvicorn.run(
+            "mesaya_partner_demo.app:app",
+            host=args.host,
+            port=args.port,
+            reload=True,
+        )
+        return
+
+    if args.workers is not None:
+        # Read by every worker process when it imports the app
+        os.environ["PARTNER_SHARED_STATE"] = os.path.abspath(args.state)
+    uvicorn.run(
+        "mesaya_partner_demo.app:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        access_log=False,
+    )
+
+
+__all__ = ["app", "main"]
@@ -1,6 +1,6 @@
-"""Entry point for running as module."""
-
-from mesaya_partner_demo import main
-
-if __name__ == "__main__":
-    main()
+"""Entry point for running as module."""
+
+from mesaya_partner_demo import main
+
+if __name__ == "__main__":
+    main()
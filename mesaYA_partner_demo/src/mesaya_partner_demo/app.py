@@ -1,212 +1,760 @@
-"""FastAPI Application for Partner Demo service."""
-
-from pathlib import Path
-from typing import Any
-
-from fastapi import FastAPI, Request, Header
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
-from pydantic import BaseModel
-
-from mesaya_partner_demo.config import config
-from mesaya_partner_demo.models import event_store
-from mesaya_partner_demo.mesa_ya_client import mesa_ya_client
-from mesaya_partner_demo.webhook_service import webhook_service
-
-# Templates directory
-TEMPLATES_DIR = Path(__file__).parent / "templates"
-templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
-
-# Create FastAPI app
-app = FastAPI(
-    title="MesaYA Partner Demo",
-    description="Demo B2B Partner for webhook interoperability with MesaYA",
-    version="1.0.0",
-)
-
-# CORS configuration
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-
-# ============================================================================
-# Request/Response Models
-# ============================================================================
-
-
-class RegisterRequest(BaseModel):
-    """Request to register as a partner."""
-
-    mesa_ya_url: str = "http://localhost:3000"
-    events: list[str] = ["payment.created", "payment.succeeded", "payment.failed"]
-
-
-class SendEventRequest(BaseModel):
-    """Request to send an event to MesaYA."""
-
-    event_type: str
-    data: dict[str, Any]
-    target_url: str | None = None
-
-
-# ============================================================================
-# Web UI Endpoints
-# ============================================================================
-
-
-@app.get("/", response_class=HTMLResponse)
-async def dashboard(request: Request) -> HTMLResponse:
-    """Render the main dashboard."""
-    return templates.TemplateResponse(
-        "dashboard.html",
-        {
-            "request": request,
-            "partner_registered": config.is_registered,
-            "partner_id": config.partner_id or "",
-            "registered_at": (
-                config.registered_at.strftime("%Y-%m-%d %H:%M")
-                if config.registered_at
-                else ""
-            ),
-            "stats": event_store.get_stats(),
-            "received_events": event_store.get_all_received(),
-            "sent_events": event_store.get_all_sent(),
-        },
-    )
-
-
-# ============================================================================
-# API Endpoints
-# ============================================================================
-
-
-@app.get("/health")
-async def health_check() -> dict[str, Any]:
-    """Health check endpoint."""
-    return {
-        "status": "healthy",
-        "service": "mesaya-partner-demo",
-        "registered": config.is_registered,
-        "partner_id": config.partner_id,
-    }
-
-
-@app.post("/api/webhook")
-async def receive_webhook(
-    request: Request,
-    x_webhook_signature: str | None = Header(None, alias="X-Webhook-Signature"),
-    x_partner_id: str | None = Header(None, alias="X-Partner-Id"),
-) -> dict[str, Any]:
-    """
-    Receive webhooks from MesaYA.
-
-    This endpoint receives payment events and other notifications.
-    Verifies HMAC-SHA256 signature if partner is registered.
-    """
-    # Get raw body for signature verification
-    body = await request.body()
-    payload = await request.json()
-
-    print(f"📥 Webhook received: {payload.get('event', 'unknown')}")
-    print(f"   Signature: {x_webhook_signature}")
-    print(f"   Partner ID: {x_partner_id}")
-
-    # Process the webhook
-    event = webhook_service.process_webhook(
-        payload=payload,
-        signature_header=x_webhook_signature,
-        partner_id=x_partner_id,
-    )
-
-    return {
-        "received": True,
-        "event_id": event.id,
-        "event_type": event.event_type,
-        "status": event.status.value,
-        "message": f"Webhook {event.event_type} processed successfully",
-    }
-
-
-@app.get("/api/events")
-async def get_events() -> dict[str, Any]:
-    """Get all received and sent events."""
-    return {
-        "received": event_store.get_all_received(),
-        "sent": event_store.get_all_sent(),
-        "stats": event_store.get_stats(),
-    }
-
-
-@app.post("/api/register")
-async def register_as_partner(request: RegisterRequest) -> dict[str, Any]:
-    """Register this service as a B2B partner in MesaYA."""
-    result = await mesa_ya_client.register_as_partner(
-        mesa_ya_url=request.mesa_ya_url,
-        events=request.events,
-    )
-    return result
-
-
-@app.post("/api/send-event")
-async def send_event(request: SendEventRequest) -> dict[str, Any]:
-    """Send a webhook event to MesaYA (bidirectional communication)."""
-    event = await mesa_ya_client.send_webhook_to_mesaya(
-        event_type=request.event_type,
-        data=request.data,
-        target_url=request.target_url,
-    )
-    return event.to_dict()
-
-
-@app.get("/api/health-check")
-async def check_mesaya_health() -> dict[str, Any]:
-    """Check health of MesaYA services."""
-    return await mesa_ya_client.check_mesaya_health()
-
-
-@app.get("/api/status")
-async def get_partner_status() -> dict[str, Any]:
-    """Get current partner registration status."""
-    return {
-        "registered": config.is_registered,
-        "partner_id": config.partner_id,
-        "secret_set": config.partner_secret is not None,
-        "registered_at": (
-            config.registered_at.isoformat() if config.registered_at else None
-        ),
-        "mesa_ya_url": config.mesa_ya_res_url,
-        "webhook_url": config.webhook_url,
-        "subscribed_events": config.subscribed_events,
-    }
-
-
-@app.delete("/api/events")
-async def clear_events() -> dict[str, str]:
-    """Clear all stored events."""
-    event_store.clear()
-    return {"message": "All events cleared"}
-
-
-# ============================================================================
-# Startup/Shutdown Events
-# ============================================================================
-
-
-@app.on_event("startup")
-async def startup_event() -> None:
-    """Application startup."""
-    print("🤝 MesaYA Partner Demo starting...")
-    print(f"📡 Webhook endpoint: {config.webhook_url}")
-    print(f"🌐 Dashboard: http://localhost:{config.port}")
-
-
-@app.on_event("shutdown")
-async def shutdown_event() -> None:
-    """Application shutdown."""
-    print("👋 MesaYA Partner Demo shutting down...")
+"""FastAPI Application for Partner Demo service."""
+
+import asyncio
+import logging
+import os
+import time
+from collections.abc import AsyncIterator
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Literal
+
+from fastapi import FastAPI, Request, Header, HTTPException, Query
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import (
+    HTMLResponse,
+    PlainTextResponse,
+    Response,
+    StreamingResponse,
+)
+import jinja2
+from pydantic import BaseModel
+
+from mesaya_partner_demo import handlers  # noqa: F401  (registers the handlers)
+from mesaya_partner_demo import json_codec
+from mesaya_partner_demo.coalescer import delivery_coalescer
+from mesaya_partner_demo.config import config
+from mesaya_partner_demo.delivery import delivery_queue
+from mesaya_partner_demo.event_log import SegmentedEventLog
+from mesaya_partner_demo.health import health_prober
+from mesaya_partner_demo.json_logging import elapsed_ms, json_logging, log_event
+from mesaya_partner_demo.live_feed import live_feed
+from mesaya_partner_demo.models import EventStatus, WebhookEvent, event_store
+from mesaya_partner_demo.mesa_ya_client import mesa_ya_client
+from mesaya_partner_demo.metrics import MetricsMiddleware, metrics
+from mesaya_partner_demo.partners import Partner, partner_registry
+from mesaya_partner_demo.pipeline import pipeline
+from mesaya_partner_demo.response_cache import (
+    CachedBody,
+    JSONBytesResponse,
+    ResponseCache,
+)
+from mesaya_partner_demo.shared_state import (
+    publish_config,
+    publish_partners,
+    shared_state,
+)
+from mesaya_partner_demo.timeseries import timeseries
+from mesaya_partner_demo.webhook_service import webhook_service
+
+# Events fetched per step when streaming NDJSON
+NDJSON_PAGE_SIZE = 500
+
+# Templates are compiled once, at startup, and never re-checked on disk
+TEMPLATES_DIR = Path(__file__).parent / "templates"
+templates = jinja2.Environment(
+    loader=jinja2.FileSystemLoader(TEMPLATES_DIR),
+    autoescape=True,
+    auto_reload=False,
+)
+
+# Rendered dashboard and /api/events bodies, reused until the store changes
+response_cache = ResponseCache(max_entries=config.response_cache_entries)
+
+# Create FastAPI app
+app = FastAPI(
+    title="MesaYA Partner Demo",
+    description="Demo B2B Partner for webhook interoperability with MesaYA",
+    version="1.0.0",
+    default_response_class=JSONBytesResponse,
+)
+
+# CORS configuration
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+# Per-route latency histograms and status counters (see /metrics)
+app.add_middleware(MetricsMiddleware)
+
+
+# ============================================================================
+# Request/Response Models
+# ============================================================================
+
+
+class RegisterRequest(BaseModel):
+    """Request to register as a partner."""
+
+    mesa_ya_url: str = "http://localhost:3000"
+    events: list[str] = ["payment.created", "payment.succeeded", "payment.failed"]
+
+
+class RotateSecretRequest(BaseModel):
+    """Request to install a new partner webhook secret."""
+
+    secret: str
+
+
+class PartnerRequest(BaseModel):
+    """Request to add (or replace) a partner identity in the registry."""
+
+    partner_id: str
+    secret: str
+    mesa_ya_url: str = "http://localhost:3000"
+    events: list[str] = ["payment.created", "payment.succeeded", "payment.failed"]
+
+
+class SendEventRequest(BaseModel):
+    """Request to send an event to MesaYA."""
+
+    event_type: str
+    data: dict[str, Any]
+    target_url: str | None = None
+    partner_id: str | None = None
+
+
+# ============================================================================
+# Web UI Endpoints
+# ============================================================================
+
+
+async def _sync_workers() -> None:
+    """Pick up what other worker processes wrote to the shared state."""
+    if shared_state is not None:
+        await shared_state.refresh()
+
+
+def _cached_response(
+    request: Request,
+    cached: CachedBody,
+    media_type: str,
+) -> Response:
+    """Send a cached body, or 304 if the client already has this version."""
+    headers = {"ETag": cached.etag, "Cache-Control": "no-cache"}
+    if cached.matches(request.headers.get("if-none-match")):
+        return Response(status_code=304, headers=headers)
+    return Response(cached.body, media_type=media_type, headers=headers)
+
+
+@app.get("/", response_class=HTMLResponse)
+async def dashboard(request: Request) -> Response:
+    """
+    Render the main dashboard.
+
+    The page is rendered once per store version (and registration state)
+    and revalidated with ``If-None-Match``.
+    """
+    await _sync_workers()
+    key = ("dashboard", config.partner_id, config.registered_at)
+    cached = response_cache.get(event_store.version, key, _render_dashboard)
+    return _cached_response(request, cached, "text/html; charset=utf-8")
+
+
+def _render_dashboard() -> bytes:
+    return templates.get_template("dashboard.html").render(
+        {
+            "max_events": config.dashboard_max_events,
+            "partner_registered": config.is_registered,
+            "partner_id": config.partner_id or "",
+            "registered_at": (
+                config.registered_at.strftime("%Y-%m-%d %H:%M")
+                if config.registered_at
+                else ""
+            ),
+            "stats": event_store.get_stats(),
+            "received_events": event_store.get_all_received(
+                limit=config.dashboard_max_events
+            ),
+            "sent_events": event_store.get_all_sent(
+                limit=config.dashboard_max_events
+            ),
+        }
+    ).encode()
+
+
+# ============================================================================
+# API Endpoints
+# ============================================================================
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics() -> PlainTextResponse:
+    """Expose counters and latency histograms in Prometheus text format."""
+    return PlainTextResponse(
+        metrics.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+@app.get("/health")
+async def health_check() -> dict[str, Any]:
+    """Health check endpoint."""
+    return {
+        "status": "healthy",
+        "service": "mesaya-partner-demo",
+        "registered": config.is_registered,
+        "partner_id": config.partner_id,
+    }
+
+
+def _check_pipeline_capacity(events: list[WebhookEvent], partner_id: str | None) -> None:
+    """
+    Refuse a webhook with 503 while the processing pipeline is full.
+
+    Only deliveries with an event the pipeline would queue are refused;
+    invalid signatures and types without handlers never enter the queue.
+    """
+    if pipeline.full() and any(pipeline.accepts(event) for event in events):
+        pipeline.rejected += 1
+        log_event(logging.WARNING, "webhook refused: pipeline full", partner_id=partner_id)
+        raise HTTPException(
+            status_code=503,
+            detail="Processing queue full, retry later",
+            headers={"Retry-After": "1"},
+        )
+
+
+def _submit_batch(results: list[dict[str, Any]]) -> None:
+    """Queue the accepted items of a batch; items that do not fit fail."""
+    for item in results:
+        event = item.pop("event", None)
+        if event is None:
+            continue
+        try:
+            item["queued"] = pipeline.submit(event)
+        except asyncio.QueueFull:
+            event_store.update_received(event, EventStatus.ERROR, "Processing queue full")
+            item["status"] = EventStatus.ERROR.value
+            item["queued"] = False
+
+
+@app.post("/api/webhook")
+async def receive_webhook(
+    request: Request,
+    x_webhook_signature: str | None = Header(None, alias="X-Webhook-Signature"),
+    x_partner_id: str | None = Header(None, alias="X-Partner-Id"),
+    x_webhook_id: str | None = Header(None, alias="X-Webhook-Id"),
+) -> dict[str, Any]:
+    """
+    Receive webhooks from MesaYA.
+
+    This endpoint receives payment events and other notifications.
+    Verifies HMAC-SHA256 signature if partner is registered, stores the
+    event and acknowledges it; the handlers registered for its type run
+    afterwards in the processing pipeline. While the pipeline is full the
+    webhook is refused with 503 so MesaYA retries it later.
+    Replays of an already accepted delivery are acknowledged without
+    being decoded or stored again.
+    """
+    start = time.perf_counter()
+    await _sync_workers()
+    if webhook_service.is_replay(x_webhook_signature, x_webhook_id):
+        log_event(
+            logging.DEBUG,
+            "webhook duplicate",
+            webhook_id=x_webhook_id,
+            partner_id=x_partner_id,
+        )
+        return {
+            "received": True,
+            "duplicate": True,
+            "message": "Duplicate webhook ignored",
+        }
+
+    # Raw body: verified as-is and decoded once
+    body = await request.body()
+
+    # Process the webhook
+    try:
+        async with event_store.writing():
+            event = webhook_service.process_webhook(
+                body=body,
+                signature_header=x_webhook_signature,
+                partner_id=x_partner_id,
+                webhook_id=x_webhook_id,
+                admit=lambda events: _check_pipeline_capacity(events, x_partner_id),
+            )
+    except ValueError as e:
+        log_event(logging.WARNING, "webhook rejected", error=str(e), partner_id=x_partner_id)
+        raise HTTPException(status_code=400, detail=f"Invalid webhook body: {e}")
+    # No await since the capacity check, so the queue still has room
+    queued = pipeline.submit(event)
+    timeseries.observe_latency("webhook", time.perf_counter() - start)
+
+    log_event(
+        logging.INFO,
+        "webhook received",
+        event_id=event.id,
+        event_type=event.event_type,
+        status=event.status.value,
+        partner_id=x_partner_id,
+        signed=x_webhook_signature is not None,
+        queued=queued,
+        duration_ms=elapsed_ms(start),
+    )
+
+    return {
+        "received": True,
+        "event_id": event.id,
+        "event_type": event.event_type,
+        "status": event.status.value,
+        "queued": queued,
+        "message": (
+            f"Webhook {event.event_type} accepted for processing"
+            if queued
+            else f"Webhook {event.event_type} processed successfully"
+        ),
+    }
+
+
+@app.post("/api/webhook/batch")
+async def receive_webhook_batch(
+    request: Request,
+    x_webhook_signature: str | None = Header(None, alias="X-Webhook-Signature"),
+    x_partner_id: str | None = Header(None, alias="X-Partner-Id"),
+    x_webhook_id: str | None = Header(None, alias="X-Webhook-Id"),
+) -> dict[str, Any]:
+    """
+    Receive many webhooks from MesaYA in one request (backfills, bursts).
+
+    The body is a JSON array of events or NDJSON (one event per line),
+    signed as a whole like a single webhook. Every item gets its own
+    result; a bad item is rejected without failing the rest.
+    """
+    start = time.perf_counter()
+    await _sync_workers()
+    if webhook_service.is_replay(x_webhook_signature, x_webhook_id):
+        log_event(
+            logging.DEBUG,
+            "webhook batch duplicate",
+            webhook_id=x_webhook_id,
+            partner_id=x_partner_id,
+        )
+        return {
+            "received": True,
+            "duplicate": True,
+            "message": "Duplicate webhook batch ignored",
+        }
+
+    body = await request.body()
+    try:
+        async with event_store.writing():
+            results = webhook_service.process_batch(
+                body=body,
+                signature_header=x_webhook_signature,
+                partner_id=x_partner_id,
+                webhook_id=x_webhook_id,
+                max_items=config.webhook_batch_max_items,
+                admit=lambda events: _check_pipeline_capacity(events, x_partner_id),
+            )
+            _submit_batch(results)
+    except ValueError as e:
+        log_event(
+            logging.WARNING, "webhook batch rejected", error=str(e), partner_id=x_partner_id
+        )
+        raise HTTPException(status_code=400, detail=f"Invalid webhook batch: {e}")
+
+    accepted = sum(1 for item in results if "event_id" in item)
+    duplicates = sum(1 for item in results if item["status"] == "duplicate")
+    rejected = len(results) - accepted - duplicates
+    timeseries.observe_latency("webhook", time.perf_counter() - start)
+
+    log_event(
+        logging.INFO,
+        "webhook batch received",
+        items=len(results),
+        accepted=accepted,
+        duplicates=duplicates,
+        rejected=rejected,
+        partner_id=x_partner_id,
+        signed=x_webhook_signature is not None,
+        duration_ms=elapsed_ms(start),
+    )
+
+    return {
+        "received": True,
+        "items": len(results),
+        "accepted": accepted,
+        "duplicates": duplicates,
+        "rejected": rejected,
+        "results": results,
+    }
+
+
+@app.get("/api/events")
+async def get_events(
+    request: Request,
+    kind: Literal["received", "sent"] | None = None,
+    cursor: int | None = Query(None, description="Seq to continue below"),
+    limit: int | None = Query(None, ge=1, le=1000),
+    event_type: str | None = None,
+    status: str | None = None,
+    partner_id: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    output: Literal["json", "ndjson"] = Query("json", alias="format"),
+) -> Any:
+    """
+    Get received or sent events, newest first, one cursor page at a time.
+
+    Pass ``next_cursor`` from a response as ``cursor`` to get the next page.
+    With ``format=ndjson`` every matching event is streamed instead, one
+    JSON document per line, without building the whole list in memory.
+    JSON pages are cached per store version and carry an ETag for
+    conditional requests.
+
+    Without any paging or filter parameter the original response is kept:
+    ``{"received": [...], "sent": [...], "stats": {...}}`` with every
+    event held in memory.
+    """
+    await _sync_workers()
+    filters = {
+        "event_type": event_type,
+        "status": status,
+        "partner_id": partner_id,
+        "since": since,
+        "until": until,
+    }
+    paged = (
+        kind is not None
+        or cursor is not None
+        or limit is not None
+        or any(value is not None for value in filters.values())
+    )
+    kind = kind or "received"
+    limit = limit or 50
+
+    if output == "ndjson":
+        return StreamingResponse(
+            _stream_events(kind, cursor, filters),
+            media_type="application/x-ndjson",
+        )
+
+    if not paged:
+        cached = response_cache.get(event_store.version, ("events",), _render_all_events)
+        return _cached_response(request, cached, "application/json")
+
+    async def render() -> bytes:
+        events, next_cursor = await event_store.aquery(kind, cursor, limit, **filters)
+        # Records are spliced in from their cached JSON
+        return b"".join(
+            (
+                b'{"kind":',
+                json_codec.dumps(kind),
+                b',"events":[',
+                b",".join(e.to_json() for e in events),
+                b'],"next_cursor":',
+                json_codec.dumps(next_cursor),
+                b',"stats":',
+                event_store.stats_json(),
+                b"}",
+            )
+        )
+
+    key = ("events", kind, cursor, limit, *filters.values())
+    cached = await response_cache.aget(event_store.version, key, render)
+    return _cached_response(request, cached, "application/json")
+
+
+def _render_all_events() -> bytes:
+    return b"".join(
+        (
+            b'{"received":[',
+            b",".join(e.to_json() for e in event_store.received_events.latest()),
+            b'],"sent":[',
+            b",".join(e.to_json() for e in event_store.sent_events.latest()),
+            b'],"stats":',
+            event_store.stats_json(),
+            b"}",
+        )
+    )
+
+
+async def _stream_events(
+    kind: str,
+    cursor: int | None,
+    filters: dict[str, Any],
+) -> AsyncIterator[bytes]:
+    """Yield matching events as NDJSON, fetching them page by page."""
+    while True:
+        events, cursor = await event_store.aquery(
+            kind, cursor, NDJSON_PAGE_SIZE, **filters
+        )
+        if events:
+            yield b"".join(e.to_json() + b"\n" for e in events)
+        if cursor is None:
+            return
+
+
+@app.get("/api/events/live")
+async def get_live_events(request: Request) -> StreamingResponse:
+    """
+    Stream new events and stats deltas as Server-Sent Events.
+
+    Event names are "received", "received_update", "sent", "sent_update",
+    "stats", "cleared" and "resync"; the last one means updates were
+    dropped because the client fell behind, and it should reload.
+    """
+    return StreamingResponse(
+        _stream_live(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _stream_live(request: Request) -> AsyncIterator[bytes]:
+    """Yield live feed messages until the client goes away."""
+    subscriber = live_feed.subscribe()
+    try:
+        while not await request.is_disconnected():
+            batch = await subscriber.next_batch(live_feed.heartbeat_interval)
+            yield b"".join(batch) if batch else b": keepalive\n\n"
+    finally:
+        live_feed.unsubscribe(subscriber)
+
+
+@app.get("/api/stats/timeseries")
+async def get_timeseries(
+    resolution: Literal["second", "minute"] = "second",
+    window: int | None = Query(None, ge=1, description="Buckets (default: all kept)"),
+) -> dict[str, Any]:
+    """
+    Get event rates over time, one bucket per second or per minute.
+
+    Series (oldest bucket first) count received and sent events, invalid
+    signatures, processing errors, delivered and failed delivery attempts,
+    and average webhook and delivery latency; ``summary`` aggregates them
+    over the window.
+    """
+    await _sync_workers()
+    return timeseries.snapshot(resolution, window)
+
+
+@app.post("/api/register")
+async def register_as_partner(request: RegisterRequest) -> dict[str, Any]:
+    """Register this service as a B2B partner in MesaYA."""
+    result = await mesa_ya_client.register_as_partner(
+        mesa_ya_url=request.mesa_ya_url,
+        events=request.events,
+    )
+    return result
+
+
+@app.post("/api/secret/rotate")
+async def rotate_secret(request: RotateSecretRequest) -> dict[str, Any]:
+    """
+    Rotate the partner webhook secret.
+
+    The replaced secret stays valid for verification until the next rotation,
+    so webhooks already signed with it are not rejected.
+    """
+    config.rotate_secret(request.secret)
+    publish_config()
+    return {
+        "rotated": True,
+        "previous_secret_set": config.previous_partner_secret is not None,
+    }
+
+
+@app.get("/api/partners")
+async def list_partners() -> list[dict[str, Any]]:
+    """List the registered partner identities (without their secrets)."""
+    await _sync_workers()
+    return [partner.to_dict() for partner in partner_registry.all()]
+
+
+@app.post("/api/partners", status_code=201)
+async def add_partner(request: PartnerRequest) -> dict[str, Any]:
+    """
+    Add a partner identity, or replace the one with the same id.
+
+    Webhooks carrying its id in ``X-Partner-Id`` are verified with its
+    secret; events sent with its ``partner_id`` go to its MesaYA.
+    """
+    partner = Partner(
+        partner_id=request.partner_id,
+        secret=request.secret,
+        mesa_ya_res_url=request.mesa_ya_url.rstrip("/"),
+        subscribed_events=tuple(request.events),
+    )
+    partner_registry.upsert(partner)
+    publish_partners()
+    return partner.to_dict()
+
+
+@app.delete("/api/partners/{partner_id}")
+async def remove_partner(partner_id: str) -> dict[str, Any]:
+    """Remove a partner identity from the registry."""
+    if not partner_registry.remove(partner_id):
+        raise HTTPException(status_code=404, detail="Unknown partner")
+    publish_partners()
+    return {"removed": True, "partner_id": partner_id}
+
+
+@app.post("/api/partners/{partner_id}/rotate")
+async def rotate_partner_secret(
+    partner_id: str, request: RotateSecretRequest
+) -> dict[str, Any]:
+    """Rotate one partner's secret; the replaced one stays valid until the next rotation."""
+    partner = partner_registry.rotate(partner_id, request.secret)
+    if partner is None:
+        raise HTTPException(status_code=404, detail="Unknown partner")
+    publish_partners()
+    return {
+        "rotated": True,
+        "partner_id": partner_id,
+        "previous_secret_set": partner.previous_secret is not None,
+    }
+
+
+@app.post("/api/send-event", status_code=202)
+async def send_event(request: SendEventRequest) -> Response:
+    """
+    Queue a webhook event for delivery to MesaYA (bidirectional communication).
+
+    Delivery happens in the background with retries; the returned id can be
+    looked up in ``/api/events`` to follow its status.
+    """
+    partner = None
+    if request.partner_id is not None:
+        partner = partner_registry.get(request.partner_id)
+        if partner is None:
+            raise HTTPException(status_code=404, detail="Unknown partner")
+    event = mesa_ya_client.build_event(
+        event_type=request.event_type,
+        data=request.data,
+        target_url=request.target_url,
+        partner=partner,
+    )
+    try:
+        async with event_store.writing():
+            delivery_queue.enqueue(event)
+    except asyncio.QueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Delivery queue is full, retry later",
+            headers={"Retry-After": "1"},
+        )
+    return JSONBytesResponse(event.to_json(), status_code=202)
+
+
+@app.get("/api/delivery")
+async def get_delivery_stats() -> dict[str, Any]:
+    """Get outbound delivery queue statistics and dead-lettered events."""
+    return {
+        **delivery_queue.get_stats(),
+        "coalescing": delivery_coalescer.get_stats(),
+        "dead_letters": delivery_queue.get_dead_letters(),
+    }
+
+
+@app.get("/api/health-check")
+async def check_mesaya_health(refresh: bool = False) -> dict[str, Any]:
+    """
+    Get the health of MesaYA services.
+
+    Answers from the background prober's last round; ``refresh=true``
+    probes every service now (concurrently) first.
+    """
+    if refresh:
+        return await health_prober.probe_all()
+    return health_prober.get_results()
+
+
+@app.get("/api/http-pool")
+async def get_http_pool_stats() -> dict[str, Any]:
+    """Get outbound HTTP connection pool and latency statistics."""
+    return mesa_ya_client.pool.get_stats()
+
+
+@app.get("/api/status")
+async def get_partner_status() -> Response:
+    """Get current partner registration status."""
+    await _sync_workers()
+    return JSONBytesResponse({
+        "registered": config.is_registered,
+        "partner_id": config.partner_id,
+        "secret_set": config.partner_secret is not None,
+        "previous_secret_set": config.previous_partner_secret is not None,
+        "registered_at": (
+            config.registered_at.isoformat() if config.registered_at else None
+        ),
+        "mesa_ya_url": config.mesa_ya_res_url,
+        "webhook_url": config.webhook_url,
+        "subscribed_events": config.subscribed_events,
+        "partners": len(partner_registry),
+        "replay_guard": webhook_service.replay_guard.get_stats(),
+        "circuit_breakers": mesa_ya_client.pool.get_breaker_stats(),
+        "pipeline": pipeline.get_stats(),
+        "live_feed": live_feed.get_stats(),
+        "response_cache": response_cache.get_stats(),
+        "logging": json_logging.get_stats(),
+        "worker_pid": os.getpid(),
+        "shared_state": shared_state is not None,
+    })
+
+
+@app.delete("/api/events")
+async def clear_events() -> dict[str, str]:
+    """Clear all stored events."""
+    async with event_store.writing():
+        event_store.clear()
+    return {"message": "All events cleared"}
+
+
+# ============================================================================
+# Startup/Shutdown Events
+# ============================================================================
+
+
+@app.on_event("startup")
+async def startup_event() -> None:
+    """Application startup."""
+    json_logging.start()
+    # Compile the dashboard now rather than on its first request
+    templates.get_template("dashboard.html")
+    requeue = True
+    if shared_state is not None:
+        event_store.attach_backend(shared_state, replay=config.event_log_replay_events)
+        await shared_state.start()
+        # Workers of one server share a parent; only one retries the backlog
+        requeue = shared_state.claim("delivery_recovery", str(os.getppid()))
+    elif config.event_log_dir:
+        event_log = SegmentedEventLog(
+            config.event_log_dir,
+            segment_max_bytes=config.event_log_segment_bytes,
+            fsync_interval=config.event_log_fsync_interval,
+            fsync_batch=config.event_log_fsync_batch,
+            max_segments=config.event_log_max_segments,
+        )
+        event_store.attach_backend(event_log, replay=config.event_log_replay_events)
+        await event_log.start()
+    await mesa_ya_client.start()
+    await delivery_queue.start(requeue=requeue)
+    await pipeline.start()
+    await health_prober.start()
+    log_event(
+        logging.INFO,
+        "MesaYA Partner Demo started",
+        webhook_url=config.webhook_url,
+        dashboard_url=f"http://localhost:{config.port}",
+    )
+
+
+@app.on_event("shutdown")
+async def shutdown_event() -> None:
+    """Application shutdown."""
+    log_event(logging.INFO, "MesaYA Partner Demo shutting down")
+    await health_prober.close()
+    await pipeline.close()
+    await delivery_queue.close()
+    await delivery_coalescer.close()
+    await mesa_ya_client.close()
+    if event_store.backend is not None:
+        await event_store.backend.close()
+    json_logging.stop()
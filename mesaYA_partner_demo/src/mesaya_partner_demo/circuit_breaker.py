@@ -0,0 +1,188 @@
+"""Per-target circuit breaker and latency-driven timeouts for outbound calls."""
+
+import time
+from enum import Enum
+from typing import Any
+
+import httpx
+
+
+class BreakerState(str, Enum):
+    """Circuit breaker state."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(httpx.TransportError):
+    """Raised instead of sending a request while the target's breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Fails calls fast while a target keeps failing.
+
+    The outcomes of the last ``window`` calls are kept in a ring. Once at
+    least ``min_calls`` were made and the failure rate reaches
+    ``failure_rate``, the breaker opens: calls are rejected without touching
+    the network for ``open_seconds``. Then it goes half-open and lets a
+    single trial call through; its success closes the breaker, its failure
+    opens it again.
+
+    Every state change starts a new generation, and ``allow`` hands each
+    admitted call the current one. Outcomes are only counted for the
+    generation they were admitted in: a slow call that fails after the
+    breaker opened cannot re-open it or extend the open period, and one
+    admitted before the breaker opened is never taken for the trial.
+    """
+
+    def __init__(
+        self,
+        window: int = 20,
+        min_calls: int = 10,
+        failure_rate: float = 0.5,
+        open_seconds: float = 10.0,
+    ):
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.open_seconds = open_seconds
+        self.state = BreakerState.CLOSED
+        self._outcomes = [False] * window  # True = failure
+        self._next = 0
+        self._calls = 0
+        self._failures = 0
+        self._opened_at = 0.0
+        self._generation = 0
+        self._trial_in_flight = False
+        self.rejected = 0
+        self.times_opened = 0
+
+    def allow(self) -> int | None:
+        """
+        Admit a call now if the breaker lets it through.
+
+        Claims the trial if the breaker is half-open.
+
+        Returns:
+            The generation to pass to ``record`` or ``abandon`` for this
+            call, or None if it is rejected
+        """
+        if self.state is BreakerState.OPEN:
+            if time.monotonic() - self._opened_at < self.open_seconds:
+                self.rejected += 1
+                return None
+            self.state = BreakerState.HALF_OPEN
+            self._generation += 1
+        if self.state is BreakerState.HALF_OPEN:
+            if self._trial_in_flight:
+                self.rejected += 1
+                return None
+            self._trial_in_flight = True
+        return self._generation
+
+    def record(self, success: bool, generation: int) -> None:
+        """Record the outcome of a call admitted in ``generation``."""
+        if generation != self._generation:
+            # Admitted before the last state change
+            return
+        if self.state is BreakerState.HALF_OPEN:
+            self._trial_in_flight = False
+            if success:
+                self._reset()
+            else:
+                self._open()
+            return
+
+        failed = not success
+        if self._calls == self.window:
+            self._failures -= self._outcomes[self._next]
+        else:
+            self._calls += 1
+        self._outcomes[self._next] = failed
+        self._failures += failed
+        self._next = (self._next + 1) % self.window
+
+        if (
+            self._calls >= self.min_calls
+            and self._failures >= self.failure_rate * self._calls
+        ):
+            self._open()
+
+    def abandon(self, generation: int) -> None:
+        """Forget a call admitted in ``generation`` that ended without an outcome."""
+        if generation == self._generation and self.state is BreakerState.HALF_OPEN:
+            self._trial_in_flight = False
+
+    def _open(self) -> None:
+        self.state = BreakerState.OPEN
+        self._generation += 1
+        self._opened_at = time.monotonic()
+        self.times_opened += 1
+
+    def _reset(self) -> None:
+        self.state = BreakerState.CLOSED
+        self._generation += 1
+        self._outcomes = [False] * self.window
+        self._next = self._calls = self._failures = 0
+
+    def get_stats(self) -> dict[str, Any]:
+        """Get state and counters."""
+        stats: dict[str, Any] = {
+            "state": self.state.value,
+            "failure_rate": round(self._failures / self._calls, 3) if self._calls else 0.0,
+            "calls_in_window": self._calls,
+            "rejected": self.rejected,
+            "times_opened": self.times_opened,
+        }
+        if self.state is BreakerState.OPEN:
+            remaining = self.open_seconds - (time.monotonic() - self._opened_at)
+            stats["retry_in_seconds"] = round(max(remaining, 0.0), 3)
+        return stats
+
+
+class AdaptiveTimeout:
+    """
+    Request timeout derived from recently observed latency.
+
+    The timeout is ``multiplier`` times the p99 of the last ``samples``
+    latencies, clamped to ``[minimum, maximum]``. Until ``warmup`` samples
+    exist the maximum is used. Calls that timed out are recorded at the
+    timeout they hit, so a target that slows down pushes the timeout up
+    instead of failing forever. The percentile is recomputed every
+    ``warmup`` samples, not on every call.
+    """
+
+    def __init__(
+        self,
+        minimum: float = 1.0,
+        maximum: float = 10.0,
+        multiplier: float = 3.0,
+        samples: int = 100,
+        warmup: int = 20,
+    ):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.multiplier = multiplier
+        self.warmup = warmup
+        self._latencies = [0.0] * samples
+        self._next = 0
+        self._count = 0
+        self._since_update = 0
+        self.current = maximum
+
+    def observe(self, seconds: float) -> None:
+        """Record the latency of a completed (or timed out) call."""
+        self._latencies[self._next] = seconds
+        self._next = (self._next + 1) % len(self._latencies)
+        self._count = min(self._count + 1, len(self._latencies))
+        self._since_update += 1
+        if self._count >= self.warmup and self._since_update >= self.warmup:
+            self._since_update = 0
+            recent = sorted(self._latencies[: self._count])
+            p99 = recent[min(len(recent) - 1, int(len(recent) * 0.99))]
+            self.current = min(self.maximum, max(self.minimum, p99 * self.multiplier))
+
+    def get_stats(self) -> dict[str, Any]:
+        return {"timeout_seconds": round(self.current, 3), "samples": self._count}
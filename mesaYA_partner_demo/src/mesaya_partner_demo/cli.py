@@ -0,0 +1,378 @@
+"""
+``export`` and ``replay`` subcommands of ``mesaya-partner``.
+
+``export`` writes the event history to gzip-compressed NDJSON, one
+``{"kind", "seq", "event"}`` object per line, oldest first. It reads the
+shared-state file or the event log when there is one, and otherwise the
+store of a running service.
+
+``replay`` re-sends an export to a MesaYA at a fixed rate: every event is
+rebuilt with a fresh timestamp and signed with the current secret, so a
+staging mesaYA_Res sees the production traffic as new, valid webhooks.
+Requests bypass the circuit breaker and adaptive timeout the service uses,
+so the report shows how the target behaves rather than how the client
+protected itself. It reports the achieved throughput, latency and a
+breakdown of the errors.
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import sys
+import time
+from collections import Counter
+from collections.abc import Iterator
+from typing import IO, Any
+
+from mesaya_partner_demo import json_codec
+from mesaya_partner_demo.config import config
+
+KINDS = ("received", "sent")
+
+# Payload keys added by the sender around the event data
+ENVELOPE_KEYS = ("event", "timestamp")
+
+
+# ----------------------------------------------------------------------
+# Export
+# ----------------------------------------------------------------------
+
+
+def _iter_service(
+    base_url: str, kind: str, page_size: int = 1000
+) -> Iterator[tuple[int, dict[str, Any]]]:
+    """
+    Yield the events held by a running service, oldest first.
+
+    ``/api/events`` pages newest first, so the oldest seq is found first (a
+    binary search over one-event pages); pages are then requested upwards
+    from it and each one is reversed, so only one page is held at a time.
+    """
+    import httpx
+
+    with httpx.Client(base_url=base_url, timeout=60.0) as client:
+
+        def page(cursor: int | None, limit: int) -> list[dict[str, Any]]:
+            params: dict[str, Any] = {"kind": kind, "limit": limit}
+            if cursor is not None:
+                params["cursor"] = cursor
+            response = client.get("/api/events", params=params)
+            response.raise_for_status()
+            return response.json()["events"]
+
+        newest = page(None, 1)
+        if not newest:
+            return
+        end = newest[0]["seq"] + 1
+        # Smallest cursor with an event below it is one past the oldest seq
+        low, high = 0, end
+        while low < high:
+            middle = (low + high) // 2
+            if page(middle, 1):
+                high = middle
+            else:
+                low = middle + 1
+
+        start = low - 1
+        while start < end:
+            stop = min(start + page_size, end)
+            for record in reversed(page(stop, page_size)):
+                seq = record.pop("seq")
+                if seq >= start:
+                    yield seq, record
+            start = stop
+
+
+def _iter_log(directory: str, kind: str) -> Iterator[tuple[int, dict[str, Any]]]:
+    from mesaya_partner_demo.event_log import SegmentedEventLog
+
+    return SegmentedEventLog(directory).iter_records(kind)
+
+
+def _iter_state(path: str, kind: str) -> Iterator[tuple[int, dict[str, Any]]]:
+    from mesaya_partner_demo.models import EventStore
+    from mesaya_partner_demo.partners import PartnerRegistry
+    from mesaya_partner_demo.shared_state import SharedState
+
+    state = SharedState(path, EventStore(), config, PartnerRegistry())
+    try:
+        yield from state.iter_records(kind)
+    finally:
+        asyncio.run(state.close())
+
+
+def _source(args: argparse.Namespace) -> tuple[str, Any]:
+    """Pick where to export from: explicit flag, then state file, log, service."""
+    if args.url:
+        return f"service {args.url}", lambda kind: _iter_service(args.url.rstrip("/"), kind)
+    state = args.state or config.shared_state_path
+    if state and os.path.exists(state):
+        return f"state file {state}", lambda kind: _iter_state(state, kind)
+    log_dir = args.log_dir or config.event_log_dir
+    if log_dir and os.path.isdir(log_dir):
+        return f"event log {log_dir}", lambda kind: _iter_log(log_dir, kind)
+    url = f"http://localhost:{config.port}"
+    return f"service {url}", lambda kind: _iter_service(url, kind)
+
+
+def _open_output(path: str) -> IO[bytes]:
+    if path == "-":
+        return sys.stdout.buffer
+    if path.endswith(".gz"):
+        return gzip.open(path, "wb", compresslevel=6)
+    return open(path, "wb")
+
+
+def run_export(args: argparse.Namespace) -> int:
+    """Write the selected kinds of events to an NDJSON export."""
+    description, iter_kind = _source(args)
+    counts: Counter[str] = Counter()
+    output = _open_output(args.output)
+    try:
+        for kind in args.kind:
+            for seq, record in iter_kind(kind):
+                output.write(
+                    json_codec.dumps({"kind": kind, "seq": seq, "event": record}) + b"\n"
+                )
+                counts[kind] += 1
+    finally:
+        if output is not sys.stdout.buffer:
+            output.close()
+    print(f"exported {dict(counts)} from {description} to {args.output}", file=sys.stderr)
+    return 0
+
+
+# ----------------------------------------------------------------------
+# Replay
+# ----------------------------------------------------------------------
+
+
+def read_export(path: str) -> Iterator[tuple[str, dict[str, Any]]]:
+    """Yield (kind, record) from an export, gzip-compressed or not."""
+    with open(path, "rb") as raw:
+        compressed = raw.read(2) == b"\x1f\x8b"
+    opener = gzip.open if compressed else open
+    with opener(path, "rb") as f:
+        for line in f:
+            if line.strip():
+                entry = json_codec.loads(line)
+                yield entry["kind"], entry["event"]
+
+
+def event_data(record: dict[str, Any]) -> tuple[str, dict[str, Any]]:
+    """Get the (event type, data) to re-send from an exported record."""
+    payload = record.get("payload") or {}
+    data = payload.get("data")
+    if not isinstance(data, dict):
+        data = {k: v for k, v in payload.items() if k not in ENVELOPE_KEYS}
+    return record.get("event_type") or payload.get("event", "unknown"), data
+
+
+def _error_key(response_code: int | None, error: str | None) -> str:
+    if response_code is not None:
+        return str(response_code)
+    return (error or "unknown").split(":", 1)[0]
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    rank = max(0, min(len(values) - 1, round(pct / 100 * len(values)) - 1))
+    return round(values[rank] * 1000, 3)
+
+
+async def replay(
+    records: Iterator[tuple[str, dict[str, Any]]],
+    kinds: tuple[str, ...],
+    rate: float,
+    concurrency: int,
+    limit: int | None = None,
+    timeout: float | None = None,
+) -> dict[str, Any]:
+    """
+    Re-send exported events to MesaYA.
+
+    Sends are scheduled open-loop (event i goes out at start + i/rate;
+    ``rate`` 0 sends as fast as ``concurrency`` allows), so a slow target
+    lowers the achieved rate instead of hiding it. At most twice
+    ``concurrency`` sends are scheduled at once; past that the schedule
+    waits, which shows up as a lower achieved rate too.
+
+    Args:
+        timeout: Seconds per request (default: ``config.http_timeout``)
+
+    Returns:
+        Counts, achieved rate, latency percentiles and outcomes by status
+    """
+    import httpx
+
+    from mesaya_partner_demo.http_pool import HTTPClientPool
+    from mesaya_partner_demo.mesa_ya_client import MesaYAClient
+
+    timeout = timeout or config.http_timeout
+    pool = HTTPClientPool(
+        timeout=timeout,
+        max_connections=concurrency,
+        max_keepalive_connections=concurrency,
+    )
+    client = MesaYAClient(pool=pool)
+    outcomes: Counter[str] = Counter()
+    latencies: list[float] = []
+    gate = asyncio.Semaphore(concurrency)
+    pending: set[asyncio.Task] = set()
+
+    async def post(
+        url: str, body: bytes, headers: dict[str, str]
+    ) -> tuple[int | None, str | None]:
+        # A fixed timeout and no breaker: every send reaches the target
+        try:
+            response = await pool.request(
+                "POST",
+                url,
+                use_breaker=False,
+                content=body,
+                headers=headers,
+                timeout=timeout,
+            )
+        except httpx.TimeoutException:
+            return None, "timeout"
+        except httpx.RequestError as e:
+            return None, f"{type(e).__name__}: {e}"
+        if response.status_code < 300:
+            return response.status_code, None
+        return response.status_code, response.text[:200]
+
+    async def send(kind: str, record: dict[str, Any]) -> None:
+        event_type, data = event_data(record)
+        event = client.build_event(event_type, data)
+        body = event.raw_payload
+        headers = client.signed_headers(event.partner_id, event.payload["timestamp"], body)
+        async with gate:
+            started = time.perf_counter()
+            response_code, error = await post(event.target_url, body, headers)
+            latencies.append(time.perf_counter() - started)
+        if error is None:
+            outcomes["ok"] += 1
+        else:
+            outcomes[_error_key(response_code, error)] += 1
+
+    start = time.perf_counter()
+    sent = 0
+    try:
+        for kind, record in records:
+            if kind not in kinds:
+                continue
+            if limit is not None and sent >= limit:
+                break
+            if rate > 0:
+                delay = start + sent / rate - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            if len(pending) >= concurrency * 2:
+                await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            task = asyncio.create_task(send(kind, record))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+            sent += 1
+        if pending:
+            await asyncio.gather(*pending)
+    finally:
+        await pool.close()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "target": config.mesa_ya_res_url,
+        "events": sent,
+        "duration_s": round(elapsed, 3),
+        "target_rate": rate,
+        "achieved_rate": round(sent / elapsed, 1) if elapsed else 0.0,
+        "ok": outcomes.get("ok", 0),
+        "errors": {key: count for key, count in outcomes.items() if key != "ok"},
+        "latency_ms": {
+            "p50": _percentile(latencies, 50),
+            "p95": _percentile(latencies, 95),
+            "p99": _percentile(latencies, 99),
+            "max": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        },
+    }
+
+
+def run_replay(args: argparse.Namespace) -> int:
+    """Replay an export against MesaYA and print the report."""
+    if args.target:
+        config.mesa_ya_res_url = args.target.rstrip("/")
+    if args.partner_id:
+        config.partner_id = args.partner_id
+    if args.secret:
+        config.partner_secret = args.secret
+
+    results = asyncio.run(
+        replay(
+            read_export(args.input),
+            tuple(args.kind),
+            args.rate,
+            args.concurrency,
+            args.limit,
+            args.timeout,
+        )
+    )
+    latency = results["latency_ms"]
+    print(
+        f"{results['events']} events to {results['target']} in {results['duration_s']}s: "
+        f"{results['achieved_rate']}/s (target {results['target_rate'] or 'max'}), "
+        f"{results['ok']} ok, errors {results['errors'] or 'none'}"
+    )
+    print(
+        f"latency p50 {latency['p50']} ms, p95 {latency['p95']} ms, "
+        f"p99 {latency['p99']} ms, max {latency['max']} ms"
+    )
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0 if not results["errors"] else 1
+
+
+def add_subcommands(subparsers: Any) -> None:
+    """Register ``export`` and ``replay`` on the main parser."""
+    export = subparsers.add_parser(
+        "export",
+        help="export the event history to compressed NDJSON",
+        description=run_export.__doc__,
+    )
+    export.add_argument(
+        "-o", "--output", default="events.ndjson.gz", help="file to write, '-' for stdout"
+    )
+    export.add_argument("--kind", nargs="+", choices=KINDS, default=list(KINDS))
+    export.add_argument("--state", help="shared-state SQLite file to read")
+    export.add_argument("--log-dir", help="event log directory to read")
+    export.add_argument("--url", help="running service to read from instead")
+    export.set_defaults(handler=run_export)
+
+    replay_parser = subparsers.add_parser(
+        "replay",
+        help="re-send an export to MesaYA at a controlled rate",
+        description=run_replay.__doc__,
+    )
+    replay_parser.add_argument("input", help="export file (.ndjson or .ndjson.gz)")
+    replay_parser.add_argument("--target", help="mesaYA_Res base URL (default: configured)")
+    replay_parser.add_argument("--partner-id", help="partner id to send as")
+    replay_parser.add_argument("--secret", help="secret to sign with")
+    replay_parser.add_argument(
+        "--kind", nargs="+", choices=KINDS, default=["sent"], help="kinds to re-send"
+    )
+    replay_parser.add_argument(
+        "--rate", type=float, default=50.0, help="events per second (0: unthrottled)"
+    )
+    replay_parser.add_argument("--concurrency", type=int, default=20, help="max in-flight")
+    replay_parser.add_argument("--limit", type=int, help="stop after N events")
+    replay_parser.add_argument(
+        "--timeout",
+        type=float,
+        default=config.http_timeout,
+        help="seconds per request (default: %(default)s)",
+    )
+    replay_parser.add_argument("--report", help="also write the report as JSON here")
+    replay_parser.set_defaults(handler=run_replay)
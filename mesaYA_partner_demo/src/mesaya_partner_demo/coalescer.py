@@ -0,0 +1,204 @@
+"""Coalescing of outbound events to the same target into batch requests."""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from mesaya_partner_demo.config import config
+from mesaya_partner_demo.mesa_ya_client import MesaYAClient, mesa_ya_client
+from mesaya_partner_demo.models import SentEvent
+
+# Events batched together share a target URL and the partner that signs them
+BatchKey = tuple[str, str | None]
+Outcome = tuple[int | None, str | None]
+# Called by the batch sender with the outcome of each event handed over
+# with it; the outcome is the exception instead if sending failed
+Settle = Callable[[list[tuple[SentEvent, Outcome | Exception]]], Awaitable[None]]
+
+
+@dataclass
+class _Batch:
+    """Events waiting for the same target, and who to settle each with."""
+
+    events: list[SentEvent] = field(default_factory=list)
+    settles: list[Settle] = field(default_factory=list)
+    timer: asyncio.TimerHandle | None = None
+
+
+class DeliveryCoalescer:
+    """
+    Sends events bound for the same target as one signed batch request.
+
+    ``submit`` parks an event in the open batch for the event's target and
+    partner and returns at once; whoever submitted it is settled with the
+    event's own outcome once its batch was sent. A batch is sent when it
+    reaches ``max_batch`` events or ``window`` seconds after its first
+    event, whichever comes first; a batch of one goes to the normal
+    single-event endpoint. Each event gets the outcome of its own item,
+    so a partially failed batch only retries (or dead-letters) the items
+    that failed.
+
+    ``deliver`` has the same signature as ``MesaYAClient.deliver`` for
+    callers that wait on a single event.
+
+    A target that answers a batch with 404 or 405 has no batch endpoint:
+    that batch, and every later event for the target, is sent one event
+    per request.
+
+    With a window of 0 coalescing is off and every event is sent on its
+    own.
+    """
+
+    def __init__(
+        self,
+        client: MesaYAClient,
+        window: float = 0.0,
+        max_batch: int = 50,
+    ):
+        self.client = client
+        self.window = window
+        self.max_batch = max_batch
+        self._batches: dict[BatchKey, _Batch] = {}
+        self._sending: set[asyncio.Task] = set()
+        # Target URLs found to have no batch endpoint
+        self._unbatched: set[str] = set()
+        self.batches_sent = 0
+        self.events_sent = 0
+        self.largest_batch = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0 and self.max_batch > 1
+
+    def submit(self, event: SentEvent, settle: Settle) -> None:
+        """
+        Make one delivery attempt for ``event`` without waiting for it.
+
+        Args:
+            event: The event to send, batched with its neighbours
+            settle: Awaited with the event's outcome once it was sent
+        """
+        if not self.enabled or event.target_url in self._unbatched:
+            self._start([(event, settle)])
+            return
+
+        key = (event.target_url, event.partner_id)
+        batch = self._batches.get(key)
+        if batch is None:
+            batch = self._batches[key] = _Batch()
+            batch.timer = asyncio.get_running_loop().call_later(
+                self.window, self._flush, key
+            )
+        batch.events.append(event)
+        batch.settles.append(settle)
+        if len(batch.events) >= self.max_batch:
+            self._flush(key)
+
+    async def deliver(self, event: SentEvent) -> Outcome:
+        """
+        Make one delivery attempt for ``event`` and wait for its outcome.
+
+        Returns:
+            Tuple of (response_code, error_message) for this event
+        """
+        if not self.enabled or event.target_url in self._unbatched:
+            return await self.client.deliver(event)
+
+        future: asyncio.Future[Outcome] = asyncio.get_running_loop().create_future()
+
+        async def settle(results: list[tuple[SentEvent, Outcome | Exception]]) -> None:
+            ((_, outcome),) = results
+            if future.done():
+                return
+            if isinstance(outcome, Exception):
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
+
+        self.submit(event, settle)
+        return await future
+
+    def _flush(self, key: BatchKey) -> None:
+        """Close the open batch for ``key`` and start sending it."""
+        batch = self._batches.pop(key, None)
+        if batch is None:
+            return
+        if batch.timer is not None:
+            batch.timer.cancel()
+        self._start(list(zip(batch.events, batch.settles)))
+
+    def _start(self, pending: list[tuple[SentEvent, Settle]]) -> None:
+        task = asyncio.create_task(self._send(pending))
+        self._sending.add(task)
+        task.add_done_callback(self._sending.discard)
+
+    async def _send(self, pending: list[tuple[SentEvent, Settle]]) -> None:
+        events = [event for event, _ in pending]
+        target = events[0].target_url
+        outcomes: list[Outcome | Exception]
+        try:
+            batched = None
+            if len(events) > 1 and target not in self._unbatched:
+                batched = await self.client.deliver_batch(events)
+                if batched is None:
+                    self._unbatched.add(target)
+                else:
+                    self.batches_sent += 1
+                    self.largest_batch = max(self.largest_batch, len(events))
+            if batched is None:
+                batched = await asyncio.gather(
+                    *(self.client.deliver(event) for event in events)
+                )
+                self.batches_sent += len(events)
+                self.largest_batch = max(self.largest_batch, 1)
+            self.events_sent += len(events)
+            outcomes = list(batched)
+        except Exception as e:
+            outcomes = [e] * len(events)
+
+        # One call per submitter, so it can record the whole batch at once
+        results: dict[Settle, list[tuple[SentEvent, Outcome | Exception]]] = {}
+        for (event, settle), outcome in zip(pending, outcomes):
+            results.setdefault(settle, []).append((event, outcome))
+        for settle, settled in results.items():
+            await settle(settled)
+
+    async def close(self) -> None:
+        """
+        Drop the open batches and wait for the ones being sent.
+
+        Dropped events are never settled; they stay pending in the store.
+        """
+        for batch in self._batches.values():
+            if batch.timer is not None:
+                batch.timer.cancel()
+        self._batches.clear()
+        if self._sending:
+            await asyncio.gather(*self._sending, return_exceptions=True)
+
+    def get_stats(self) -> dict[str, Any]:
+        """Get batch counts and sizes."""
+        return {
+            "enabled": self.enabled,
+            "window_ms": round(self.window * 1000, 3),
+            "max_batch": self.max_batch,
+            "open_batches": len(self._batches),
+            "waiting": sum(len(batch.events) for batch in self._batches.values()),
+            "sending": len(self._sending),
+            "batches_sent": self.batches_sent,
+            "events_sent": self.events_sent,
+            "avg_batch_size": (
+                round(self.events_sent / self.batches_sent, 2) if self.batches_sent else 0.0
+            ),
+            "largest_batch": self.largest_batch,
+            "unbatched_targets": sorted(self._unbatched),
+        }
+
+
+# Global coalescer in front of the MesaYA client
+delivery_coalescer = DeliveryCoalescer(
+    mesa_ya_client,
+    window=config.delivery_coalesce_window,
+    max_batch=config.delivery_coalesce_max_batch,
+)
@@ -1,44 +1,167 @@
-"""Configuration for Partner Demo service."""
-
-from dataclasses import dataclass, field
-from datetime import datetime
-
-
-@dataclass
-class PartnerConfig:
-    """Partner configuration and state."""
-
-    # Service config
-    name: str = "MesaYA Partner Demo"
-    host: str = "0.0.0.0"
-    port: int = 8088
-    webhook_path: str = "/api/webhook"
-
-    # MesaYA connection
-    mesa_ya_res_url: str = "http://localhost:3000"
-    mesa_ya_payment_url: str = "http://localhost:8000"
-
-    # Partner registration state
-    partner_id: str | None = None
-    partner_secret: str | None = None
-    registered_at: datetime | None = None
-    is_registered: bool = False
-
-    # Subscribed events
-    subscribed_events: list[str] = field(
-        default_factory=lambda: [
-            "payment.created",
-            "payment.succeeded",
-            "payment.failed",
-            "payment.refunded",
-        ]
-    )
-
-    @property
-    def webhook_url(self) -> str:
-        """Get the full webhook URL for this partner."""
-        return f"http://localhost:{self.port}{self.webhook_path}"
-
-
-# Global config instance
-config = PartnerConfig()
+"""Configuration for Partner Demo service."""
+
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+
+
+@dataclass
+class PartnerConfig:
+    """Partner configuration and state."""
+
+    # Service config
+    name: str = "MesaYA Partner Demo"
+    host: str = "0.0.0.0"
+    port: int = 8088
+    webhook_path: str = "/api/webhook"
+
+    # MesaYA connection
+    mesa_ya_res_url: str = "http://localhost:3000"
+    mesa_ya_payment_url: str = "http://localhost:8000"
+
+    # Event retention (ring buffer capacity per direction)
+    max_events: int = 100_000
+    dashboard_max_events: int = 100
+
+    # Rendered dashboard / event pages kept per store version
+    response_cache_entries: int = 64
+
+    # Live dashboard feed (Server-Sent Events)
+    live_feed_buffer_size: int = 256
+    live_feed_stats_interval: float = 0.5
+    live_feed_heartbeat_interval: float = 15.0
+
+    # Structured logging: level, sampling ("payment.created=0.01,*=1") and
+    # the bounded queue drained by the writer thread
+    log_level: str = field(default_factory=lambda: os.getenv("PARTNER_LOG_LEVEL", "INFO"))
+    log_sample_rates: str = field(
+        default_factory=lambda: os.getenv("PARTNER_LOG_SAMPLE", "")
+    )
+    log_queue_size: int = 10_000
+
+    # State shared by worker processes (SQLite WAL file); set by
+    # ``mesaya-partner --workers N`` or PARTNER_SHARED_STATE
+    shared_state_path: str | None = field(
+        default_factory=lambda: os.getenv("PARTNER_SHARED_STATE")
+    )
+    shared_state_poll_interval: float = 0.1
+    shared_state_retention: int = 1_000_000
+
+    # Durable event log (disabled unless a directory is configured)
+    event_log_dir: str | None = field(
+        default_factory=lambda: os.getenv("PARTNER_EVENT_LOG_DIR")
+    )
+    event_log_segment_bytes: int = 8 * 1024 * 1024
+    event_log_fsync_interval: float = 0.2
+    event_log_fsync_batch: int = 512
+    event_log_replay_events: int = 10_000
+    # Oldest segments past this many per kind are deleted (None keeps all)
+    event_log_max_segments: int | None = None
+
+    # Replay protection for incoming webhooks
+    replay_guard_max_entries: int = 100_000
+
+    # Rolling time series (/api/stats/timeseries): buckets kept per second
+    # and per minute, and per-event-type series kept per direction
+    timeseries_seconds: int = 900
+    timeseries_minutes: int = 1440
+    timeseries_max_types: int = 32
+
+    # Batch webhook ingestion (/api/webhook/batch)
+    webhook_batch_max_items: int = 1000
+
+    # Processing pipeline for received webhooks (per-event-type handlers)
+    pipeline_workers: int = 4
+    pipeline_queue_size: int = 1000
+    pipeline_handler_timeout: float = 30.0
+
+    # Background health probing; extra services to probe besides the two
+    # MesaYA ones, as "name=url,name=url" (url of the health endpoint)
+    health_check_interval: float = 15.0
+    health_check_timeout: float = 2.0
+    health_check_extra: str = field(
+        default_factory=lambda: os.getenv("PARTNER_HEALTH_SERVICES", "")
+    )
+
+    # Outbound HTTP client pool (one keep-alive client per target service)
+    http_timeout: float = 10.0
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 30.0
+    http2: bool = False
+
+    # Per-target circuit breaker: opens when at least breaker_failure_rate
+    # of the last breaker_window calls failed (transport error or 5xx)
+    breaker_window: int = 20
+    breaker_min_calls: int = 10
+    breaker_failure_rate: float = 0.5
+    breaker_open_seconds: float = 10.0
+
+    # Adaptive request timeout: p99 latency x multiplier, clamped between
+    # adaptive_timeout_min and http_timeout
+    adaptive_timeout_min: float = 1.0
+    adaptive_timeout_multiplier: float = 3.0
+
+    # Outbound delivery queue
+    delivery_workers: int = 4
+    delivery_queue_size: int = 1000
+    delivery_max_attempts: int = 5
+    delivery_backoff_base: float = 0.5
+    delivery_backoff_max: float = 30.0
+    delivery_dead_letter_size: int = 1000
+
+    # Outbound coalescing: events for the same target are sent together as
+    # one request to <target><delivery_batch_suffix>, at most
+    # delivery_coalesce_max_batch events, delivery_coalesce_window seconds
+    # after the first one. Disabled when the window is 0. Targets answering
+    # 404/405 there get one request per event instead.
+    delivery_coalesce_window: float = field(
+        default_factory=lambda: float(os.getenv("PARTNER_DELIVERY_COALESCE_WINDOW", "0"))
+    )
+    delivery_coalesce_max_batch: int = 50
+    delivery_batch_suffix: str = "/batch"
+
+    # Partner registration state
+    partner_id: str | None = None
+    partner_secret: str | None = None
+    previous_partner_secret: str | None = None  # Still accepted after rotation
+    registered_at: datetime | None = None
+    is_registered: bool = False
+
+    # Subscribed events
+    subscribed_events: list[str] = field(
+        default_factory=lambda: [
+            "payment.created",
+            "payment.succeeded",
+            "payment.failed",
+            "payment.refunded",
+        ]
+    )
+
+    def rotate_secret(self, secret: str) -> None:
+        """Install a new partner secret, keeping the current one as previous."""
+        if secret != self.partner_secret:
+            self.previous_partner_secret = self.partner_secret
+            self.partner_secret = secret
+
+    @property
+    def health_services(self) -> dict[str, str]:
+        """Get the health endpoint URL of every service to probe, by name."""
+        services = {
+            "mesaYA_Res": f"{self.mesa_ya_res_url}/health",
+            "mesaYA_payment": f"{self.mesa_ya_payment_url}/health",
+        }
+        for item in self.health_check_extra.split(","):
+            name, sep, url = item.strip().partition("=")
+            if sep:
+                services[name] = url
+        return services
+
+    @property
+    def webhook_url(self) -> str:
+        """Get the full webhook URL for this partner."""
+        return f"http://localhost:{self.port}{self.webhook_path}"
+
+
+# Global config instance
+config = PartnerConfig()
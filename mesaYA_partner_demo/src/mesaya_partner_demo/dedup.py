@@ -0,0 +1,115 @@
+"""Replay protection: time-bucketed index of recently seen webhook deliveries."""
+
+import time
+from typing import Any
+
+
+class ReplayGuard:
+    """
+    Remembers delivery keys (signatures or webhook ids) for the validity window.
+
+    Keys are grouped in buckets of ``bucket_seconds`` by the timestamp they
+    were signed with, in a ring big enough to span the whole window on both
+    sides of "now" (signature timestamps may be slightly in the future).
+    A ring slot is reused only once its bucket is older than the window, so
+    expiring a bucket is a single O(1) reset and a signed key is looked up in
+    exactly one set. Total memory is capped at ``max_entries`` keys; past the
+    cap the oldest bucket is dropped early.
+    """
+
+    def __init__(
+        self,
+        window_seconds: int = 5 * 60,
+        bucket_seconds: int = 10,
+        max_entries: int = 100_000,
+    ):
+        self.window_seconds = window_seconds
+        self.bucket_seconds = bucket_seconds
+        self.max_entries = max_entries
+        self._slots = 2 * (window_seconds // bucket_seconds + 1) + 1
+        self._buckets: list[set[str]] = [set() for _ in range(self._slots)]
+        self._bucket_ids: list[int] = [-1] * self._slots
+        self._size = 0
+        self.duplicates = 0
+        self.evicted_early = 0
+
+    def _is_live(self, bucket_id: int, now: float) -> bool:
+        age = now // self.bucket_seconds - bucket_id
+        return abs(age) <= self.window_seconds // self.bucket_seconds + 1
+
+    def _reset(self, index: int, bucket_id: int) -> None:
+        self._size -= len(self._buckets[index])
+        self._buckets[index] = set()
+        self._bucket_ids[index] = bucket_id
+
+    def is_duplicate(self, key: str, timestamp: int | None = None) -> bool:
+        """
+        Check whether ``key`` was already seen within the window.
+
+        With the signature ``timestamp`` this is a single set lookup; without
+        it every live bucket has to be checked.
+        """
+        if timestamp is not None:
+            bucket_id = timestamp // self.bucket_seconds
+            index = bucket_id % self._slots
+            found = (
+                self._bucket_ids[index] == bucket_id
+                and key in self._buckets[index]
+            )
+        else:
+            now = time.time()
+            found = any(
+                key in bucket
+                for bucket, bucket_id in zip(self._buckets, self._bucket_ids)
+                if bucket and self._is_live(bucket_id, now)
+            )
+        if found:
+            self.duplicates += 1
+        return found
+
+    def remember(self, key: str, timestamp: int | None = None) -> None:
+        """Record ``key`` as seen, bucketed by its signature timestamp (or now)."""
+        if timestamp is None:
+            timestamp = int(time.time())
+        bucket_id = timestamp // self.bucket_seconds
+        index = bucket_id % self._slots
+        if self._bucket_ids[index] != bucket_id:
+            self._reset(index, bucket_id)
+
+        bucket = self._buckets[index]
+        if key not in bucket:
+            if self._size >= self.max_entries:
+                self._evict_oldest(keep=index)
+            bucket.add(key)
+            self._size += 1
+
+    def _evict_oldest(self, keep: int) -> None:
+        """Free room by dropping expired buckets, or else the oldest one."""
+        now = time.time()
+        oldest: int | None = None
+        for index, bucket_id in enumerate(self._bucket_ids):
+            if index == keep or not self._buckets[index]:
+                continue
+            if not self._is_live(bucket_id, now):
+                self._reset(index, -1)
+            elif oldest is None or bucket_id < self._bucket_ids[oldest]:
+                oldest = index
+        if self._size >= self.max_entries and oldest is not None:
+            self.evicted_early += len(self._buckets[oldest])
+            self._reset(oldest, -1)
+
+    def clear(self) -> None:
+        """Forget every key."""
+        self._buckets = [set() for _ in range(self._slots)]
+        self._bucket_ids = [-1] * self._slots
+        self._size = 0
+
+    def get_stats(self) -> dict[str, Any]:
+        """Get index size and duplicate counters."""
+        return {
+            "entries": self._size,
+            "max_entries": self.max_entries,
+            "window_seconds": self.window_seconds,
+            "duplicates_rejected": self.duplicates,
+            "evicted_early": self.evicted_early,
+        }
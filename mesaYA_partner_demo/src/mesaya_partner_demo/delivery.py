@@ -0,0 +1,245 @@
+"""Asynchronous outbound delivery queue with retries and a dead-letter list."""
+
+import asyncio
+import random
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from mesaya_partner_demo.coalescer import DeliveryCoalescer, Outcome, delivery_coalescer
+from mesaya_partner_demo.config import config
+from mesaya_partner_demo.mesa_ya_client import mesa_ya_client
+from mesaya_partner_demo.models import (
+    DeliveryStatus,
+    EventStore,
+    SentEvent,
+    event_store,
+)
+from mesaya_partner_demo.timeseries import timeseries
+
+# One delivery attempt: returns (response_code, error_message)
+DeliverFn = Callable[[SentEvent], Awaitable[tuple[int | None, str | None]]]
+
+
+class DeliveryQueue:
+    """
+    Bounded in-process queue of outbound events drained by async workers.
+
+    Failed attempts are retried with exponential backoff and full jitter.
+    Waiting out a backoff does not occupy a worker: the event is put back on
+    the queue by a timer. Events that exhaust their attempts, or that fail
+    with a non-retryable response, are moved to the dead-letter list.
+
+    With an enabled ``coalescer`` a worker hands each event to its batch
+    and takes the next one at once, so batches can fill up to
+    ``max_batch``; the batch sender settles the outcomes. At most
+    ``workers * max_batch`` events are out in batches at a time.
+    """
+
+    # Response codes worth retrying besides 5xx
+    RETRYABLE_CODES = frozenset({408, 425, 429})
+
+    def __init__(
+        self,
+        deliver: DeliverFn,
+        store: EventStore,
+        workers: int = 4,
+        max_size: int = 1000,
+        max_attempts: int = 5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        dead_letter_size: int = 1000,
+        coalescer: DeliveryCoalescer | None = None,
+    ):
+        self.deliver = deliver
+        self.coalescer = coalescer
+        self.store = store
+        self.workers = workers
+        self.max_size = max_size
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.dead_letters: deque[SentEvent] = deque(maxlen=dead_letter_size)
+
+        self.queue: asyncio.Queue[SentEvent] = asyncio.Queue(maxsize=max_size)
+        self._tasks: list[asyncio.Task] = []
+        # Backoff timers of events waiting to be retried, by event id
+        self._timers: dict[str, asyncio.TimerHandle] = {}
+        # When each in-flight event was picked up, by event id
+        self._started: dict[str, float] = {}
+        # Free places in open or sending batches (see start)
+        self._batch_slots: asyncio.Semaphore | None = None
+        self.in_flight = 0
+        self.delivered = 0
+        self.retries = 0
+        self.dead_lettered = 0
+
+    async def start(self, requeue: bool = True) -> None:
+        """
+        Start the workers and requeue events left pending by a restart.
+
+        Args:
+            requeue: Whether this process should retry the pending events
+                (only one of several workers sharing a store should)
+        """
+        if self._tasks:
+            return
+        for event in self.store.pending_sent() if requeue else ():
+            if self.queue.full():
+                break
+            self.queue.put_nowait(event)
+        if self.coalescer is not None and self.coalescer.enabled:
+            self._batch_slots = asyncio.Semaphore(
+                self.workers * self.coalescer.max_batch
+            )
+        self._tasks = [
+            asyncio.create_task(self._worker()) for _ in range(self.workers)
+        ]
+
+    async def close(self) -> None:
+        """Stop the workers; undelivered events stay pending in the store."""
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def enqueue(self, event: SentEvent) -> None:
+        """
+        Store a queued event and schedule its delivery.
+
+        Raises:
+            asyncio.QueueFull: If the queue is at capacity
+        """
+        self.queue.put_nowait(event)
+        self.store.add_sent(event)
+
+    def _is_retryable(self, response_code: int | None) -> bool:
+        return (
+            response_code is None
+            or response_code >= 500
+            or response_code in self.RETRYABLE_CODES
+        )
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given attempt number."""
+        ceiling = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        return random.uniform(0, ceiling)
+
+    def _requeue(self, event: SentEvent) -> None:
+        del self._timers[event.id]
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self._schedule_retry(event)
+
+    def _schedule_retry(self, event: SentEvent) -> None:
+        loop = asyncio.get_running_loop()
+        self._timers[event.id] = loop.call_later(
+            self._backoff(event.attempts), self._requeue, event
+        )
+
+    async def _attempt(self, event: SentEvent) -> None:
+        outcome = await self.deliver(event)
+        await self._settle([(event, outcome)])
+
+    async def _settle(self, results: list[tuple[SentEvent, Outcome | Exception]]) -> None:
+        """Record the outcomes of delivery attempts in one store write."""
+        now = time.perf_counter()
+        async with self.store.writing():
+            for event, outcome in results:
+                timeseries.observe_latency(
+                    "delivery", now - self._started.pop(event.id, now)
+                )
+                if isinstance(outcome, Exception):
+                    self.dead_lettered += 1
+                    self.store.update_sent(
+                        event, DeliveryStatus.FAILED, None, f"Delivery error: {outcome}"
+                    )
+                    self.dead_letters.appendleft(event)
+                else:
+                    self._record(event, *outcome)
+        self.in_flight -= len(results)
+
+    async def _settle_batch(
+        self, results: list[tuple[SentEvent, Outcome | Exception]]
+    ) -> None:
+        try:
+            await self._settle(results)
+        finally:
+            for _ in results:
+                self._batch_slots.release()
+
+    def _record(
+        self, event: SentEvent, response_code: int | None, error_message: str | None
+    ) -> None:
+        if error_message is None:
+            self.delivered += 1
+            self.store.update_sent(event, DeliveryStatus.DELIVERED, response_code)
+        elif (
+            self._is_retryable(response_code)
+            and event.attempts < self.max_attempts
+        ):
+            self.retries += 1
+            self.store.update_sent(
+                event, DeliveryStatus.RETRYING, response_code, error_message
+            )
+            self._schedule_retry(event)
+        else:
+            self.dead_lettered += 1
+            self.store.update_sent(
+                event, DeliveryStatus.FAILED, response_code, error_message
+            )
+            self.dead_letters.appendleft(event)
+
+    async def _worker(self) -> None:
+        while True:
+            event = await self.queue.get()
+            try:
+                if self._batch_slots is not None:
+                    await self._batch_slots.acquire()
+                self.in_flight += 1
+                self._started[event.id] = time.perf_counter()
+                if self._batch_slots is not None:
+                    self.coalescer.submit(event, self._settle_batch)
+                    continue
+                try:
+                    await self._attempt(event)
+                except Exception as e:  # keep the worker alive
+                    await self._settle([(event, e)])
+            finally:
+                self.queue.task_done()
+
+    def get_stats(self) -> dict[str, Any]:
+        """Get queue depth, in-flight and retry statistics."""
+        return {
+            "workers": len(self._tasks),
+            "queue_depth": self.queue.qsize(),
+            "queue_capacity": self.max_size,
+            "in_flight": self.in_flight,
+            "waiting_retry": len(self._timers),
+            "delivered": self.delivered,
+            "retries": self.retries,
+            "dead_lettered": self.dead_lettered,
+        }
+
+    def get_dead_letters(self) -> list[dict[str, Any]]:
+        """Get dead-lettered events as dictionaries, newest first."""
+        return [e.to_dict() for e in self.dead_letters]
+
+
+# Global delivery queue
+delivery_queue = DeliveryQueue(
+    deliver=mesa_ya_client.deliver,
+    store=event_store,
+    workers=config.delivery_workers,
+    max_size=config.delivery_queue_size,
+    max_attempts=config.delivery_max_attempts,
+    backoff_base=config.delivery_backoff_base,
+    backoff_max=config.delivery_backoff_max,
+    dead_letter_size=config.delivery_dead_letter_size,
+    coalescer=delivery_coalescer,
+)
@@ -0,0 +1,116 @@
+"""Secondary indexes over EventStore sequence numbers."""
+
+import bisect
+from collections.abc import Hashable, Iterable, Iterator
+
+Facet = tuple[str, Hashable]
+
+
+class SeqIndex:
+    """
+    Sorted list of event seqs.
+
+    Seqs are appended in increasing order and evicted from the front, so
+    trimming advances a start offset (compacting now and then) in O(1)
+    amortized time. Out-of-order inserts and removals (status changes) are
+    bisected and usually land near the end.
+    """
+
+    __slots__ = ("_seqs", "_start")
+
+    def __init__(self) -> None:
+        self._seqs: list[int] = []
+        self._start = 0
+
+    def __len__(self) -> int:
+        return len(self._seqs) - self._start
+
+    def add(self, seq: int) -> None:
+        """Insert a seq, keeping the list sorted."""
+        seqs = self._seqs
+        if not seqs or seqs[-1] < seq:
+            seqs.append(seq)
+        else:
+            index = bisect.bisect_left(seqs, seq, self._start)
+            if index == len(seqs) or seqs[index] != seq:
+                seqs.insert(index, seq)
+
+    def discard(self, seq: int) -> None:
+        """Remove a seq if present."""
+        seqs = self._seqs
+        index = bisect.bisect_left(seqs, seq, self._start)
+        if index < len(seqs) and seqs[index] == seq:
+            del seqs[index]
+
+    def trim(self, min_seq: int) -> None:
+        """Drop every seq below ``min_seq``."""
+        seqs = self._seqs
+        start = self._start
+        while start < len(seqs) and seqs[start] < min_seq:
+            start += 1
+        if start > 1024 and start * 2 > len(seqs):
+            del seqs[:start]
+            start = 0
+        self._start = start
+
+    def before(self, cursor: int | None, limit: int) -> list[int]:
+        """Get up to ``limit`` seqs below ``cursor``, newest first."""
+        seqs = self._seqs
+        end = len(seqs) if cursor is None else bisect.bisect_left(seqs, cursor, self._start)
+        begin = max(self._start, end - limit)
+        return seqs[begin:end][::-1]
+
+
+class FacetIndex:
+    """Maps ``(facet, value)`` pairs such as ``("status", "verified")`` to seqs."""
+
+    def __init__(self) -> None:
+        self._indexes: dict[Facet, SeqIndex] = {}
+
+    def add(self, seq: int, facets: Iterable[Facet]) -> None:
+        for facet in facets:
+            index = self._indexes.get(facet)
+            if index is None:
+                index = self._indexes[facet] = SeqIndex()
+            index.add(seq)
+
+    def discard(self, seq: int, facets: Iterable[Facet]) -> None:
+        for facet in facets:
+            index = self._indexes.get(facet)
+            if index is not None:
+                index.discard(seq)
+                if not index:
+                    del self._indexes[facet]
+
+    def evict(self, seq: int, facets: Iterable[Facet]) -> None:
+        """Drop an evicted (oldest) seq from the indexes it belongs to."""
+        for facet in facets:
+            index = self._indexes.get(facet)
+            if index is not None:
+                index.trim(seq + 1)
+                if not index:
+                    del self._indexes[facet]
+
+    def get(self, facet: Facet) -> SeqIndex | None:
+        return self._indexes.get(facet)
+
+    def smallest(self, facets: Iterable[Facet]) -> SeqIndex | None:
+        """
+        Get the most selective index among ``facets``.
+
+        Returns an empty index when any facet has no events at all.
+        """
+        best: SeqIndex | None = None
+        for facet in facets:
+            index = self._indexes.get(facet)
+            if index is None:
+                return SeqIndex()
+            if best is None or len(index) < len(best):
+                best = index
+        return best
+
+    def clear(self) -> None:
+        self._indexes.clear()
+
+    def __iter__(self) -> Iterator[Facet]:
+        return iter(self._indexes)
@@ -0,0 +1,489 @@
+"""Durable append-only event log used as a persistence backend for EventStore."""
+
+import asyncio
+import bisect
+import json
+import os
+import threading
+from collections.abc import Iterator
+from contextlib import AbstractAsyncContextManager, AbstractContextManager, nullcontext
+from pathlib import Path
+from typing import Any, Protocol
+
+
+class EventBackend(Protocol):
+    """Persistence backend interface for EventStore."""
+
+    def append(self, kind: str, seq: int, record: dict[str, Any]) -> None:
+        """Buffer a record for ``kind`` ("received" / "sent") under ``seq``."""
+
+    def mark_cleared(self, kind: str, next_seq: int) -> None:
+        """Record that every seq below ``next_seq`` was cleared."""
+
+    def next_seq(self, kind: str) -> int:
+        """Get the seq the next record of ``kind`` should be stored under."""
+
+    def replay(self, kind: str, limit: int) -> list[tuple[int, dict[str, Any]]]:
+        """Get the most recent ``limit`` records, oldest first."""
+
+    def read_before(
+        self, kind: str, before_seq: int, limit: int
+    ) -> list[tuple[int, dict[str, Any]]]:
+        """Get up to ``limit`` records with seq below ``before_seq``, newest first."""
+
+    def transaction(self) -> AbstractContextManager[None]:
+        """
+        Wrap one store write.
+
+        Backends shared between processes serialize writers here and bring
+        the store up to date first, so new seqs never collide.
+        """
+
+    def reserve(self) -> AbstractAsyncContextManager[None]:
+        """
+        Take the write lock ``transaction()`` would take, off the event loop.
+
+        Transactions opened inside the block join it instead of waiting.
+        """
+
+    async def start(self) -> None:
+        """Start background flushing."""
+
+    async def close(self) -> None:
+        """Flush pending records and release resources."""
+
+
+class _LogStream:
+    """One directory of segment files holding a single kind of event."""
+
+    SEGMENT_SUFFIX = ".ndjson"
+    SUMMARY_SUFFIX = ".summary.json"
+
+    def __init__(
+        self, directory: Path, segment_max_bytes: int, max_segments: int | None = None
+    ):
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_max_bytes = segment_max_bytes
+        self.max_segments = max_segments
+        self.lock = threading.Lock()
+        # Tail index: first seq of every segment, ascending
+        self.segments: list[int] = sorted(
+            int(path.stem)
+            for path in self.directory.glob(f"*{self.SEGMENT_SUFFIX}")
+            if path.stem.isdigit()
+        )
+        self._file = None
+        self._file_size = 0
+        # Built on first use from the segment summaries (see _load_index)
+        self._late: dict[int, tuple[int, int]] | None = None
+        self._max_seq = -1
+        self.cleared = -1
+        # Summary of the active segment, saved beside it when it rolls
+        self._active = self._empty_summary()
+
+    def path_for(self, first_seq: int) -> Path:
+        return self.directory / f"{first_seq:020d}{self.SEGMENT_SUFFIX}"
+
+    def summary_path_for(self, first_seq: int) -> Path:
+        return self.directory / f"{first_seq:020d}{self.SUMMARY_SUFFIX}"
+
+    @staticmethod
+    def _empty_summary() -> dict[str, Any]:
+        return {"max_seq": -1, "cleared": -1, "late": {}}
+
+    def write(self, lines: list[tuple[int | None, bytes]]) -> None:
+        """
+        Write lines to the active segment (rotating as needed) and fsync.
+
+        Args:
+            lines: (seq, line) pairs; seq is None for clear markers
+        """
+        with self.lock:
+            late = self._load_index()
+            for seq, line in lines:
+                if self._file is None and self.segments:
+                    path = self.path_for(self.segments[-1])
+                    self._file = open(path, "ab")
+                    self._file_size = path.stat().st_size
+                fresh = seq is not None and seq > self._max_seq
+                if self._file is None or (
+                    fresh and self._file_size >= self.segment_max_bytes
+                ):
+                    # Only a new seq starts a segment, so it can be named
+                    # after it; upserts and clears go to the active one
+                    self._rotate(seq if fresh else self._max_seq + 1)
+                active = self._active
+                if seq is None:
+                    active["cleared"] = self.cleared
+                else:
+                    if seq < self.segments[-1]:
+                        late[seq] = (self.segments[-1], self._file_size)
+                        active["late"][seq] = self._file_size
+                    self._max_seq = max(self._max_seq, seq)
+                    active["max_seq"] = max(active["max_seq"], seq)
+                self._file.write(line)
+                self._file_size += len(line)
+            if self._file is not None:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+
+    def _rotate(self, first_seq: int) -> None:
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._save_summary(self.segments[-1], self._active)
+        if self.segments and first_seq <= self.segments[-1]:
+            first_seq = self.segments[-1] + 1
+        self.segments.append(first_seq)
+        self._file = open(self.path_for(first_seq), "ab")
+        self._file_size = 0
+        self._active = self._empty_summary()
+        if self.max_segments and len(self.segments) > self.max_segments:
+            self._drop_oldest(len(self.segments) - self.max_segments)
+
+    def _drop_oldest(self, count: int) -> None:
+        """Delete the ``count`` oldest segments. Caller holds the lock."""
+        dropped, self.segments[:count] = self.segments[:count], []
+        for first_seq in dropped:
+            self.path_for(first_seq).unlink(missing_ok=True)
+            self.summary_path_for(first_seq).unlink(missing_ok=True)
+        # Upserts of dropped seqs can only live in dropped segments or later
+        # ones; forget the later ones too
+        floor = self.segments[0]
+        late = self._late or {}
+        for seq in [seq for seq in late if seq < floor]:
+            del late[seq]
+
+    def _save_summary(self, first_seq: int, summary: dict[str, Any]) -> None:
+        """Atomically write a rolled segment's summary next to it."""
+        path = self.summary_path_for(first_seq)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(summary, separators=(",", ":")))
+        os.replace(tmp, path)
+
+    def _load_summary(self, first_seq: int) -> dict[str, Any]:
+        """Get a rolled segment's summary, rebuilding a missing or bad one."""
+        try:
+            summary = json.loads(self.summary_path_for(first_seq).read_bytes())
+            summary["late"] = {int(seq): at for seq, at in summary["late"].items()}
+            return summary
+        except (OSError, ValueError, KeyError, AttributeError):
+            summary = self._scan(first_seq)
+            self._save_summary(first_seq, summary)
+            return summary
+
+    def close(self) -> None:
+        with self.lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _entries(self, path: Path) -> Iterator[tuple[int, dict[str, Any]]]:
+        """Yield (byte offset, entry) for every readable line of a segment."""
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            # Dropped by retention while being read
+            return
+        offset = 0
+        for line in data.splitlines(keepends=True):
+            try:
+                yield offset, json.loads(line)
+            except ValueError:
+                # Torn write at the tail after a crash
+                pass
+            offset += len(line)
+
+    def _scan(self, first_seq: int) -> dict[str, Any]:
+        """Build a segment's summary by reading it."""
+        summary = self._empty_summary()
+        for offset, entry in self._entries(self.path_for(first_seq)):
+            if "cleared" in entry:
+                summary["cleared"] = max(summary["cleared"], entry["cleared"])
+                continue
+            seq = entry["seq"]
+            summary["max_seq"] = max(summary["max_seq"], seq)
+            if seq < first_seq:
+                summary["late"][seq] = offset
+        return summary
+
+    def _load_index(self) -> dict[int, tuple[int, int]]:
+        """
+        Get the late-upsert index, loading it the first time.
+
+        A seq belongs to the segment whose range it falls in, but a status
+        change may be appended any number of segments later. The index maps
+        each such seq to the segment and byte offset of its latest line.
+        Rolled segments are summarised in a small file written when they
+        roll, so only the active segment is read. Caller holds the lock.
+        """
+        if self._late is None:
+            late: dict[int, tuple[int, int]] = {}
+            for position, first_seq in enumerate(self.segments):
+                if position == len(self.segments) - 1:
+                    summary = self._active = self._scan(first_seq)
+                else:
+                    summary = self._load_summary(first_seq)
+                self._max_seq = max(self._max_seq, summary["max_seq"])
+                self.cleared = max(self.cleared, summary["cleared"])
+                for seq, offset in summary["late"].items():
+                    if seq >= self.segments[0]:
+                        late[seq] = (first_seq, offset)
+            self._late = late
+        return self._late
+
+    def snapshot(self) -> tuple[list[int], dict[int, tuple[int, int]], int]:
+        """
+        Get what a reader needs to walk the stream.
+
+        Returns:
+            Tuple of (segment first seqs, late-upsert index, latest clear
+            cutoff or -1)
+        """
+        with self.lock:
+            late = self._load_index()
+            return list(self.segments), late, self.cleared
+
+    def note_cleared(self, cutoff: int) -> None:
+        """Apply a clear to readers before its marker is written."""
+        with self.lock:
+            self.cleared = max(self.cleared, cutoff)
+
+    def next_seq(self) -> int:
+        """Get the seq following every record and clear written so far."""
+        with self.lock:
+            self._load_index()
+            return max(self._max_seq + 1, self.cleared)
+
+    def read_segment(self, first_seq: int) -> tuple[dict[int, dict[str, Any]], int]:
+        """
+        Read one segment.
+
+        Returns:
+            Tuple of (records by seq, clear cutoff seq found in the segment)
+        """
+        records: dict[int, dict[str, Any]] = {}
+        cutoff = -1
+        for _, entry in self._entries(self.path_for(first_seq)):
+            if "cleared" in entry:
+                cutoff = max(cutoff, entry["cleared"])
+            else:
+                records[entry["seq"]] = entry["event"]
+        if cutoff >= 0:
+            records = {seq: r for seq, r in records.items() if seq >= cutoff}
+        return records, cutoff
+
+    def read_at(self, first_seq: int, offset: int) -> dict[str, Any] | None:
+        """Read the single record at ``offset`` in a segment."""
+        try:
+            with open(self.path_for(first_seq), "rb") as file:
+                file.seek(offset)
+                return json.loads(file.readline())["event"]
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+
+    def read_latest(
+        self, first_seq: int, late: dict[int, tuple[int, int]]
+    ) -> dict[int, dict[str, Any]]:
+        """
+        Read the seqs belonging to one segment, each at its latest version.
+
+        Lines upserting seqs of older segments are skipped; upserts of this
+        segment's seqs are read line by line from the later segments holding
+        them.
+        """
+        records, _ = self.read_segment(first_seq)
+        records = {seq: r for seq, r in records.items() if seq >= first_seq}
+        for seq in records:
+            location = late.get(seq)
+            if location is not None and location[0] > first_seq:
+                newer = self.read_at(*location)
+                if newer is not None:
+                    records[seq] = newer
+        return records
+
+
+class SegmentedEventLog:
+    """
+    Append-only NDJSON log split into size-bounded segment files.
+
+    Appends only go to an in-memory buffer; a background task writes the
+    buffer out and fsyncs it every ``fsync_interval`` seconds, or sooner
+    once ``fsync_batch`` records are pending. Records are upserted by seq:
+    a later line for the same seq (e.g. a status change) replaces the
+    earlier one when reading. With ``max_segments`` set, the oldest
+    segments of a kind are deleted once it has more than that many.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        segment_max_bytes: int = 8 * 1024 * 1024,
+        fsync_interval: float = 0.2,
+        fsync_batch: int = 512,
+        max_segments: int | None = None,
+    ):
+        self.directory = Path(directory)
+        self.segment_max_bytes = segment_max_bytes
+        self.max_segments = max_segments
+        self.fsync_interval = fsync_interval
+        self.fsync_batch = fsync_batch
+        self._streams: dict[str, _LogStream] = {}
+        self._streams_lock = threading.Lock()
+        self._pending: dict[str, list[tuple[int | None, bytes]]] = {}
+        self._pending_count = 0
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+
+    def _stream(self, kind: str) -> _LogStream:
+        stream = self._streams.get(kind)
+        if stream is None:
+            with self._streams_lock:
+                stream = self._streams.get(kind)
+                if stream is None:
+                    stream = _LogStream(
+                        self.directory / kind,
+                        self.segment_max_bytes,
+                        self.max_segments,
+                    )
+                    self._streams[kind] = stream
+        return stream
+
+    def _buffer(self, kind: str, seq: int | None, entry: dict[str, Any]) -> None:
+        line = json.dumps(entry, separators=(",", ":")).encode() + b"\n"
+        self._pending.setdefault(kind, []).append((seq, line))
+        self._pending_count += 1
+        if self._pending_count >= self.fsync_batch and self._wakeup is not None:
+            self._wakeup.set()
+
+    def append(self, kind: str, seq: int, record: dict[str, Any]) -> None:
+        """Buffer a record; it becomes durable on the next flush."""
+        self._buffer(kind, seq, {"seq": seq, "event": record})
+
+    def mark_cleared(self, kind: str, next_seq: int) -> None:
+        """Record a clear so replay and paging ignore every earlier seq."""
+        self._stream(kind).note_cleared(next_seq)
+        self._buffer(kind, None, {"cleared": next_seq})
+
+    def transaction(self) -> AbstractContextManager[None]:
+        """The log has a single writer, so writes need no coordination."""
+        return nullcontext()
+
+    def reserve(self) -> AbstractAsyncContextManager[None]:
+        """Nothing to wait for; see ``transaction``."""
+        return nullcontext()
+
+    def _take_pending(self) -> dict[str, list[tuple[int | None, bytes]]]:
+        pending, self._pending = self._pending, {}
+        self._pending_count = 0
+        return pending
+
+    def _write(self, pending: dict[str, list[tuple[int | None, bytes]]]) -> None:
+        for kind, lines in pending.items():
+            self._stream(kind).write(lines)
+
+    def flush(self) -> None:
+        """Synchronously write and fsync every pending record."""
+        self._write(self._take_pending())
+
+    async def _flush_loop(self) -> None:
+        assert self._wakeup is not None
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.fsync_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._pending_count:
+                await asyncio.to_thread(self._write, self._take_pending())
+
+    async def start(self) -> None:
+        """Start the background flush task."""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def close(self) -> None:
+        """Stop the flush task, flush what is pending and close segment files."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._wakeup = None
+        self.flush()
+        for stream in self._streams.values():
+            stream.close()
+
+    def _collect(
+        self,
+        kind: str,
+        before_seq: int | None,
+        limit: int,
+    ) -> list[tuple[int, dict[str, Any]]]:
+        """Walk segments newest to oldest collecting records below ``before_seq``."""
+        stream = self._stream(kind)
+        segments, late, cutoff = stream.snapshot()
+        if not segments or limit <= 0:
+            return []
+
+        if before_seq is None:
+            index = len(segments) - 1
+        else:
+            index = bisect.bisect_left(segments, before_seq) - 1
+            if index < 0:
+                return []
+
+        found: list[tuple[int, dict[str, Any]]] = []
+        while index >= 0 and len(found) < limit:
+            records = stream.read_latest(segments[index], late)
+            for seq in sorted(records, reverse=True):
+                if before_seq is not None and seq >= before_seq:
+                    continue
+                if seq < cutoff or len(found) >= limit:
+                    break
+                found.append((seq, records[seq]))
+            if 0 <= cutoff and segments[index] <= cutoff:
+                # Everything in older segments was cleared
+                break
+            index -= 1
+        return found
+
+    def next_seq(self, kind: str) -> int:
+        """Get the seq the next record of ``kind`` should be stored under."""
+        self.flush()
+        return self._stream(kind).next_seq()
+
+    def replay(self, kind: str, limit: int) -> list[tuple[int, dict[str, Any]]]:
+        """Get the most recent ``limit`` records, oldest first."""
+        self.flush()
+        return list(reversed(self._collect(kind, None, limit)))
+
+    def read_before(
+        self, kind: str, before_seq: int, limit: int
+    ) -> list[tuple[int, dict[str, Any]]]:
+        """Get up to ``limit`` records with seq below ``before_seq``, newest first."""
+        return self._collect(kind, before_seq, limit)
+
+    def iter_records(self, kind: str) -> Iterator[tuple[int, dict[str, Any]]]:
+        """
+        Yield every retained record of ``kind``, oldest first.
+
+        Reads one segment (plus the segments holding later upserts of its
+        seqs) at a time, so the whole log is never held in memory.
+        """
+        self.flush()
+        stream = self._stream(kind)
+        segments, late, cutoff = stream.snapshot()
+        for index in range(len(segments)):
+            if index + 1 < len(segments) and segments[index + 1] <= cutoff:
+                # Cleared
+                continue
+            records = stream.read_latest(segments[index], late)
+            for seq in sorted(records):
+                if seq >= cutoff:
+                    yield seq, records[seq]
@@ -0,0 +1,56 @@
+"""Business handlers for the payment events MesaYA sends to this partner."""
+
+import logging
+
+from mesaya_partner_demo.json_logging import log_event
+from mesaya_partner_demo.models import WebhookEvent
+from mesaya_partner_demo.pipeline import pipeline
+
+
+def _payment(event: WebhookEvent) -> dict:
+    """Get the payment fields of an event (top level, or under ``data``)."""
+    payload = event.payload
+    data = payload.get("data")
+    payment = data if isinstance(data, dict) else payload
+    if "payment_id" not in payment:
+        raise ValueError("Payment event without payment_id")
+    return payment
+
+
+@pipeline.handler("payment.created")
+async def on_payment_created(event: WebhookEvent) -> None:
+    payment = _payment(event)
+    log_event(
+        logging.INFO,
+        "payment created",
+        event_id=event.id,
+        event_type=event.event_type,
+        payment_id=payment.get("payment_id"),
+        amount=payment.get("amount"),
+    )
+
+
+@pipeline.handler("payment.succeeded")
+async def on_payment_succeeded(event: WebhookEvent) -> None:
+    payment = _payment(event)
+    log_event(
+        logging.INFO,
+        "payment succeeded",
+        event_id=event.id,
+        event_type=event.event_type,
+        payment_id=payment.get("payment_id"),
+        amount=payment.get("amount"),
+    )
+
+
+@pipeline.handler("payment.failed")
+async def on_payment_failed(event: WebhookEvent) -> None:
+    payment = _payment(event)
+    log_event(
+        logging.WARNING,
+        "payment failed",
+        event_id=event.id,
+        event_type=event.event_type,
+        payment_id=payment.get("payment_id"),
+        reason=payment.get("reason"),
+    )
@@ -0,0 +1,105 @@
+"""Background health probing of MesaYA services, answered from a cache."""
+
+import asyncio
+import time
+from collections.abc import Callable
+from datetime import datetime, timezone
+from typing import Any
+
+from mesaya_partner_demo.config import config
+from mesaya_partner_demo.http_pool import HTTPClientPool, http_pool
+
+
+class HealthProber:
+    """
+    Probes every configured service concurrently on an interval.
+
+    The latest result per service (status, latency, time of the check) is
+    kept ready to serve, so reading health never waits on the network.
+    The service list is read on every round, so URL changes (e.g. after
+    registering against another MesaYA) are picked up.
+    """
+
+    def __init__(
+        self,
+        services: Callable[[], dict[str, str]],
+        pool: HTTPClientPool = http_pool,
+        interval: float = 15.0,
+        timeout: float = 2.0,
+    ):
+        self.services = services
+        self.pool = pool
+        self.interval = interval
+        self.timeout = timeout
+        self._results: dict[str, dict[str, Any]] = {
+            name: {"status": "unknown", "url": url, "checked_at": None}
+            for name, url in services().items()
+        }
+        self._task: asyncio.Task | None = None
+        self._probing: asyncio.Task | None = None
+
+    async def _probe(self, url: str) -> dict[str, Any]:
+        start = time.perf_counter()
+        result: dict[str, Any] = {"url": url}
+        try:
+            response = await self.pool.request(
+                "GET", url, use_breaker=False, timeout=self.timeout
+            )
+        except Exception as e:
+            result["status"] = "offline"
+            result["error"] = type(e).__name__
+        else:
+            result["status"] = "online" if response.status_code == 200 else "error"
+            result["http_status"] = response.status_code
+        result["latency_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        result["checked_at"] = datetime.now(timezone.utc).isoformat()
+        return result
+
+    async def _probe_all(self) -> dict[str, dict[str, Any]]:
+        services = self.services()
+        results = await asyncio.gather(*(self._probe(url) for url in services.values()))
+        self._results = dict(zip(services, results))
+        return self._results
+
+    async def probe_all(self) -> dict[str, dict[str, Any]]:
+        """
+        Probe every service now, all at once, and cache the results.
+
+        Concurrent callers share the round already in flight.
+        """
+        if self._probing is None or self._probing.done():
+            self._probing = asyncio.ensure_future(self._probe_all())
+        return await asyncio.shield(self._probing)
+
+    def get_results(self) -> dict[str, dict[str, Any]]:
+        """Get the cached result of the last round."""
+        return self._results
+
+    async def _loop(self) -> None:
+        while True:
+            await self.probe_all()
+            await asyncio.sleep(self.interval)
+
+    async def start(self) -> None:
+        """Start probing in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def close(self) -> None:
+        """Stop probing."""
+        for task in (self._task, self._probing):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = self._probing = None
+
+
+# Global prober
+health_prober = HealthProber(
+    lambda: config.health_services,
+    interval=config.health_check_interval,
+    timeout=config.health_check_timeout,
+)
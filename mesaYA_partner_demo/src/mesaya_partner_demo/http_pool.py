@@ -0,0 +1,284 @@
+"""Shared, pooled HTTP clients for outbound calls to MesaYA services."""
+
+import time
+from typing import Any
+
+import httpx
+
+from mesaya_partner_demo.circuit_breaker import (
+    AdaptiveTimeout,
+    CircuitBreaker,
+    CircuitOpenError,
+)
+from mesaya_partner_demo.config import config
+from mesaya_partner_demo.metrics import HistogramChild, outbound_request_seconds
+
+
+def _has_h2() -> bool:
+    """Check whether the optional ``h2`` package (HTTP/2 support) is installed."""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class CallStats:
+    """Latency statistics and in-flight count of calls to a single target."""
+
+    __slots__ = ("calls", "errors", "total_ms", "max_ms", "last_ms", "in_flight")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms = 0.0
+        # Requests sent through the pool still waiting for their response
+        self.in_flight = 0
+
+    def record(self, elapsed_ms: float, error: bool = False) -> None:
+        """Record the duration of one call."""
+        self.calls += 1
+        if error:
+            self.errors += 1
+        self.total_ms += elapsed_ms
+        self.last_ms = elapsed_ms
+        if elapsed_ms > self.max_ms:
+            self.max_ms = elapsed_ms
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to dictionary for JSON serialization."""
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "avg_ms": round(self.total_ms / self.calls, 3) if self.calls else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "last_ms": round(self.last_ms, 3),
+            "in_flight": self.in_flight,
+        }
+
+
+class HTTPClientPool:
+    """
+    Long-lived ``httpx.AsyncClient`` instances, one per target origin.
+
+    Each client keeps its connections alive between calls so outbound
+    webhooks reuse the TCP/TLS session instead of handshaking every time.
+    Every origin also gets a circuit breaker and an adaptive timeout, so a
+    target that is down or slow fails fast instead of holding workers.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 10.0,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = False,
+        breaker_window: int = 20,
+        breaker_min_calls: int = 10,
+        breaker_failure_rate: float = 0.5,
+        breaker_open_seconds: float = 10.0,
+        adaptive_timeout_min: float = 1.0,
+        adaptive_timeout_multiplier: float = 3.0,
+    ):
+        self.timeout = timeout
+        self.breaker_window = breaker_window
+        self.breaker_min_calls = breaker_min_calls
+        self.breaker_failure_rate = breaker_failure_rate
+        self.breaker_open_seconds = breaker_open_seconds
+        self.adaptive_timeout_min = adaptive_timeout_min
+        self.adaptive_timeout_multiplier = adaptive_timeout_multiplier
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2 and _has_h2()
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._stats: dict[str, CallStats] = {}
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._timeouts: dict[str, AdaptiveTimeout] = {}
+        # Latency series per origin and status, bound on first use
+        self._series: dict[str, dict[int | str, HistogramChild]] = {}
+
+    @staticmethod
+    def origin(url: str) -> str:
+        """Get the ``scheme://host:port`` origin a URL belongs to."""
+        parsed = httpx.URL(url)
+        port = parsed.port or (443 if parsed.scheme == "https" else 80)
+        return f"{parsed.scheme}://{parsed.host}:{port}"
+
+    def client_for(self, url: str) -> httpx.AsyncClient:
+        """Get (creating on first use) the pooled client for a URL's origin."""
+        key = self.origin(url)
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=self.limits,
+                http2=self.http2,
+            )
+            self._clients[key] = client
+            self._stats.setdefault(key, CallStats())
+        return client
+
+    def breaker_for(self, key: str) -> CircuitBreaker:
+        """Get (creating on first use) the circuit breaker of an origin."""
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = self._breakers[key] = CircuitBreaker(
+                window=self.breaker_window,
+                min_calls=self.breaker_min_calls,
+                failure_rate=self.breaker_failure_rate,
+                open_seconds=self.breaker_open_seconds,
+            )
+        return breaker
+
+    def timeout_for(self, key: str) -> AdaptiveTimeout:
+        """Get (creating on first use) the adaptive timeout of an origin."""
+        adaptive = self._timeouts.get(key)
+        if adaptive is None:
+            adaptive = self._timeouts[key] = AdaptiveTimeout(
+                minimum=min(self.adaptive_timeout_min, self.timeout),
+                maximum=self.timeout,
+                multiplier=self.adaptive_timeout_multiplier,
+            )
+        return adaptive
+
+    def _latency(self, key: str, status: int | str) -> HistogramChild:
+        """Get the latency series of an origin and status code (or outcome)."""
+        by_status = self._series.get(key)
+        if by_status is None:
+            by_status = self._series[key] = {}
+        child = by_status.get(status)
+        if child is None:
+            child = by_status[status] = outbound_request_seconds.labels(key, str(status))
+        return child
+
+    async def request(
+        self, method: str, url: str, use_breaker: bool = True, **kwargs: Any
+    ) -> httpx.Response:
+        """
+        Send a request through the pooled client and record its latency.
+
+        Latency is also exported as a histogram by origin and status code
+        ("error" when no response was received). Without an explicit
+        ``timeout`` the origin's adaptive timeout applies. Unless
+        ``use_breaker`` is False, transport errors and 5xx responses count
+        against the origin's circuit breaker, and while it is open the call
+        fails immediately with ``CircuitOpenError``.
+
+        Raises:
+            CircuitOpenError: If the origin's breaker rejects the call
+            httpx.HTTPError: On transport errors and timeouts
+        """
+        client = self.client_for(url)
+        key = self.origin(url)
+        stats = self._stats[key]
+        adaptive = self.timeout_for(key)
+        breaker = self.breaker_for(key) if use_breaker else None
+        generation = breaker.allow() if breaker is not None else None
+        if breaker is not None and generation is None:
+            self._latency(key, "rejected").observe(0.0)
+            raise CircuitOpenError(f"Circuit open for {key}")
+        # Only calls on the adaptive timeout feed it; explicit timeouts
+        # (health probes, registration) have their own latency profile
+        adaptive_call = "timeout" not in kwargs
+        if adaptive_call:
+            kwargs["timeout"] = adaptive.current
+
+        outcome: bool | None = None
+        stats.in_flight += 1
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            outcome = False
+            elapsed = time.perf_counter() - start
+            stats.record(elapsed * 1000, error=True)
+            self._latency(key, "error").observe(elapsed)
+            if adaptive_call and isinstance(e, httpx.TimeoutException):
+                # Censored sample: the call took at least this long
+                adaptive.observe(elapsed)
+            raise
+        else:
+            outcome = response.status_code < 500
+            elapsed = time.perf_counter() - start
+            stats.record(elapsed * 1000)
+            self._latency(key, response.status_code).observe(elapsed)
+            if adaptive_call:
+                adaptive.observe(elapsed)
+            return response
+        finally:
+            stats.in_flight -= 1
+            if breaker is not None:
+                if outcome is None:
+                    breaker.abandon(generation)
+                else:
+                    breaker.record(outcome, generation)
+
+    async def close(self) -> None:
+        """Close every pooled client and release its connections."""
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            await client.aclose()
+
+    def get_breaker_stats(self) -> dict[str, Any]:
+        """Get circuit breaker state and adaptive timeout of the origins called so far."""
+        stats: dict[str, Any] = {}
+        for key, breaker in self._breakers.items():
+            adaptive = self._timeouts.get(key)
+            stats[key] = {
+                **breaker.get_stats(),
+                **(adaptive.get_stats() if adaptive is not None else {}),
+            }
+        return stats
+
+    def get_stats(self) -> dict[str, Any]:
+        """
+        Get pool configuration, in-flight counts and latency statistics.
+
+        Only reads what exists: origins without a breaker or adaptive timeout
+        yet (nothing sent through ``request``) report None for them.
+        """
+        targets: dict[str, Any] = {}
+        for key, stats in self._stats.items():
+            adaptive = self._timeouts.get(key)
+            breaker = self._breakers.get(key)
+            targets[key] = {
+                **stats.to_dict(),
+                **(
+                    adaptive.get_stats()
+                    if adaptive is not None
+                    else {"timeout_seconds": None, "samples": 0}
+                ),
+                "breaker": breaker.state.value if breaker is not None else None,
+            }
+
+        return {
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "keepalive_expiry": self.limits.keepalive_expiry,
+            "http2": self.http2,
+            "clients": len(self._clients),
+            "targets": targets,
+        }
+
+
+# Global pool instance
+http_pool = HTTPClientPool(
+    timeout=config.http_timeout,
+    max_connections=config.http_max_connections,
+    max_keepalive_connections=config.http_max_keepalive_connections,
+    keepalive_expiry=config.http_keepalive_expiry,
+    http2=config.http2,
+    breaker_window=config.breaker_window,
+    breaker_min_calls=config.breaker_min_calls,
+    breaker_failure_rate=config.breaker_failure_rate,
+    breaker_open_seconds=config.breaker_open_seconds,
+    adaptive_timeout_min=config.adaptive_timeout_min,
+    adaptive_timeout_multiplier=config.adaptive_timeout_multiplier,
+)
@@ -0,0 +1,177 @@
+"""Structured JSON logging, written from a background thread."""
+
+import logging
+import queue
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any
+
+from mesaya_partner_demo import json_codec
+from mesaya_partner_demo.config import config
+
+# Logger for the service; structured fields go in ``extra={"fields": {...}}``
+logger = logging.getLogger("mesaya_partner_demo")
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "ts": round(record.created, 6),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json_codec.dumps(entry).decode()
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps 1 in N records below WARNING, per event type.
+
+    Rates are fractions of records to keep (1.0 keeps all, 0.01 keeps every
+    100th); ``event_type`` is read from the record's fields. Warnings and
+    errors are never sampled out. Counting instead of drawing random
+    numbers keeps the decision cheap and the output evenly spaced.
+    """
+
+    def __init__(self, rates: dict[str, float], default_rate: float = 1.0):
+        super().__init__()
+        self._every = {key: self._every_n(rate) for key, rate in rates.items()}
+        self._default_every = self._every_n(default_rate)
+        self._seen: dict[str, int] = {}
+
+    @staticmethod
+    def _every_n(rate: float) -> int:
+        return 0 if rate <= 0 else max(1, round(1 / rate))
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        fields = getattr(record, "fields", None)
+        event_type = fields.get("event_type") if fields else None
+        if event_type is None:
+            return True
+
+        every = self._every.get(event_type, self._default_every)
+        if every <= 1:
+            return every == 1
+        seen = self._seen.get(event_type, 0)
+        self._seen[event_type] = seen + 1
+        return seen % every == 0
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Hands records to the listener thread without formatting them.
+
+    The stock handler formats on the calling thread (the event loop); here
+    formatting and I/O both happen in the listener. When the queue is full
+    the record is dropped and counted rather than blocking the caller.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def parse_sample_rates(spec: str) -> tuple[dict[str, float], float]:
+    """
+    Parse ``"payment.created=0.01,*=0.1"`` into per-type rates and a default.
+
+    Returns:
+        Tuple of (rates by event type, default rate)
+    """
+    rates: dict[str, float] = {}
+    default = 1.0
+    for item in spec.split(","):
+        name, sep, value = item.strip().partition("=")
+        if not sep:
+            continue
+        if name == "*":
+            default = float(value)
+        else:
+            rates[name] = float(value)
+    return rates, default
+
+
+class JsonLogging:
+    """Owns the queue, handler and listener thread of the service logger."""
+
+    def __init__(
+        self,
+        level: str = "INFO",
+        sample_rates: dict[str, float] | None = None,
+        default_sample_rate: float = 1.0,
+        queue_size: int = 10_000,
+    ):
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.handler = NonBlockingQueueHandler(self.queue)
+        self.handler.addFilter(SamplingFilter(sample_rates or {}, default_sample_rate))
+
+        output = logging.StreamHandler(sys.stdout)
+        output.setFormatter(JsonFormatter())
+        self.listener = QueueListener(self.queue, output)
+        self._started = False
+
+        logger.setLevel(level.upper())
+        logger.addHandler(self.handler)
+        logger.propagate = False
+
+    def start(self) -> None:
+        """Start the writer thread."""
+        if not self._started:
+            self.listener.start()
+            self._started = True
+
+    def stop(self) -> None:
+        """Flush pending records and stop the writer thread."""
+        if self._started:
+            self.listener.stop()
+            self._started = False
+
+    def get_stats(self) -> dict[str, Any]:
+        """Get queue depth and drop counter."""
+        return {
+            "level": logging.getLevelName(logger.level).lower(),
+            "queued": self.queue.qsize(),
+            "dropped": self.handler.dropped,
+        }
+
+
+def log_event(level: int, msg: str, **fields: Any) -> None:
+    """Log ``msg`` with structured ``fields`` (skipped early if the level is off)."""
+    if logger.isEnabledFor(level):
+        logger.log(level, msg, extra={"fields": fields})
+
+
+def elapsed_ms(start: float) -> float:
+    """Milliseconds since a ``time.perf_counter()`` reading."""
+    return round((time.perf_counter() - start) * 1000, 3)
+
+
+_rates, _default_rate = parse_sample_rates(config.log_sample_rates)
+
+# Global logging setup; the listener is started with the app
+json_logging = JsonLogging(
+    level=config.log_level,
+    sample_rates=_rates,
+    default_sample_rate=_default_rate,
+    queue_size=config.log_queue_size,
+)
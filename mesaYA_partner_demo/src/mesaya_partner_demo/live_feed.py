@@ -0,0 +1,152 @@
+"""Live push feed of store changes for the dashboard (Server-Sent Events)."""
+
+import asyncio
+from collections import deque
+from typing import Any
+
+from mesaya_partner_demo import json_codec
+from mesaya_partner_demo.config import config
+from mesaya_partner_demo.models import EventStore, SentEvent, WebhookEvent, event_store
+
+
+class Subscriber:
+    """
+    One connected client with a bounded buffer of pending messages.
+
+    When the client falls behind, the oldest pending message is dropped and
+    the client is told to resync (reload) instead of silently missing data.
+    """
+
+    __slots__ = ("messages", "dropped", "lagged", "_ready")
+
+    def __init__(self, buffer_size: int):
+        self.messages: deque[bytes] = deque(maxlen=buffer_size)
+        self.dropped = 0
+        self.lagged = False
+        self._ready = asyncio.Event()
+
+    def push(self, message: bytes) -> None:
+        if len(self.messages) == self.messages.maxlen:
+            self.dropped += 1
+            self.lagged = True
+        self.messages.append(message)
+        self._ready.set()
+
+    async def next_batch(self, timeout: float) -> list[bytes]:
+        """
+        Wait for pending messages and take them all.
+
+        Returns an empty list if nothing arrived within ``timeout`` seconds.
+        """
+        if not self.messages:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        batch = list(self.messages)
+        self.messages.clear()
+        if self.lagged:
+            self.lagged = False
+            batch.insert(0, format_sse("resync", {"dropped": self.dropped}))
+        return batch
+
+
+def format_sse(name: str, data: Any) -> bytes:
+    """Encode one Server-Sent Event (``data`` may be JSON bytes already)."""
+    if not isinstance(data, bytes):
+        data = json_codec.dumps(data)
+    return b"event: " + name.encode() + b"\ndata: " + data + b"\n\n"
+
+
+class LiveFeed:
+    """
+    Fans store changes out to every connected subscriber.
+
+    Records are pushed as they happen; stats are sent as deltas (only the
+    keys that changed), coalesced to at most one message per
+    ``stats_interval``. Nothing is computed while nobody is subscribed.
+    """
+
+    def __init__(
+        self,
+        store: EventStore,
+        buffer_size: int = 256,
+        stats_interval: float = 0.5,
+        heartbeat_interval: float = 15.0,
+    ):
+        self.store = store
+        self.buffer_size = buffer_size
+        self.stats_interval = stats_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.subscribers: set[Subscriber] = set()
+        self._last_stats: dict[str, Any] = {}
+        self._stats_pending = False
+        store.add_listener(self.on_store_change)
+
+    def subscribe(self) -> Subscriber:
+        """Register a new subscriber; it starts with a full stats snapshot."""
+        subscriber = Subscriber(self.buffer_size)
+        # Bring existing subscribers up to date before taking the snapshot
+        self._publish_stats()
+        self._last_stats = self.store.get_stats()
+        subscriber.push(format_sse("stats", self._last_stats))
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        self.subscribers.discard(subscriber)
+
+    def publish(self, name: str, data: Any) -> None:
+        """Send an event to every subscriber without blocking."""
+        message = format_sse(name, data)
+        for subscriber in self.subscribers:
+            subscriber.push(message)
+
+    def on_store_change(
+        self,
+        change: str,
+        event: WebhookEvent | SentEvent | None,
+    ) -> None:
+        """EventStore listener: push the changed record and schedule stats."""
+        if not self.subscribers:
+            return
+        if event is not None:
+            self.publish(change, event.to_json())
+        else:
+            self.publish(change, {})
+        if not self._stats_pending:
+            self._stats_pending = True
+            asyncio.get_running_loop().call_later(
+                self.stats_interval, self._publish_stats
+            )
+
+    def _publish_stats(self) -> None:
+        self._stats_pending = False
+        if not self.subscribers:
+            return
+        stats = self.store.get_stats()
+        delta = {
+            key: value
+            for key, value in stats.items()
+            if self._last_stats.get(key) != value
+        }
+        self._last_stats = stats
+        if delta:
+            self.publish("stats", delta)
+
+    def get_stats(self) -> dict[str, Any]:
+        """Get subscriber count and drop counters."""
+        return {
+            "subscribers": len(self.subscribers),
+            "dropped": sum(s.dropped for s in self.subscribers),
+        }
+
+
+# Global live feed
+live_feed = LiveFeed(
+    event_store,
+    buffer_size=config.live_feed_buffer_size,
+    stats_interval=config.live_feed_stats_interval,
+    heartbeat_interval=config.live_feed_heartbeat_interval,
+)
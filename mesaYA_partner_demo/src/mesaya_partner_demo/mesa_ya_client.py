@@ -1,225 +1,310 @@
-"""HTTP client for MesaYA services."""
-
-import json
-from datetime import datetime
-from typing import Any
-from uuid import uuid4
-
-import httpx
-
-from mesaya_partner_demo.config import config
-from mesaya_partner_demo.models import SentEvent, event_store
-from mesaya_partner_demo.webhook_service import WebhookService
-
-
-class MesaYAClient:
-    """Client for interacting with MesaYA services."""
-
-    def __init__(self):
-        self.timeout = 10.0
-
-    async def register_as_partner(
-        self,
-        mesa_ya_url: str | None = None,
-        events: list[str] | None = None,
-    ) -> dict[str, Any]:
-        """
-        Register this service as a B2B partner in MesaYA.
-
-        Args:
-            mesa_ya_url: URL of mesaYA_Res service
-            events: List of events to subscribe to
-
-        Returns:
-            Registration result with partner ID and secret
-        """
-        base_url = mesa_ya_url or config.mesa_ya_res_url
-        url = f"{base_url}/api/v1/partners/register"
-
-        registration_data = {
-            "name": f"partner-demo-{uuid4().hex[:8]}",
-            "webhookUrl": config.webhook_url,
-            "events": events or config.subscribed_events,
-            "description": "Demo B2B Partner for webhook interoperability testing",
-            "contactEmail": "demo@partner.local",
-        }
-
-        try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(url, json=registration_data)
-
-                if response.status_code == 201:
-                    data = response.json()
-                    # Update config with registration info
-                    config.partner_id = data.get("id")
-                    config.partner_secret = data.get("secret")
-                    config.is_registered = True
-                    config.registered_at = datetime.utcnow()
-                    config.mesa_ya_res_url = base_url
-
-                    return {
-                        "success": True,
-                        "partner_id": config.partner_id,
-                        "secret": config.partner_secret,
-                        "message": "Successfully registered as partner",
-                        "subscribed_events": data.get("subscribedEvents", []),
-                    }
-                elif response.status_code == 409:
-                    return {
-                        "success": False,
-                        "error": "Partner with similar name already exists",
-                        "status_code": 409,
-                    }
-                else:
-                    return {
-                        "success": False,
-                        "error": response.text,
-                        "status_code": response.status_code,
-                    }
-
-        except httpx.TimeoutException:
-            return {"success": False, "error": "Connection timeout"}
-        except httpx.RequestError as e:
-            return {"success": False, "error": f"Connection error: {e}"}
-
-    async def send_webhook_to_mesaya(
-        self,
-        event_type: str,
-        data: dict[str, Any],
-        target_url: str | None = None,
-    ) -> SentEvent:
-        """
-        Send a webhook event to MesaYA.
-
-        This demonstrates the bidirectional communication capability.
-
-        Args:
-            event_type: Type of event to send
-            data: Event payload data
-            target_url: Target webhook URL (defaults to mesaYA_Res webhook endpoint)
-
-        Returns:
-            SentEvent record
-        """
-        # Build URL with partner ID if registered
-        partner_id = config.partner_id or "unregistered"
-        url = (
-            target_url
-            or f"{config.mesa_ya_res_url}/api/v1/webhooks/partner/{partner_id}"
-        )
-        event_id = str(uuid4())
-        timestamp = datetime.utcnow()
-        timestamp_iso = timestamp.isoformat() + "Z"
-
-        # Build payload (format expected by mesaYA_Res)
-        payload = {
-            "event": event_type,
-            "timestamp": timestamp_iso,
-            "data": data,
-        }
-
-        payload_json = json.dumps(payload)
-
-        # Generate HMAC signature if we have a secret
-        # Format: signature = HMAC-SHA256(secret, timestamp + "." + body)
-        signature = None
-        if config.partner_secret:
-            import hmac
-            import hashlib
-
-            signature_data = f"{timestamp_iso}.{payload_json}"
-            signature = hmac.new(
-                config.partner_secret.encode(),
-                signature_data.encode(),
-                hashlib.sha256,
-            ).hexdigest()
-
-        headers = {
-            "Content-Type": "application/json",
-            "X-Webhook-Timestamp": timestamp_iso,
-        }
-        if signature:
-            headers["X-Webhook-Signature"] = signature
-
-        try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    url,
-                    content=payload_json,
-                    headers=headers,
-                )
-
-                success = response.status_code < 300
-                sent_event = SentEvent(
-                    id=event_id,
-                    event_type=event_type,
-                    timestamp=timestamp,
-                    payload=payload,
-                    target_url=url,
-                    success=success,
-                    response_code=response.status_code,
-                    error_message=None if success else response.text[:200],
-                )
-
-        except httpx.TimeoutException:
-            sent_event = SentEvent(
-                id=event_id,
-                event_type=event_type,
-                timestamp=timestamp,
-                payload=payload,
-                target_url=url,
-                success=False,
-                response_code=None,
-                error_message="Connection timeout",
-            )
-        except httpx.RequestError as e:
-            sent_event = SentEvent(
-                id=event_id,
-                event_type=event_type,
-                timestamp=timestamp,
-                payload=payload,
-                target_url=url,
-                success=False,
-                response_code=None,
-                error_message=f"Connection error: {e}",
-            )
-
-        # Store the sent event
-        event_store.add_sent(sent_event)
-
-        return sent_event
-
-    async def check_mesaya_health(self) -> dict[str, Any]:
-        """Check if MesaYA services are reachable."""
-        results = {}
-
-        # Check mesaYA_Res
-        try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                response = await client.get(f"{config.mesa_ya_res_url}/health")
-                results["mesaYA_Res"] = {
-                    "status": "online" if response.status_code == 200 else "error",
-                    "url": config.mesa_ya_res_url,
-                }
-        except Exception:
-            results["mesaYA_Res"] = {"status": "offline", "url": config.mesa_ya_res_url}
-
-        # Check mesaYA_payment_ms
-        try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                response = await client.get(f"{config.mesa_ya_payment_url}/health")
-                results["mesaYA_payment"] = {
-                    "status": "online" if response.status_code == 200 else "error",
-                    "url": config.mesa_ya_payment_url,
-                }
-        except Exception:
-            results["mesaYA_payment"] = {
-                "status": "offline",
-                "url": config.mesa_ya_payment_url,
-            }
-
-        return results
-
-
-# Singleton instance
-mesa_ya_client = MesaYAClient()
+"""HTTP client for MesaYA services."""
+
+from datetime import datetime
+from typing import Any
+from uuid import uuid4
+
+import httpx
+
+from mesaya_partner_demo.circuit_breaker import CircuitOpenError
+from mesaya_partner_demo.config import config
+from mesaya_partner_demo.http_pool import HTTPClientPool, http_pool
+from mesaya_partner_demo.models import DeliveryStatus, SentEvent, event_store
+from mesaya_partner_demo.partners import Partner, partner_registry
+from mesaya_partner_demo.shared_state import publish_config
+from mesaya_partner_demo.signing import hmac_key
+
+
+class MesaYAClient:
+    """Client for interacting with MesaYA services."""
+
+    def __init__(self, pool: HTTPClientPool = http_pool):
+        self.timeout = config.http_timeout
+        self.pool = pool
+
+    async def start(self) -> None:
+        """Open the pooled clients for the configured MesaYA services."""
+        self.pool.client_for(config.mesa_ya_res_url)
+        self.pool.client_for(config.mesa_ya_payment_url)
+
+    async def close(self) -> None:
+        """Close the pooled clients and their keep-alive connections."""
+        await self.pool.close()
+
+    async def register_as_partner(
+        self,
+        mesa_ya_url: str | None = None,
+        events: list[str] | None = None,
+    ) -> dict[str, Any]:
+        """
+        Register this service as a B2B partner in MesaYA.
+
+        Args:
+            mesa_ya_url: URL of mesaYA_Res service
+            events: List of events to subscribe to
+
+        Returns:
+            Registration result with partner ID and secret
+        """
+        base_url = mesa_ya_url or config.mesa_ya_res_url
+        url = f"{base_url}/api/v1/partners/register"
+
+        registration_data = {
+            "name": f"partner-demo-{uuid4().hex[:8]}",
+            "webhookUrl": config.webhook_url,
+            "events": events or config.subscribed_events,
+            "description": "Demo B2B Partner for webhook interoperability testing",
+            "contactEmail": "demo@partner.local",
+        }
+
+        try:
+            response = await self.pool.request(
+                "POST", url, json=registration_data, timeout=self.timeout
+            )
+
+            if response.status_code == 201:
+                data = response.json()
+                # Update config with registration info
+                config.partner_id = data.get("id")
+                config.partner_secret = data.get("secret")
+                config.is_registered = True
+                config.registered_at = datetime.utcnow()
+                config.mesa_ya_res_url = base_url
+                publish_config()
+
+                return {
+                    "success": True,
+                    "partner_id": config.partner_id,
+                    "secret": config.partner_secret,
+                    "message": "Successfully registered as partner",
+                    "subscribed_events": data.get("subscribedEvents", []),
+                }
+            elif response.status_code == 409:
+                return {
+                    "success": False,
+                    "error": "Partner with similar name already exists",
+                    "status_code": 409,
+                }
+            else:
+                return {
+                    "success": False,
+                    "error": response.text,
+                    "status_code": response.status_code,
+                }
+
+        except httpx.TimeoutException:
+            return {"success": False, "error": "Connection timeout"}
+        except httpx.RequestError as e:
+            return {"success": False, "error": f"Connection error: {e}"}
+
+    def build_event(
+        self,
+        event_type: str,
+        data: dict[str, Any],
+        target_url: str | None = None,
+        partner: Partner | None = None,
+    ) -> SentEvent:
+        """
+        Build a queued SentEvent for a webhook to MesaYA.
+
+        Args:
+            event_type: Type of event to send
+            data: Event payload data
+            target_url: Target webhook URL (defaults to mesaYA_Res webhook endpoint)
+            partner: Registered partner to send as (defaults to the configured one)
+
+        Returns:
+            SentEvent record in the QUEUED state
+        """
+        if partner is not None:
+            url = target_url or partner.webhook_target
+        else:
+            # Build URL with partner ID if registered
+            partner_id = config.partner_id or "unregistered"
+            url = (
+                target_url
+                or f"{config.mesa_ya_res_url}/api/v1/webhooks/partner/{partner_id}"
+            )
+        timestamp = datetime.utcnow()
+
+        # Build payload (format expected by mesaYA_Res)
+        payload = {
+            "event": event_type,
+            "timestamp": timestamp.isoformat() + "Z",
+            "data": data,
+        }
+
+        return SentEvent(
+            id=str(uuid4()),
+            event_type=event_type,
+            timestamp=timestamp,
+            payload=payload,
+            target_url=url,
+            success=False,
+            status=DeliveryStatus.QUEUED,
+            attempts=0,
+            partner_id=partner.partner_id if partner is not None else None,
+        )
+
+    def signed_headers(
+        self, partner_id: str | None, timestamp_iso: str, body: bytes
+    ) -> dict[str, str]:
+        """
+        Get the headers for a webhook body, signed if we have a secret.
+
+        The secret is the partner's current one, looked up now so a rotation
+        applies to queued retries. Format:
+        signature = HMAC-SHA256(secret, timestamp + "." + body)
+        """
+        secret = config.partner_secret
+        if partner_id is not None:
+            partner = partner_registry.get(partner_id)
+            secret = partner.secret if partner is not None else None
+
+        headers = {
+            "Content-Type": "application/json",
+            "X-Webhook-Timestamp": timestamp_iso,
+        }
+        if secret:
+            headers["X-Webhook-Signature"] = hmac_key(secret).hexdigest(
+                f"{timestamp_iso}.".encode(), body
+            )
+        return headers
+
+    async def deliver(self, event: SentEvent) -> tuple[int | None, str | None]:
+        """
+        Make one delivery attempt for a SentEvent.
+
+        The request runs on the target's adaptive timeout and fails fast
+        while its circuit breaker is open.
+
+        Returns:
+            Tuple of (response_code, error_message); the code is None when
+            no response was received
+        """
+        timestamp_iso = event.payload["timestamp"]
+        payload_json = event.raw_payload
+        headers = self.signed_headers(event.partner_id, timestamp_iso, payload_json)
+
+        event.attempts += 1
+        try:
+            response = await self.pool.request(
+                "POST",
+                event.target_url,
+                content=payload_json,
+                headers=headers,
+            )
+        except CircuitOpenError as e:
+            return None, str(e)
+        except httpx.TimeoutException:
+            return None, "Connection timeout"
+        except httpx.RequestError as e:
+            return None, f"Connection error: {e}"
+
+        if response.status_code < 300:
+            return response.status_code, None
+        return response.status_code, response.text[:200]
+
+    async def deliver_batch(
+        self, events: list[SentEvent]
+    ) -> list[tuple[int | None, str | None]] | None:
+        """
+        Make one delivery attempt for several SentEvents in a single request.
+
+        The events must share a target URL and partner. Their payloads are
+        sent as a JSON array to the target's batch endpoint (the target URL
+        plus ``config.delivery_batch_suffix``), signed once over the whole
+        body. A failed request fails every event; a 2xx response with
+        per-item ``results`` (as returned by ``/api/webhook/batch``) is
+        mapped back by index, so rejected items fail on their own (with a
+        2xx code, which the delivery queue does not retry).
+
+        Returns:
+            One (response_code, error_message) per event, in order, or None
+            if the target has no batch endpoint (404/405); the events then
+            still need their attempt, one request each
+        """
+        first = events[0]
+        body = b"[" + b",".join(event.raw_payload for event in events) + b"]"
+        timestamp_iso = datetime.utcnow().isoformat() + "Z"
+        headers = self.signed_headers(first.partner_id, timestamp_iso, body)
+
+        for event in events:
+            event.attempts += 1
+        try:
+            response = await self.pool.request(
+                "POST",
+                first.target_url + config.delivery_batch_suffix,
+                content=body,
+                headers=headers,
+            )
+        except CircuitOpenError as e:
+            return [(None, str(e))] * len(events)
+        except httpx.TimeoutException:
+            return [(None, "Connection timeout")] * len(events)
+        except httpx.RequestError as e:
+            return [(None, f"Connection error: {e}")] * len(events)
+
+        code = response.status_code
+        if code in (404, 405):
+            for event in events:
+                event.attempts -= 1
+            return None
+        if code >= 300:
+            return [(code, response.text[:200])] * len(events)
+
+        outcomes: list[tuple[int | None, str | None]] = [(code, None)] * len(events)
+        try:
+            results = response.json().get("results")
+        except (ValueError, AttributeError):
+            results = None
+        if not isinstance(results, list):
+            return outcomes
+        for position, item in enumerate(results):
+            if not isinstance(item, dict):
+                continue
+            index = item.get("index", position)
+            if not isinstance(index, int) or not 0 <= index < len(events):
+                continue
+            if item.get("status") == "rejected":
+                outcomes[index] = (code, str(item.get("error") or "Rejected")[:200])
+        return outcomes
+
+    async def send_webhook_to_mesaya(
+        self,
+        event_type: str,
+        data: dict[str, Any],
+        target_url: str | None = None,
+    ) -> SentEvent:
+        """
+        Send a webhook event to MesaYA inline, without queueing or retries.
+
+        This demonstrates the bidirectional communication capability.
+
+        Args:
+            event_type: Type of event to send
+            data: Event payload data
+            target_url: Target webhook URL (defaults to mesaYA_Res webhook endpoint)
+
+        Returns:
+            SentEvent record
+        """
+        sent_event = self.build_event(event_type, data, target_url)
+        response_code, error_message = await self.deliver(sent_event)
+
+        sent_event.success = error_message is None
+        sent_event.status = (
+            DeliveryStatus.DELIVERED if sent_event.success else DeliveryStatus.FAILED
+        )
+        sent_event.response_code = response_code
+        sent_event.error_message = error_message
+
+        # Store the sent event
+        async with event_store.writing():
+            event_store.add_sent(sent_event)
+
+        return sent_event
+
+
+# Singleton instance
+mesa_ya_client = MesaYAClient()
@@ -0,0 +1,280 @@
+"""Low-overhead counters and latency histograms, exposed in Prometheus text format."""
+
+import bisect
+import time
+from abc import ABC, abstractmethod
+from typing import Any
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Latency buckets in seconds: 100µs up to 10s
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class CounterChild:
+    """One labelled counter series."""
+
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class HistogramChild:
+    """
+    One labelled histogram series.
+
+    Counts are kept per bucket (not cumulative) in a preallocated list, so
+    observing a value is a bisect and three in-place additions.
+    """
+
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class _Metric(ABC):
+    """A named metric family with one child series per label combination."""
+
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self._children: dict[tuple[str, ...], Any] = {}
+
+    @abstractmethod
+    def _new_child(self) -> Any:
+        """Create the series for one label combination."""
+
+    def labels(self, *values: str) -> Any:
+        """
+        Get the series for the given label values, creating it on first use.
+
+        Hot paths should look series up once and keep the reference.
+        """
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self._children[values] = self._new_child()
+        return child
+
+    @abstractmethod
+    def _render_child(self, values: tuple[str, ...], child: Any) -> list[str]:
+        """Render one series as exposition-format lines."""
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        # Copy: series may be added while rendering (no lock is taken)
+        for values, child in list(self._children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> CounterChild:
+        return CounterChild()
+
+    def _render_child(self, values: tuple[str, ...], child: CounterChild) -> list[str]:
+        labels = _format_labels(self.labelnames, values)
+        return [f"{self.name}{labels} {child.value:g}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> HistogramChild:
+        return HistogramChild(self.buckets)
+
+    def _render_child(
+        self,
+        values: tuple[str, ...],
+        child: HistogramChild,
+    ) -> list[str]:
+        names = self.labelnames + ("le",)
+        counts = list(child.counts)
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else f"{bound:g}"
+            labels = _format_labels(names, values + (le,))
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, values)
+        lines.append(f"{self.name}_sum{labels} {child.sum:.9g}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Holds every metric family and renders them for scraping.
+
+    Recording takes no locks: the app runs on one event loop, and the
+    exposition copies each family's series before reading it.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> Any:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Global registry and the metrics recorded by the service
+metrics = MetricsRegistry()
+
+http_request_seconds = metrics.histogram(
+    "partner_http_request_duration_seconds",
+    "Time to first response byte per endpoint.",
+    ("method", "route"),
+)
+http_requests_total = metrics.counter(
+    "partner_http_requests_total",
+    "HTTP requests handled, by endpoint and status code.",
+    ("method", "route", "status"),
+)
+webhook_stage_seconds = metrics.histogram(
+    "partner_webhook_stage_duration_seconds",
+    "Time spent in each stage of processing an incoming webhook.",
+    ("stage",),
+)
+webhooks_received_total = metrics.counter(
+    "partner_webhooks_received_total",
+    "Incoming webhooks, by resulting event status.",
+    ("status",),
+)
+outbound_request_seconds = metrics.histogram(
+    "partner_outbound_request_duration_seconds",
+    "Outbound HTTP call latency, by target origin and status code.",
+    ("target", "status"),
+)
+
+# Series looked up once for the webhook hot path
+VERIFY_STAGE = webhook_stage_seconds.labels("verify_signature")
+DECODE_STAGE = webhook_stage_seconds.labels("decode")
+STORE_STAGE = webhook_stage_seconds.labels("store")
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording per-route latency and status counts.
+
+    Latency is measured to the response start, so long-lived streams (the
+    live feed, NDJSON exports) count their time to first byte only. Routes
+    are labelled with their path template, never the raw path.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        # Series bound per route and method, with a counter per status under
+        # each, so recording a request allocates no label tuples
+        self._series: dict[
+            str, dict[str, tuple[HistogramChild, dict[int, CounterChild]]]
+        ] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        started = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+                self._record(scope, message["status"], time.perf_counter() - start)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            if not started:
+                self._record(scope, 500, time.perf_counter() - start)
+            raise
+
+    def _record(self, scope: Scope, status: int, elapsed: float) -> None:
+        route = getattr(scope.get("route"), "path", "unmatched")
+        method = scope["method"]
+        by_method = self._series.get(route)
+        if by_method is None:
+            by_method = self._series[route] = {}
+        series = by_method.get(method)
+        if series is None:
+            series = by_method[method] = (http_request_seconds.labels(method, route), {})
+        latency, by_status = series
+        latency.observe(elapsed)
+        counter = by_status.get(status)
+        if counter is None:
+            counter = by_status[status] = http_requests_total.labels(
+                method, route, str(status)
+            )
+        counter.inc()
@@ -1,135 +1,813 @@
-"""Data models for Partner Demo service."""
-
-from dataclasses import dataclass, field
-from datetime import datetime
-from enum import Enum
-from typing import Any
-
-
-class EventStatus(str, Enum):
-    """Status of a received webhook event."""
-
-    RECEIVED = "received"
-    VERIFIED = "verified"
-    INVALID_SIGNATURE = "invalid_signature"
-    PROCESSED = "processed"
-    ERROR = "error"
-
-
-@dataclass
-class WebhookEvent:
-    """Represents a received webhook event."""
-
-    id: str
-    event_type: str
-    timestamp: datetime
-    payload: dict[str, Any]
-    status: EventStatus
-    signature: str | None = None
-    partner_id: str | None = None
-    error_message: str | None = None
-
-    def to_dict(self) -> dict[str, Any]:
-        """Convert to dictionary for JSON serialization."""
-        return {
-            "id": self.id,
-            "event_type": self.event_type,
-            "timestamp": self.timestamp.isoformat(),
-            "payload": self.payload,
-            "status": self.status.value,
-            "signature": self.signature,
-            "partner_id": self.partner_id,
-            "error_message": self.error_message,
-        }
-
-
-@dataclass
-class SentEvent:
-    """Represents an event sent to MesaYA."""
-
-    id: str
-    event_type: str
-    timestamp: datetime
-    payload: dict[str, Any]
-    target_url: str
-    success: bool
-    response_code: int | None = None
-    error_message: str | None = None
-
-    def to_dict(self) -> dict[str, Any]:
-        """Convert to dictionary for JSON serialization."""
-        return {
-            "id": self.id,
-            "event_type": self.event_type,
-            "timestamp": self.timestamp.isoformat(),
-            "payload": self.payload,
-            "target_url": self.target_url,
-            "success": self.success,
-            "response_code": self.response_code,
-            "error_message": self.error_message,
-        }
-
-
-@dataclass
-class EventStore:
-    """In-memory store for events (no database)."""
-
-    received_events: list[WebhookEvent] = field(default_factory=list)
-    sent_events: list[SentEvent] = field(default_factory=list)
-    max_events: int = 100  # Keep last 100 events
-
-    def add_received(self, event: WebhookEvent) -> None:
-        """Add a received event to the store."""
-        self.received_events.insert(0, event)
-        # Trim to max
-        if len(self.received_events) > self.max_events:
-            self.received_events = self.received_events[: self.max_events]
-
-    def add_sent(self, event: SentEvent) -> None:
-        """Add a sent event to the store."""
-        self.sent_events.insert(0, event)
-        # Trim to max
-        if len(self.sent_events) > self.max_events:
-            self.sent_events = self.sent_events[: self.max_events]
-
-    def get_all_received(self) -> list[dict[str, Any]]:
-        """Get all received events as dictionaries."""
-        return [e.to_dict() for e in self.received_events]
-
-    def get_all_sent(self) -> list[dict[str, Any]]:
-        """Get all sent events as dictionaries."""
-        return [e.to_dict() for e in self.sent_events]
-
-    def clear(self) -> None:
-        """Clear all events."""
-        self.received_events.clear()
-        self.sent_events.clear()
-
-    def get_stats(self) -> dict[str, Any]:
-        """Get event statistics."""
-        received_by_type: dict[str, int] = {}
-        for event in self.received_events:
-            received_by_type[event.event_type] = (
-                received_by_type.get(event.event_type, 0) + 1
-            )
-
-        verified = sum(
-            1 for e in self.received_events if e.status == EventStatus.VERIFIED
-        )
-        invalid = sum(
-            1 for e in self.received_events if e.status == EventStatus.INVALID_SIGNATURE
-        )
-
-        return {
-            "total_received": len(self.received_events),
-            "total_sent": len(self.sent_events),
-            "received_verified": verified,
-            "received_invalid": invalid,
-            "sent_success": sum(1 for e in self.sent_events if e.success),
-            "sent_failed": sum(1 for e in self.sent_events if not e.success),
-            "events_by_type": received_by_type,
-        }
-
-
-# Global event store
-event_store = EventStore()
+"""Data models for Partner Demo service."""
+
+import asyncio
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from contextlib import AbstractAsyncContextManager, AbstractContextManager, nullcontext
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any
+
+from mesaya_partner_demo import json_codec
+from mesaya_partner_demo.config import config
+from mesaya_partner_demo.event_index import Facet, FacetIndex
+from mesaya_partner_demo.event_log import EventBackend
+from mesaya_partner_demo.ring_buffer import RingBuffer
+
+
+class EventStatus(str, Enum):
+    """Status of a received webhook event."""
+
+    RECEIVED = "received"
+    VERIFIED = "verified"
+    INVALID_SIGNATURE = "invalid_signature"
+    PROCESSED = "processed"
+    ERROR = "error"
+
+
+class DeliveryStatus(str, Enum):
+    """Delivery status of an event sent to MesaYA."""
+
+    QUEUED = "queued"
+    RETRYING = "retrying"
+    DELIVERED = "delivered"
+    FAILED = "failed"
+
+
+class _Field:
+    """
+    Record attribute stored in a private slot.
+
+    Assigning it drops the record's cached JSON, so the cache can never
+    go stale.
+    """
+
+    __slots__ = ("slot",)
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.slot = "_" + name
+
+    def __get__(self, obj: Any, owner: type | None = None) -> Any:
+        if obj is None:
+            return self
+        return getattr(obj, self.slot)
+
+    def __set__(self, obj: "_Record", value: Any) -> None:
+        setattr(obj, self.slot, value)
+        obj._invalidate()
+
+
+class _Record(ABC):
+    """
+    Compact event record: slotted, with the payload kept as JSON bytes.
+
+    The payload dict is decoded only when ``payload`` is read (and not
+    kept, so treat it as a read-only snapshot). ``to_json`` serializes the
+    whole record once and caches it; the payload bytes are spliced in
+    as-is, and the cache then holds them too, so a record keeps a single
+    copy either way.
+    """
+
+    __slots__ = ("_raw", "_json", "_payload_at", "_seq")
+
+    # Attributes copied by ``copy_from``
+    FIELDS: tuple[str, ...] = ()
+
+    # Position in the EventStore, assigned on insert
+    seq = _Field()
+
+    def _init_payload(self, payload: dict[str, Any] | None, raw: bytes | None) -> None:
+        self._json: bytes | None = None
+        self._payload_at = 0
+        self._raw: bytes | None = raw if raw is not None else json_codec.dumps(payload)
+        self._seq = -1
+
+    def _invalidate(self) -> None:
+        if self._json is not None:
+            self._raw = self._json[self._payload_at : -1]
+            self._json = None
+
+    @property
+    def raw_payload(self) -> bytes:
+        """The payload as JSON bytes."""
+        if self._json is None:
+            return self._raw
+        return self._json[self._payload_at : -1]
+
+    @property
+    def payload(self) -> dict[str, Any]:
+        """The payload, decoded on every access."""
+        if self._json is None:
+            return json_codec.loads(self._raw)
+        return json_codec.loads(memoryview(self._json)[self._payload_at : -1])
+
+    @abstractmethod
+    def _head(self) -> dict[str, Any]:
+        """Get every field except the payload, as JSON-ready values."""
+
+    def to_json(self) -> bytes:
+        """Get the record (with its ``seq``) as JSON bytes, encoded once."""
+        if self._json is None:
+            head = json_codec.dumps({"seq": self._seq, **self._head()})
+            prefix = head[:-1] + b',"payload":'
+            self._json = prefix + self._raw + b"}"
+            self._payload_at = len(prefix)
+            self._raw = None
+        return self._json
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to dictionary for JSON serialization."""
+        return {**self._head(), "payload": self.payload}
+
+    def copy_from(self, other: "_Record") -> None:
+        """Take every field except ``seq`` from another record of the same kind."""
+        for name in self.FIELDS:
+            setattr(self, name, getattr(other, name))
+        self._raw = other.raw_payload
+        self._json = None
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}(id={self.id!r}, event_type={self.event_type!r}, "
+            f"status={self.status.value!r}, seq={self._seq})"
+        )
+
+
+class WebhookEvent(_Record):
+    """Represents a received webhook event."""
+
+    __slots__ = (
+        "id",
+        "event_type",
+        "timestamp",
+        "signature",
+        "partner_id",
+        "_status",
+        "_error_message",
+    )
+
+    FIELDS = ("id", "event_type", "timestamp", "status", "signature", "partner_id", "error_message")
+
+    status = _Field()
+    error_message = _Field()
+
+    def __init__(
+        self,
+        id: str,
+        event_type: str,
+        timestamp: datetime,
+        payload: dict[str, Any] | None,
+        status: EventStatus,
+        signature: str | None = None,
+        partner_id: str | None = None,
+        error_message: str | None = None,
+        raw_payload: bytes | None = None,
+    ):
+        self._init_payload(payload, raw_payload)
+        self.id = id
+        self.event_type = event_type
+        self.timestamp = timestamp
+        self._status = status
+        self.signature = signature
+        self.partner_id = partner_id
+        self._error_message = error_message
+
+    def facets(self) -> tuple[Facet, ...]:
+        """Get the (facet, value) pairs this event is indexed under."""
+        if self.partner_id is None:
+            return (("event_type", self.event_type), ("status", self._status.value))
+        return (
+            ("event_type", self.event_type),
+            ("status", self._status.value),
+            ("partner_id", self.partner_id),
+        )
+
+    def _head(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "event_type": self.event_type,
+            "timestamp": self.timestamp.isoformat(),
+            "status": self._status.value,
+            "signature": self.signature,
+            "partner_id": self.partner_id,
+            "error_message": self._error_message,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "WebhookEvent":
+        """Rebuild an event from its ``to_dict`` form."""
+        return cls(
+            id=data["id"],
+            event_type=data["event_type"],
+            timestamp=datetime.fromisoformat(data["timestamp"]),
+            payload=data["payload"],
+            status=EventStatus(data["status"]),
+            signature=data.get("signature"),
+            partner_id=data.get("partner_id"),
+            error_message=data.get("error_message"),
+        )
+
+
+class SentEvent(_Record):
+    """Represents an event sent to MesaYA."""
+
+    __slots__ = (
+        "id",
+        "event_type",
+        "timestamp",
+        "target_url",
+        "partner_id",
+        "_success",
+        "_response_code",
+        "_error_message",
+        "_status",
+        "_attempts",
+    )
+
+    FIELDS = (
+        "id",
+        "event_type",
+        "timestamp",
+        "target_url",
+        "success",
+        "response_code",
+        "error_message",
+        "status",
+        "attempts",
+        "partner_id",
+    )
+
+    success = _Field()
+    response_code = _Field()
+    error_message = _Field()
+    status = _Field()
+    attempts = _Field()
+
+    def __init__(
+        self,
+        id: str,
+        event_type: str,
+        timestamp: datetime,
+        payload: dict[str, Any] | None,
+        target_url: str,
+        success: bool,
+        response_code: int | None = None,
+        error_message: str | None = None,
+        status: DeliveryStatus | None = None,
+        attempts: int = 1,
+        # Registered partner identity the event is sent as (None: configured one)
+        partner_id: str | None = None,
+        raw_payload: bytes | None = None,
+    ):
+        self._init_payload(payload, raw_payload)
+        self.id = id
+        self.event_type = event_type
+        self.timestamp = timestamp
+        self.target_url = target_url
+        self._success = success
+        self._response_code = response_code
+        self._error_message = error_message
+        if status is None:
+            status = DeliveryStatus.DELIVERED if success else DeliveryStatus.FAILED
+        self._status = status
+        self._attempts = attempts
+        self.partner_id = partner_id
+
+    @property
+    def is_pending(self) -> bool:
+        """Whether the event is still waiting for (another) delivery attempt."""
+        return self._status in (DeliveryStatus.QUEUED, DeliveryStatus.RETRYING)
+
+    def facets(self) -> tuple[Facet, ...]:
+        """Get the (facet, value) pairs this event is indexed under."""
+        return (("event_type", self.event_type), ("status", self._status.value))
+
+    def _head(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "event_type": self.event_type,
+            "timestamp": self.timestamp.isoformat(),
+            "target_url": self.target_url,
+            "success": self._success,
+            "response_code": self._response_code,
+            "error_message": self._error_message,
+            "status": self._status.value,
+            "attempts": self._attempts,
+            "partner_id": self.partner_id,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "SentEvent":
+        """Rebuild an event from its ``to_dict`` form."""
+        return cls(
+            id=data["id"],
+            event_type=data["event_type"],
+            timestamp=datetime.fromisoformat(data["timestamp"]),
+            payload=data["payload"],
+            target_url=data["target_url"],
+            success=data["success"],
+            response_code=data.get("response_code"),
+            error_message=data.get("error_message"),
+            status=DeliveryStatus(data["status"]) if "status" in data else None,
+            attempts=data.get("attempts", 1),
+            partner_id=data.get("partner_id"),
+        )
+
+
+# Called with (change, event) after every EventStore mutation
+StoreListener = Callable[[str, "WebhookEvent | SentEvent | None"], None]
+
+# Indexed for every received event whose signature was verified on arrival
+ARRIVED_VERIFIED: Facet = ("signature", "verified")
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Treat naive datetimes (``utcnow()``) as UTC so they compare with aware ones."""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+@dataclass
+class EventStore:
+    """
+    In-memory store for events (no database).
+
+    Events live in fixed-capacity ring buffers and every event gets a
+    sequence number, used as the pagination cursor. Secondary indexes by
+    event type, status and partner are maintained on insert, status change
+    and eviction; the statistics are read off their sizes, so adding an
+    event, filtering and reading stats never scan the whole store.
+
+    An optional persistence backend receives every event as well; older
+    events that fell out of the in-memory window are paged in from it.
+
+    Listeners registered with ``add_listener`` are called synchronously
+    after every change with ``(change, event)``, where ``change`` is one of
+    "received", "sent", "received_update", "sent_update" or "cleared"
+    (event None).
+    ``version`` goes up on every change, so anything derived from the store
+    can be cached until it moves. Serialized forms are kept that way: every
+    record caches its own JSON (dropped only when that record changes),
+    and ``stats_json`` is encoded once per version, so serving a page is
+    mostly joining bytes that already exist.
+    """
+
+    max_events: int = 100  # Keep last N events per direction
+    backend: EventBackend | None = None
+    received_events: RingBuffer[WebhookEvent] = field(init=False)
+    sent_events: RingBuffer[SentEvent] = field(init=False)
+
+    # Candidates scanned per step while filtering through an index
+    QUERY_CHUNK = 256
+
+    def __post_init__(self) -> None:
+        self.received_events = RingBuffer(self.max_events)
+        self.sent_events = RingBuffer(self.max_events)
+        self._received_index = FacetIndex()
+        self._sent_index = FacetIndex()
+        self._listeners: list[StoreListener] = []
+        self.version = 0
+        self._stats_json = b""
+        self._stats_json_version = -1
+
+    def add_listener(self, listener: StoreListener) -> None:
+        """Call ``listener(change, event)`` after every change to the store."""
+        self._listeners.append(listener)
+
+    def _notify(self, change: str, event: WebhookEvent | SentEvent | None) -> None:
+        self.version += 1
+        for listener in self._listeners:
+            listener(change, event)
+
+    def _buffers(self, kind: str) -> tuple[RingBuffer, FacetIndex]:
+        if kind == "received":
+            return self.received_events, self._received_index
+        if kind == "sent":
+            return self.sent_events, self._sent_index
+        raise ValueError(f"Unknown event kind: {kind}")
+
+    def _insert(
+        self,
+        buffer: RingBuffer,
+        index: FacetIndex,
+        event: WebhookEvent | SentEvent,
+    ) -> int:
+        facets = event.facets()
+        # Fail before anything changes if a facet value cannot be indexed
+        hash(facets)
+        seq = buffer.next_seq
+        event.seq = seq
+        index.add(seq, facets)
+        evicted = buffer.append(event)
+        if evicted is not None:
+            index.evict(evicted.seq, evicted.facets())
+        if index is self._received_index:
+            # Kept apart from the status facet, which processing changes
+            if self._arrived_verified(event):
+                index.add(seq, (ARRIVED_VERIFIED,))
+            if evicted is not None:
+                index.evict(evicted.seq, (ARRIVED_VERIFIED,))
+        return seq
+
+    @staticmethod
+    def _arrived_verified(event: WebhookEvent) -> bool:
+        """
+        Whether a received event passed its signature check.
+
+        Events only reach the store from another process or the backend
+        after processing may have moved them on from VERIFIED; for those a
+        signature is taken as having been verified.
+        """
+        if event.status == EventStatus.VERIFIED:
+            return True
+        return (
+            event.status in (EventStatus.PROCESSED, EventStatus.ERROR)
+            and event.signature is not None
+        )
+
+    def attach_backend(self, backend: EventBackend, replay: int) -> None:
+        """
+        Persist events to ``backend`` and load its most recent events.
+
+        Args:
+            backend: The persistence backend
+            replay: How many of the most recent events per direction to load
+        """
+        self.backend = backend
+        self._received_index.clear()
+        self._sent_index.clear()
+        limit = min(replay, self.max_events)
+
+        received = backend.replay("received", limit)
+        self.received_events = RingBuffer(
+            self.max_events,
+            start_seq=backend.next_seq("received") - len(received),
+        )
+        for _, record in received:
+            self._insert(
+                self.received_events,
+                self._received_index,
+                WebhookEvent.from_dict(record),
+            )
+
+        sent = backend.replay("sent", limit)
+        self.sent_events = RingBuffer(
+            self.max_events,
+            start_seq=backend.next_seq("sent") - len(sent),
+        )
+        for _, record in sent:
+            self._insert(self.sent_events, self._sent_index, SentEvent.from_dict(record))
+
+    def _write(self) -> AbstractContextManager[None]:
+        """Wrap a write in the backend's transaction, if there is a backend."""
+        if self.backend is None:
+            return nullcontext()
+        return self.backend.transaction()
+
+    def writing(self) -> AbstractAsyncContextManager[None]:
+        """
+        Take the backend's write lock without blocking the event loop.
+
+        Store writes made inside the block join the held transaction, so
+        they never wait for other processes on the event loop.
+        """
+        if self.backend is None:
+            return nullcontext()
+        return self.backend.reserve()
+
+    def _add(self, kind: str, events: list[WebhookEvent] | list[SentEvent]) -> None:
+        """
+        Store new events.
+
+        Their seqs are allocated and persisted inside the backend
+        transaction; the events only enter the ring once it succeeded, so
+        a failed write never hands out a seq another process may reuse.
+        """
+        for event in events:
+            # Fail before anything changes if a facet value cannot be indexed
+            hash(event.facets())
+        with self._write():
+            buffer, index = self._buffers(kind)
+            if self.backend is not None:
+                for offset, event in enumerate(events):
+                    self.backend.append(kind, buffer.next_seq + offset, event.to_dict())
+        for event in events:
+            self._insert(buffer, index, event)
+
+    def add_received(self, event: WebhookEvent) -> None:
+        """Add a received event to the store."""
+        self._add("received", [event])
+        self._notify("received", event)
+
+    def add_received_many(self, events: list[WebhookEvent]) -> None:
+        """Add a batch of received events in one backend transaction."""
+        self._add("received", events)
+        for event in events:
+            self._notify("received", event)
+
+    def add_sent(self, event: SentEvent) -> None:
+        """Add a sent event to the store."""
+        self._add("sent", [event])
+        self._notify("sent", event)
+
+    def apply_change(self, kind: str, seq: int, record: dict[str, Any]) -> None:
+        """
+        Apply an event written by another process sharing the backend.
+
+        A seq past the newest retained one is a new event; an older one is
+        an update (e.g. a delivery status change) to an event already here.
+        Nothing is written back to the backend.
+        """
+        buffer, index = self._buffers(kind)
+        model = WebhookEvent if kind == "received" else SentEvent
+        if seq >= buffer.next_seq:
+            event = model.from_dict(record)
+            self._insert(buffer, index, event)
+            self._notify(kind, event)
+            return
+
+        event = buffer.get(seq)
+        if event is None:
+            return
+        index.discard(seq, event.facets())
+        event.copy_from(model.from_dict(record))
+        index.add(seq, event.facets())
+        self._notify(f"{kind}_update", event)
+
+    def apply_cleared(self, kind: str, next_seq: int) -> None:
+        """
+        Drop every event of ``kind`` after another process cleared them.
+
+        The next seq handed out continues from the other process's.
+        """
+        buffer, index = self._buffers(kind)
+        buffer = RingBuffer(self.max_events, start_seq=max(next_seq, buffer.next_seq))
+        index.clear()
+        if kind == "received":
+            self.received_events = buffer
+        else:
+            self.sent_events = buffer
+        self._notify("cleared", None)
+
+    def get_all_received(self, limit: int | None = None) -> list[dict[str, Any]]:
+        """Get received events as dictionaries, newest first."""
+        return [e.to_dict() for e in self.received_events.latest(limit)]
+
+    def get_all_sent(self, limit: int | None = None) -> list[dict[str, Any]]:
+        """Get sent events as dictionaries, newest first."""
+        return [e.to_dict() for e in self.sent_events.latest(limit)]
+
+    def update_received(
+        self,
+        event: WebhookEvent,
+        status: EventStatus,
+        error_message: str | None = None,
+    ) -> None:
+        """Record the outcome of processing a stored received event."""
+        retained = self.received_events.get(event.seq) is event
+        with self._write():
+            if retained:
+                self._received_index.discard(event.seq, (("status", event.status.value),))
+
+            event.status = status
+            event.error_message = error_message
+
+            if retained:
+                self._received_index.add(event.seq, (("status", event.status.value),))
+            if event.seq >= 0 and self.backend is not None:
+                self.backend.append("received", event.seq, event.to_dict())
+        self._notify("received_update", event)
+
+    def update_sent(
+        self,
+        event: SentEvent,
+        status: DeliveryStatus,
+        response_code: int | None = None,
+        error_message: str | None = None,
+    ) -> None:
+        """Record the outcome of a delivery attempt for a stored sent event."""
+        retained = self.sent_events.get(event.seq) is event
+        with self._write():
+            if retained:
+                self._sent_index.discard(event.seq, (("status", event.status.value),))
+
+            event.status = status
+            event.success = status == DeliveryStatus.DELIVERED
+            event.response_code = response_code
+            event.error_message = error_message
+
+            if retained:
+                self._sent_index.add(event.seq, (("status", event.status.value),))
+            if event.seq >= 0 and self.backend is not None:
+                self.backend.append("sent", event.seq, event.to_dict())
+        self._notify("sent_update", event)
+
+    def pending_sent(self) -> list[SentEvent]:
+        """Get retained sent events that still await delivery, oldest first."""
+        seqs: list[int] = []
+        for status in (DeliveryStatus.QUEUED, DeliveryStatus.RETRYING):
+            index = self._sent_index.get(("status", status.value))
+            if index is not None:
+                seqs.extend(index.before(None, len(index)))
+        return [self.sent_events.get(seq) for seq in sorted(seqs)]
+
+    def query(
+        self,
+        kind: str,
+        cursor: int | None = None,
+        limit: int = 50,
+        **filters: Any,
+    ) -> tuple[list[WebhookEvent | SentEvent], int | None]:
+        """
+        Get one page of events, newest first.
+
+        Facet filters (``event_type``, ``status``, ``partner_id``) walk the
+        most selective secondary index; ``since``/``until`` are checked per
+        candidate. Unfiltered pages continue past the in-memory window into
+        the persistence backend, if any.
+
+        Args:
+            kind: "received" or "sent"
+            cursor: Return events with a seq strictly below this one
+            **filters: event_type, status, partner_id, since, until
+
+        Returns:
+            Tuple of (events, cursor for the next page or None when exhausted)
+        """
+        events, tail = self._query_memory(kind, cursor, limit, **filters)
+        if tail is not None:
+            events.extend(self._read_backend(kind, *tail))
+        return self._page(events, limit)
+
+    async def aquery(
+        self,
+        kind: str,
+        cursor: int | None = None,
+        limit: int = 50,
+        **filters: Any,
+    ) -> tuple[list[WebhookEvent | SentEvent], int | None]:
+        """
+        Same as ``query``, for the event loop.
+
+        The in-memory window is read in place; the part of the page coming
+        from the persistence backend is read in a worker thread, so disk
+        reads never block other requests.
+        """
+        events, tail = self._query_memory(kind, cursor, limit, **filters)
+        if tail is not None:
+            events.extend(await asyncio.to_thread(self._read_backend, kind, *tail))
+        return self._page(events, limit)
+
+    def _query_memory(
+        self,
+        kind: str,
+        cursor: int | None,
+        limit: int,
+        event_type: str | None = None,
+        status: str | None = None,
+        partner_id: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> tuple[list[WebhookEvent | SentEvent], tuple[int, int] | None]:
+        """
+        Collect the in-memory part of a page (one event more than ``limit``).
+
+        Returns:
+            Tuple of (events, (seq to continue below, count) to read from
+            the backend, or None when the page is complete)
+        """
+        buffer, index = self._buffers(kind)
+        facets = [
+            (name, value)
+            for name, value in (
+                ("event_type", event_type),
+                ("status", status),
+                ("partner_id", partner_id),
+            )
+            if value is not None
+        ]
+        since = _as_utc(since) if since is not None else None
+        until = _as_utc(until) if until is not None else None
+
+        def matches(event: WebhookEvent | SentEvent) -> bool:
+            if facets:
+                event_facets = event.facets()
+                if not all(facet in event_facets for facet in facets):
+                    return False
+            if since is not None or until is not None:
+                timestamp = _as_utc(event.timestamp)
+                if since is not None and timestamp < since:
+                    return False
+                if until is not None and timestamp > until:
+                    return False
+            return True
+
+        # Collect one extra event to know whether there is a next page
+        wanted = limit + 1
+        events: list[WebhookEvent | SentEvent] = []
+        if facets:
+            candidates = index.smallest(facets)
+            position = cursor
+            while len(events) < wanted:
+                seqs = candidates.before(position, self.QUERY_CHUNK)
+                if not seqs:
+                    break
+                for seq in seqs:
+                    event = buffer.get(seq)
+                    if event is not None and matches(event):
+                        events.append(event)
+                        if len(events) == wanted:
+                            break
+                position = seqs[-1]
+        else:
+            for _, event in buffer.iter_before(cursor):
+                if matches(event):
+                    events.append(event)
+                    if len(events) == wanted:
+                        break
+
+            if (
+                len(events) < wanted
+                and self.backend is not None
+                and since is None
+                and until is None
+            ):
+                start = buffer.first_seq if cursor is None else min(cursor, buffer.first_seq)
+                return events, (start, wanted - len(events))
+        return events, None
+
+    def _read_backend(
+        self, kind: str, before_seq: int, count: int
+    ) -> list[WebhookEvent | SentEvent]:
+        """Load up to ``count`` events below ``before_seq`` from the backend."""
+        model = WebhookEvent if kind == "received" else SentEvent
+        events: list[WebhookEvent | SentEvent] = []
+        for seq, record in self.backend.read_before(kind, before_seq, count):
+            event = model.from_dict(record)
+            event.seq = seq
+            events.append(event)
+        return events
+
+    @staticmethod
+    def _page(
+        events: list[WebhookEvent | SentEvent], limit: int
+    ) -> tuple[list[WebhookEvent | SentEvent], int | None]:
+        if len(events) > limit:
+            return events[:limit], events[limit - 1].seq
+        return events, None
+
+    def clear(self) -> None:
+        """Clear all events."""
+        with self._write():
+            if self.backend is not None:
+                self.backend.mark_cleared("received", self.received_events.next_seq)
+                self.backend.mark_cleared("sent", self.sent_events.next_seq)
+            self.received_events.clear()
+            self.sent_events.clear()
+            self._received_index.clear()
+            self._sent_index.clear()
+        self._notify("cleared", None)
+
+    def _count(self, index: FacetIndex, facet: Facet) -> int:
+        seqs = index.get(facet)
+        return len(seqs) if seqs is not None else 0
+
+    def stats_json(self) -> bytes:
+        """Get ``get_stats()`` as JSON bytes, encoded once per store version."""
+        if self._stats_json_version != self.version:
+            self._stats_json = json_codec.dumps(self.get_stats())
+            self._stats_json_version = self.version
+        return self._stats_json
+
+    def get_stats(self) -> dict[str, Any]:
+        """Get event statistics."""
+        received, sent = self._received_index, self._sent_index
+        return {
+            "total_received": len(self.received_events),
+            "total_sent": len(self.sent_events),
+            # Not a status count: processing must not make it count down
+            "received_verified": self._count(received, ARRIVED_VERIFIED),
+            "received_invalid": self._count(
+                received, ("status", EventStatus.INVALID_SIGNATURE.value)
+            ),
+            "received_processed": self._count(
+                received, ("status", EventStatus.PROCESSED.value)
+            ),
+            "received_errors": self._count(received, ("status", EventStatus.ERROR.value)),
+            "sent_success": self._count(sent, ("status", DeliveryStatus.DELIVERED.value)),
+            "sent_failed": self._count(sent, ("status", DeliveryStatus.FAILED.value)),
+            "sent_pending": (
+                self._count(sent, ("status", DeliveryStatus.QUEUED.value))
+                + self._count(sent, ("status", DeliveryStatus.RETRYING.value))
+            ),
+            # JSON object keys must be strings, whatever the type was stored as
+            "events_by_type": {
+                str(value): self._count(received, (name, value))
+                for name, value in received
+                if name == "event_type"
+            },
+        }
+
+
+# Global event store
+event_store = EventStore(max_events=config.max_events)
@@ -0,0 +1,124 @@
+"""Registry of the partner identities this service receives webhooks for."""
+
+import threading
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from typing import Any
+
+
+@dataclass(frozen=True)
+class Partner:
+    """One partner identity registered against a MesaYA environment."""
+
+    partner_id: str
+    secret: str | None
+    mesa_ya_res_url: str
+    subscribed_events: tuple[str, ...] = ()
+    previous_secret: str | None = None  # Still accepted after rotation
+    registered_at: datetime = field(default_factory=datetime.utcnow)
+
+    @property
+    def webhook_target(self) -> str:
+        """Get the MesaYA URL that accepts webhooks from this partner."""
+        return f"{self.mesa_ya_res_url}/api/v1/webhooks/partner/{self.partner_id}"
+
+    def to_dict(self, include_secrets: bool = False) -> dict[str, Any]:
+        """Convert to dictionary for JSON serialization."""
+        data: dict[str, Any] = {
+            "partner_id": self.partner_id,
+            "mesa_ya_res_url": self.mesa_ya_res_url,
+            "subscribed_events": list(self.subscribed_events),
+            "registered_at": self.registered_at.isoformat(),
+            "secret_set": self.secret is not None,
+            "previous_secret_set": self.previous_secret is not None,
+        }
+        if include_secrets:
+            data["secret"] = self.secret
+            data["previous_secret"] = self.previous_secret
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Partner":
+        """Rebuild a partner from its ``to_dict(include_secrets=True)`` form."""
+        return cls(
+            partner_id=data["partner_id"],
+            secret=data.get("secret"),
+            mesa_ya_res_url=data["mesa_ya_res_url"],
+            subscribed_events=tuple(data.get("subscribed_events", ())),
+            previous_secret=data.get("previous_secret"),
+            registered_at=datetime.fromisoformat(data["registered_at"]),
+        )
+
+
+class PartnerRegistry:
+    """
+    Partners by id, read without locking.
+
+    Partners are immutable and writers swap in a new dict instead of
+    mutating the current one, so a webhook looking up its partner (one
+    dict access) never waits on, or sees half of, a registration or
+    rotation. Writers serialize among themselves on a lock.
+    """
+
+    def __init__(self) -> None:
+        self._partners: dict[str, Partner] = {}
+        self._write_lock = threading.Lock()
+
+    def get(self, partner_id: str) -> Partner | None:
+        """Get a partner by id."""
+        return self._partners.get(partner_id)
+
+    def __len__(self) -> int:
+        return len(self._partners)
+
+    def all(self) -> list[Partner]:
+        """Get every partner, in registration order."""
+        return list(self._partners.values())
+
+    def upsert(self, partner: Partner) -> None:
+        """Add a partner or replace the one with the same id."""
+        with self._write_lock:
+            partners = dict(self._partners)
+            partners[partner.partner_id] = partner
+            self._partners = partners
+
+    def remove(self, partner_id: str) -> bool:
+        """Remove a partner; returns whether it existed."""
+        with self._write_lock:
+            if partner_id not in self._partners:
+                return False
+            partners = dict(self._partners)
+            del partners[partner_id]
+            self._partners = partners
+            return True
+
+    def rotate(self, partner_id: str, secret: str) -> Partner | None:
+        """
+        Install a new secret for a partner, keeping the current one as previous.
+
+        Returns:
+            The updated partner, or None if there is no such partner
+        """
+        with self._write_lock:
+            partner = self._partners.get(partner_id)
+            if partner is None:
+                return None
+            if secret != partner.secret:
+                partner = replace(partner, secret=secret, previous_secret=partner.secret)
+                partners = dict(self._partners)
+                partners[partner_id] = partner
+                self._partners = partners
+            return partner
+
+    def replace_all(self, partners: list[Partner]) -> None:
+        """Swap in a whole new set of partners (e.g. loaded from another worker)."""
+        with self._write_lock:
+            self._partners = {partner.partner_id: partner for partner in partners}
+
+    def to_records(self) -> list[dict[str, Any]]:
+        """Get every partner with its secrets, for sharing between workers."""
+        return [partner.to_dict(include_secrets=True) for partner in self._partners.values()]
+
+
+# Global partner registry
+partner_registry = PartnerRegistry()
@@ -0,0 +1,223 @@
+"""Asynchronous processing pipeline for received webhooks."""
+
+import asyncio
+from collections import deque
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from mesaya_partner_demo.config import config
+from mesaya_partner_demo.models import EventStatus, EventStore, WebhookEvent, event_store
+
+# Business handler for a received event; raising marks the event as ERROR
+Handler = Callable[[WebhookEvent], Awaitable[Any]]
+
+# Handlers registered under this type run for every event type
+ANY_EVENT = "*"
+
+
+class ProcessingPipeline:
+    """
+    Bounded queue of received events drained by async workers.
+
+    The webhook endpoint acknowledges an event once it is verified and
+    stored, and leaves the business logic to the handlers registered for
+    its ``event_type``. Each handler result moves the event to PROCESSED,
+    or to ERROR with the exception message. Events of types without
+    handlers are not queued.
+
+    A type can be given its own concurrency limit so a slow handler cannot
+    take every worker. A worker never waits on that limit: an event whose
+    type is at its limit is parked, and the worker finishing an event of
+    that type runs the next parked one. Parked events count towards
+    ``max_size``.
+    """
+
+    def __init__(
+        self,
+        store: EventStore,
+        workers: int = 4,
+        max_size: int = 1000,
+        handler_timeout: float = 30.0,
+    ):
+        self.store = store
+        self.workers = workers
+        self.max_size = max_size
+        self.handler_timeout = handler_timeout
+        self._handlers: dict[str, list[Handler]] = {}
+        self._limits: dict[str, int] = {}
+        # Events of each limited type being handled, and those parked
+        self._running: dict[str, int] = {}
+        self._parked: dict[str, deque[WebhookEvent]] = {}
+        self.parked = 0
+
+        self.queue: asyncio.Queue[WebhookEvent] = asyncio.Queue(maxsize=max_size)
+        self._tasks: list[asyncio.Task] = []
+        self.in_flight = 0
+        self.processed = 0
+        self.errors = 0
+        self.rejected = 0
+
+    def register(
+        self,
+        event_type: str,
+        handler: Handler,
+        concurrency: int | None = None,
+    ) -> None:
+        """
+        Register a handler for an event type (``"*"`` for every type).
+
+        Args:
+            event_type: The event type, e.g. ``"payment.succeeded"``
+            handler: Async function called with the WebhookEvent
+            concurrency: Most events of this type handled at once, if limited
+        """
+        self._handlers.setdefault(event_type, []).append(handler)
+        if concurrency is not None:
+            self._limits[event_type] = concurrency
+
+    def handler(
+        self, event_type: str, concurrency: int | None = None
+    ) -> Callable[[Handler], Handler]:
+        """Decorator form of ``register``."""
+
+        def decorator(fn: Handler) -> Handler:
+            self.register(event_type, fn, concurrency)
+            return fn
+
+        return decorator
+
+    def _handlers_for(self, event_type: str) -> list[Handler]:
+        return self._handlers.get(event_type, []) + self._handlers.get(ANY_EVENT, [])
+
+    def full(self) -> bool:
+        """Whether the queue (with the parked events) is at capacity."""
+        return self.queue.qsize() + self.parked >= self.max_size
+
+    def accepts(self, event: WebhookEvent) -> bool:
+        """
+        Whether ``submit`` would queue the event.
+
+        Events with an invalid signature and events without handlers are
+        left as they are.
+        """
+        if event.status == EventStatus.INVALID_SIGNATURE:
+            return False
+        return bool(self._handlers_for(event.event_type))
+
+    def submit(self, event: WebhookEvent) -> bool:
+        """
+        Queue a stored event for its handlers (see ``accepts``).
+
+        Returns:
+            Whether the event was queued
+
+        Raises:
+            asyncio.QueueFull: If the queue is at capacity
+        """
+        if not self.accepts(event):
+            return False
+        if self.full():
+            raise asyncio.QueueFull
+        self.queue.put_nowait(event)
+        return True
+
+    async def start(self) -> None:
+        """Start the workers."""
+        if not self._tasks:
+            self._running.clear()
+            self._tasks = [
+                asyncio.create_task(self._worker()) for _ in range(self.workers)
+            ]
+
+    async def close(self) -> None:
+        """Stop the workers; queued events keep their received status."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run(self, event: WebhookEvent) -> None:
+        for handler in self._handlers_for(event.event_type):
+            await asyncio.wait_for(handler(event), self.handler_timeout)
+
+    async def _process(self, event: WebhookEvent) -> None:
+        try:
+            await self._run(event)
+        except asyncio.TimeoutError:
+            self.errors += 1
+            status = EventStatus.ERROR
+            error = f"Handler timed out after {self.handler_timeout}s"
+        except Exception as e:
+            self.errors += 1
+            status = EventStatus.ERROR
+            error = f"Handler error: {type(e).__name__}: {e}"
+        else:
+            self.processed += 1
+            status, error = EventStatus.PROCESSED, None
+        async with self.store.writing():
+            self.store.update_received(event, status, error)
+
+    def _claim(self, event: WebhookEvent) -> bool:
+        """Take a slot of the event's type, or park it if the type is at its limit."""
+        limit = self._limits.get(event.event_type)
+        if limit is None:
+            return True
+        running = self._running.get(event.event_type, 0)
+        if running >= limit:
+            self._parked.setdefault(event.event_type, deque()).append(event)
+            self.parked += 1
+            return False
+        self._running[event.event_type] = running + 1
+        return True
+
+    def _release(self, event: WebhookEvent) -> WebhookEvent | None:
+        """Give back the event's slot, or hand it to the next parked event."""
+        if event.event_type not in self._limits:
+            return None
+        parked = self._parked.get(event.event_type)
+        if parked:
+            self.parked -= 1
+            return parked.popleft()
+        self._running[event.event_type] -= 1
+        return None
+
+    async def _worker(self) -> None:
+        while True:
+            event: WebhookEvent | None = await self.queue.get()
+            try:
+                if not self._claim(event):
+                    continue
+                while event is not None:
+                    self.in_flight += 1
+                    try:
+                        await self._process(event)
+                    finally:
+                        self.in_flight -= 1
+                    event = self._release(event)
+            finally:
+                self.queue.task_done()
+
+    def get_stats(self) -> dict[str, Any]:
+        """Get queue depth, handler and outcome statistics."""
+        return {
+            "workers": len(self._tasks),
+            "queue_depth": self.queue.qsize(),
+            "queue_capacity": self.max_size,
+            "in_flight": self.in_flight,
+            "parked": self.parked,
+            "processed": self.processed,
+            "errors": self.errors,
+            "rejected": self.rejected,
+            "handlers": {
+                event_type: len(handlers) for event_type, handlers in self._handlers.items()
+            },
+        }
+
+
+# Global processing pipeline
+pipeline = ProcessingPipeline(
+    event_store,
+    workers=config.pipeline_workers,
+    max_size=config.pipeline_queue_size,
+    handler_timeout=config.pipeline_handler_timeout,
+)
@@ -0,0 +1,135 @@
+"""Rendered response bodies cached per EventStore version, with ETags."""
+
+import hashlib
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+from starlette.responses import Response
+
+from mesaya_partner_demo import json_codec
+
+
+class JSONBytesResponse(Response):
+    """
+    JSON response for bodies that are already serialized.
+
+    Bytes are sent as they are; anything else is encoded once with
+    ``json_codec`` (orjson when installed). Returning this from an endpoint
+    also skips FastAPI's ``jsonable_encoder`` walk over the content.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return json_codec.dumps(content)
+
+
+class CachedBody:
+    """A rendered body and its strong ETag (a hash of the bytes)."""
+
+    __slots__ = ("body", "etag")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+    def matches(self, if_none_match: str | None) -> bool:
+        """Check an ``If-None-Match`` header against this body's ETag."""
+        if not if_none_match:
+            return False
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag == "*" or tag.removeprefix("W/") == self.etag:
+                return True
+        return False
+
+
+class ResponseCache:
+    """
+    Keeps rendered bodies for the current store version.
+
+    Entries are keyed by whatever else the body depends on (query
+    parameters, registration state). When the version moves on, the whole
+    cache is dropped at once, so stale bodies are never served and no
+    per-entry bookkeeping is needed. At most ``max_entries`` keys are kept,
+    least recently used first out.
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._version = -1
+        self._entries: OrderedDict[Hashable, CachedBody] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(
+        self,
+        version: int,
+        key: Hashable,
+        render: Callable[[], bytes],
+    ) -> CachedBody:
+        """
+        Get the cached body for ``key`` at ``version``, rendering on a miss.
+
+        Args:
+            version: Current store version
+            key: Everything else the body depends on
+            render: Builds the body bytes
+
+        Returns:
+            Cached body with its ETag
+        """
+        cached = self._lookup(version, key)
+        if cached is None:
+            cached = CachedBody(render())
+            self._store(key, cached)
+        return cached
+
+    async def aget(
+        self,
+        version: int,
+        key: Hashable,
+        render: Callable[[], Awaitable[bytes]],
+    ) -> CachedBody:
+        """
+        Same as ``get``, for bodies rendered by a coroutine.
+
+        A body is only kept if the store did not move on while it was
+        being rendered.
+        """
+        cached = self._lookup(version, key)
+        if cached is None:
+            cached = CachedBody(await render())
+            if version == self._version:
+                self._store(key, cached)
+        return cached
+
+    def _lookup(self, version: int, key: Hashable) -> CachedBody | None:
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+
+        cached = self._entries.get(key)
+        if cached is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return cached
+        self.misses += 1
+        return None
+
+    def _store(self, key: Hashable, cached: CachedBody) -> None:
+        self._entries[key] = cached
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_stats(self) -> dict[str, int]:
+        """Get hit/miss counters."""
+        return {
+            "version": self._version,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
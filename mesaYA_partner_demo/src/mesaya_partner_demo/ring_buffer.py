@@ -0,0 +1,89 @@
+"""Fixed-capacity ring buffer with O(1) append and eviction."""
+
+from collections.abc import Iterator
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class RingBuffer(Generic[T]):
+    """
+    Fixed-capacity buffer that overwrites its oldest item when full.
+
+    Every appended item gets a monotonically increasing sequence number, so
+    an item can be looked up by ``seq`` in O(1) for as long as it is retained.
+    Iteration yields items newest first.
+    """
+
+    __slots__ = ("capacity", "_slots", "_next_seq", "_size")
+
+    def __init__(self, capacity: int, start_seq: int = 0):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._slots: list[T | None] = [None] * capacity
+        self._next_seq = start_seq
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    @property
+    def first_seq(self) -> int:
+        """Sequence number of the oldest retained item."""
+        return self._next_seq - self._size
+
+    @property
+    def next_seq(self) -> int:
+        """Sequence number the next appended item will get."""
+        return self._next_seq
+
+    def append(self, item: T) -> T | None:
+        """
+        Append an item.
+
+        Returns:
+            The evicted oldest item if the buffer was full, otherwise None
+        """
+        index = self._next_seq % self.capacity
+        evicted = self._slots[index] if self._size == self.capacity else None
+        self._slots[index] = item
+        self._next_seq += 1
+        if self._size < self.capacity:
+            self._size += 1
+        return evicted
+
+    def get(self, seq: int) -> T | None:
+        """Get the item with the given sequence number, if still retained."""
+        if seq < self.first_seq or seq >= self._next_seq:
+            return None
+        return self._slots[seq % self.capacity]
+
+    def iter_before(self, seq: int | None = None) -> Iterator[tuple[int, T]]:
+        """Yield ``(seq, item)`` pairs newest first, starting below ``seq``."""
+        stop = self.first_seq
+        current = self._next_seq if seq is None else min(seq, self._next_seq)
+        while current > stop:
+            current -= 1
+            yield current, self._slots[current % self.capacity]  # type: ignore[misc]
+
+    def __iter__(self) -> Iterator[T]:
+        for _, item in self.iter_before():
+            yield item
+
+    def latest(self, limit: int | None = None) -> list[T]:
+        """Get up to ``limit`` items, newest first."""
+        count = self._size if limit is None else min(limit, self._size)
+        return [item for _, item in zip(range(count), self)]
+
+    def clear(self) -> None:
+        """
+        Drop every item.
+
+        Sequence numbers keep increasing so outstanding cursors stay valid.
+        """
+        self._slots = [None] * self.capacity
+        self._size = 0
@@ -0,0 +1,487 @@
+"""State shared between worker processes through a local SQLite (WAL) file."""
+
+import asyncio
+import sqlite3
+import threading
+from collections.abc import AsyncIterator, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime
+from typing import Any
+
+from mesaya_partner_demo import json_codec
+from mesaya_partner_demo.config import PartnerConfig, config
+from mesaya_partner_demo.models import EventStore, event_store
+from mesaya_partner_demo.partners import Partner, PartnerRegistry, partner_registry
+
+# Registration fields kept in sync between workers
+CONFIG_FIELDS = (
+    "partner_id",
+    "partner_secret",
+    "previous_partner_secret",
+    "registered_at",
+    "is_registered",
+    "mesa_ya_res_url",
+    "subscribed_events",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    kind TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    rev INTEGER NOT NULL,
+    record BLOB NOT NULL,
+    PRIMARY KEY (kind, seq)
+);
+CREATE INDEX IF NOT EXISTS events_rev ON events (rev);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    rev INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS revision (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    rev INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO revision (id, rev) VALUES (1, 0);
+"""
+
+
+class SharedState:
+    """
+    EventStore backend and registration store shared by every worker.
+
+    Each worker keeps its own in-memory EventStore as a cache of the file.
+    Every write bumps a global revision; a worker catches up by applying
+    the rows with a newer revision than it has seen. Writes run inside
+    ``BEGIN IMMEDIATE``, which serializes writers across processes, and
+    catch up first, so the local ring always hands out the next free seq.
+
+    Reads check ``PRAGMA data_version``, which only changes when another
+    connection committed, so an idle check costs one pragma. Anything that
+    may wait on another worker (the write lock, catching up) runs in a
+    dedicated thread so it never stalls the event loop.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        store: EventStore,
+        partner_config: PartnerConfig,
+        partners: PartnerRegistry,
+        poll_interval: float = 0.1,
+        retention: int = 1_000_000,
+    ):
+        self.path = path
+        self.store = store
+        self.config = partner_config
+        self.partners = partners
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self._conn: sqlite3.Connection | None = None
+        # Read-only connection for paging, used from worker threads
+        self._reader: sqlite3.Connection | None = None
+        self._reader_lock = threading.Lock()
+        self._in_transaction = False
+        # Set while ``reserve`` holds the write transaction; guarded by
+        # _begin_lock since the executor starts it
+        self._reserved = False
+        self._begin_lock = threading.Lock()
+        self._reserve_lock: asyncio.Lock | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._rev = 0
+        self._seen_rev = 0
+        self._data_version = -1
+        self._cleared: dict[str, int] = {}
+        self._task: asyncio.Task | None = None
+
+    # ------------------------------------------------------------------
+    # Connection and sync
+    # ------------------------------------------------------------------
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            # Also used by the reservation thread (see reserve)
+            conn = sqlite3.connect(
+                self.path, isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Thread for everything that may wait on other workers."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="shared-state"
+            )
+        return self._executor
+
+    def _reader_conn(self) -> sqlite3.Connection:
+        """Get the reader connection; caller holds ``_reader_lock``."""
+        if self._reader is None:
+            self._reader = sqlite3.connect(
+                self.path, isolation_level=None, check_same_thread=False
+            )
+            self._reader.execute("PRAGMA busy_timeout=5000")
+        return self._reader
+
+    def _read(self, sql: str, params: tuple[Any, ...]) -> list[tuple[Any, ...]]:
+        """Run a query on the reader connection (safe from any thread)."""
+        with self._reader_lock:
+            return self._reader_conn().execute(sql, params).fetchall()
+
+    def _current_rev(self) -> int:
+        return self.conn.execute("SELECT rev FROM revision WHERE id = 1").fetchone()[0]
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Hold the cross-process write lock and catch up before writing.
+
+        Waiting for the lock blocks the calling thread; on the event loop,
+        take it with ``reserve`` first.
+        """
+        if self._in_transaction:
+            yield
+            return
+        conn = self.conn
+        with self._begin_lock:
+            # Inside a reserved transaction, nest in a savepoint instead
+            joined = self._reserved
+            conn.execute("SAVEPOINT write" if joined else "BEGIN IMMEDIATE")
+        self._in_transaction = True
+        try:
+            self._pull()
+            self._rev = self._current_rev() + 1
+            conn.execute("UPDATE revision SET rev = ? WHERE id = 1", (self._rev,))
+            yield
+        except BaseException:
+            if joined:
+                conn.execute("ROLLBACK TO write")
+                conn.execute("RELEASE write")
+            else:
+                conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("RELEASE write" if joined else "COMMIT")
+            self._seen_rev = self._rev
+        finally:
+            self._in_transaction = False
+
+    def _begin(self) -> None:
+        """Start the transaction held by ``reserve``; runs in the executor."""
+        with self._begin_lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            self._reserved = True
+
+    def _release(self) -> None:
+        with self._begin_lock:
+            self._reserved = False
+            self.conn.execute("COMMIT")
+
+    @asynccontextmanager
+    async def reserve(self) -> AsyncIterator[None]:
+        """
+        Take the cross-process write lock without blocking the event loop.
+
+        The wait for other workers happens in the executor; the writes in
+        the block then run on the event loop, each ``transaction()`` in a
+        savepoint of the reserved transaction, committed on exit.
+        """
+        if self._in_transaction:
+            yield
+            return
+        if self._reserve_lock is None:
+            self._reserve_lock = asyncio.Lock()
+        async with self._reserve_lock:
+            begin = asyncio.get_running_loop().run_in_executor(self.executor, self._begin)
+            try:
+                await asyncio.shield(begin)
+            except asyncio.CancelledError:
+                # The executor still takes the lock; give it back before leaving
+                while not begin.done():
+                    try:
+                        await asyncio.wait([begin])
+                    except asyncio.CancelledError:
+                        pass
+                if not begin.cancelled() and begin.exception() is None:
+                    self._release()
+                raise
+            try:
+                with self.transaction():
+                    yield
+            finally:
+                self._release()
+
+    async def refresh(self) -> None:
+        """
+        Apply changes committed by other workers, if there are any.
+
+        The check and the reads run in the executor, on the reader
+        connection; only applying the rows runs on the event loop.
+        """
+        if self._in_transaction:
+            return
+        changes = await asyncio.get_running_loop().run_in_executor(
+            self.executor, self._fetch_if_changed, self._seen_rev
+        )
+        if changes is not None:
+            self._apply(*changes)
+
+    def _fetch_if_changed(
+        self, since: int
+    ) -> tuple[list[tuple[Any, ...]], list[tuple[Any, ...]]] | None:
+        with self._reader_lock:
+            reader = self._reader_conn()
+            version = reader.execute("PRAGMA data_version").fetchone()[0]
+            if version == self._data_version:
+                return None
+            self._data_version = version
+            reader.execute("BEGIN")
+            try:
+                return self._changes(reader, since)
+            finally:
+                reader.execute("COMMIT")
+
+    @staticmethod
+    def _changes(
+        conn: sqlite3.Connection, since: int
+    ) -> tuple[list[tuple[Any, ...]], list[tuple[Any, ...]]]:
+        """Get the meta and event rows written after revision ``since``."""
+        meta = conn.execute(
+            "SELECT key, value, rev FROM meta WHERE rev > ? ORDER BY rev", (since,)
+        ).fetchall()
+        rows = conn.execute(
+            "SELECT kind, seq, record, rev FROM events WHERE rev > ? ORDER BY rev",
+            (since,),
+        ).fetchall()
+        return meta, rows
+
+    def _pull(self) -> None:
+        """Apply every row newer than the last seen revision to the store."""
+        self._apply(*self._changes(self.conn, self._seen_rev))
+
+    def _apply(
+        self, meta: list[tuple[Any, ...]], rows: list[tuple[Any, ...]]
+    ) -> None:
+        """Apply fetched rows not applied yet (a later pull may have)."""
+        since = self._seen_rev
+        latest = since
+
+        for key, value, rev in meta:
+            if rev <= since:
+                continue
+            latest = max(latest, rev)
+            if key == "config":
+                self._apply_config(json_codec.loads(value))
+            elif key == "partners":
+                self._apply_partners(json_codec.loads(value))
+            elif key.startswith("cleared:"):
+                kind = key.split(":", 1)[1]
+                cutoff = int(value)
+                if cutoff > self._cleared.get(kind, 0):
+                    self._cleared[kind] = cutoff
+                    self.store.apply_cleared(kind, cutoff)
+
+        rows = [row for row in rows if row[3] > since]
+        if rows:
+            latest = max(latest, rows[-1][3])
+            # New events must enter the ring in seq order; updates to events
+            # already held can be applied in any order.
+            next_seqs = {
+                "received": self.store.received_events.next_seq,
+                "sent": self.store.sent_events.next_seq,
+            }
+            rows.sort(key=lambda row: (row[1] < next_seqs[row[0]], row[1]))
+            for kind, seq, record, _ in rows:
+                if seq >= self._cleared.get(kind, 0):
+                    self.store.apply_change(kind, seq, json_codec.loads(record))
+
+        self._seen_rev = latest
+
+    async def _poll_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            await self.refresh()
+
+    # ------------------------------------------------------------------
+    # EventBackend interface
+    # ------------------------------------------------------------------
+
+    def append(self, kind: str, seq: int, record: dict[str, Any]) -> None:
+        """Insert or update a record; must run inside ``transaction()``."""
+        if seq < self._cleared.get(kind, 0):
+            return
+        self.conn.execute(
+            "INSERT OR REPLACE INTO events (kind, seq, rev, record) VALUES (?, ?, ?, ?)",
+            (kind, seq, self._rev, json_codec.dumps(record)),
+        )
+        if seq % 1024 == 0 and seq > self.retention:
+            self.conn.execute(
+                "DELETE FROM events WHERE kind = ? AND seq < ?",
+                (kind, seq - self.retention),
+            )
+
+    def mark_cleared(self, kind: str, next_seq: int) -> None:
+        """Record a clear for every worker and delete the cleared rows."""
+        self._cleared[kind] = next_seq
+        self._set_meta(f"cleared:{kind}", str(next_seq).encode())
+        self.conn.execute(
+            "DELETE FROM events WHERE kind = ? AND seq < ?", (kind, next_seq)
+        )
+
+    def next_seq(self, kind: str) -> int:
+        row = self.conn.execute(
+            "SELECT MAX(seq) FROM events WHERE kind = ?", (kind,)
+        ).fetchone()
+        last = -1 if row[0] is None else row[0]
+        return max(last + 1, self._cleared.get(kind, 0))
+
+    def replay(self, kind: str, limit: int) -> list[tuple[int, dict[str, Any]]]:
+        """Get the most recent ``limit`` records, oldest first."""
+        # Revision first: anything written after it is picked up by _pull
+        self._seen_rev = max(self._seen_rev, self._current_rev())
+        self._load_meta()
+        rows = self.conn.execute(
+            "SELECT seq, record FROM events WHERE kind = ? AND seq >= ?"
+            " ORDER BY seq DESC LIMIT ?",
+            (kind, self._cleared.get(kind, 0), limit),
+        ).fetchall()
+        return [(seq, json_codec.loads(record)) for seq, record in reversed(rows)]
+
+    def read_before(
+        self, kind: str, before_seq: int, limit: int
+    ) -> list[tuple[int, dict[str, Any]]]:
+        rows = self._read(
+            "SELECT seq, record FROM events WHERE kind = ? AND seq >= ? AND seq < ?"
+            " ORDER BY seq DESC LIMIT ?",
+            (kind, self._cleared.get(kind, 0), before_seq, limit),
+        )
+        return [(seq, json_codec.loads(record)) for seq, record in rows]
+
+    def iter_records(self, kind: str) -> Iterator[tuple[int, dict[str, Any]]]:
+        """Yield every retained record of ``kind``, oldest first."""
+        self._load_meta()
+        rows = self.conn.execute(
+            "SELECT seq, record FROM events WHERE kind = ? AND seq >= ? ORDER BY seq",
+            (kind, self._cleared.get(kind, 0)),
+        )
+        for seq, record in rows:
+            yield seq, json_codec.loads(record)
+
+    async def start(self) -> None:
+        """Start polling for other workers' changes."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._poll_loop())
+
+    async def close(self) -> None:
+        """Stop polling and close the database."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        with self._reader_lock:
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        self._reserve_lock = None
+
+    # ------------------------------------------------------------------
+    # Registration state and coordination
+    # ------------------------------------------------------------------
+
+    def _set_meta(self, key: str, value: bytes) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value, rev) VALUES (?, ?, ?)",
+            (key, value, self._rev),
+        )
+
+    def _load_meta(self) -> None:
+        for key, value in self.conn.execute("SELECT key, value FROM meta"):
+            if key == "config":
+                self._apply_config(json_codec.loads(value))
+            elif key == "partners":
+                self._apply_partners(json_codec.loads(value))
+            elif key.startswith("cleared:"):
+                self._cleared[key.split(":", 1)[1]] = int(value)
+
+    def _apply_config(self, data: dict[str, Any]) -> None:
+        for name in CONFIG_FIELDS:
+            if name in data:
+                value = data[name]
+                if name == "registered_at" and value is not None:
+                    value = datetime.fromisoformat(value)
+                setattr(self.config, name, value)
+
+    def _apply_partners(self, records: list[dict[str, Any]]) -> None:
+        self.partners.replace_all([Partner.from_dict(record) for record in records])
+
+    def save_partners(self) -> None:
+        """Publish the partner registry to every worker."""
+        with self.transaction():
+            self._set_meta("partners", json_codec.dumps(self.partners.to_records()))
+
+    def save_config(self) -> None:
+        """Publish the partner registration state to every worker."""
+        data = {name: getattr(self.config, name) for name in CONFIG_FIELDS}
+        if data["registered_at"] is not None:
+            data["registered_at"] = data["registered_at"].isoformat()
+        with self.transaction():
+            self._set_meta("config", json_codec.dumps(data))
+
+    def claim(self, name: str, token: str) -> bool:
+        """
+        Claim a one-off task (e.g. startup recovery) for ``token``.
+
+        Returns True for the first worker to claim ``name`` with this token
+        and False for every other one.
+        """
+        key = f"claim:{name}"
+        with self.transaction():
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+            if row is not None and row[0] == token.encode():
+                return False
+            self._set_meta(key, token.encode())
+            return True
+
+
+# Global shared state; None unless a state file is configured
+shared_state = (
+    SharedState(
+        config.shared_state_path,
+        event_store,
+        config,
+        partner_registry,
+        poll_interval=config.shared_state_poll_interval,
+        retention=config.shared_state_retention,
+    )
+    if config.shared_state_path
+    else None
+)
+
+
+def publish_config() -> None:
+    """Share the current registration state with the other workers, if any."""
+    if shared_state is not None:
+        shared_state.save_config()
+
+
+def publish_partners() -> None:
+    """Share the current partner registry with the other workers, if any."""
+    if shared_state is not None:
+        shared_state.save_partners()
@@ -0,0 +1,37 @@
+"""Precomputed keyed-HMAC state for webhook signing and verification."""
+
+import hashlib
+import hmac
+from functools import lru_cache
+
+
+class HmacKey:
+    """
+    HMAC-SHA256 state keyed once for a secret.
+
+    Keying HMAC hashes the inner and outer pads of the secret; doing that
+    once and copying the prepared state per message skips that work on every
+    signature.
+    """
+
+    __slots__ = ("_template",)
+
+    def __init__(self, secret: str):
+        self._template = hmac.new(secret.encode(), digestmod=hashlib.sha256)
+
+    def hexdigest(self, *parts: bytes) -> str:
+        """Get the hex HMAC of the concatenation of ``parts``."""
+        mac = self._template.copy()
+        for part in parts:
+            mac.update(part)
+        return mac.hexdigest()
+
+    def matches(self, signature: str, *parts: bytes) -> bool:
+        """Constant-time check of ``signature`` against the HMAC of ``parts``."""
+        return hmac.compare_digest(self.hexdigest(*parts), signature)
+
+
+@lru_cache(maxsize=64)
+def hmac_key(secret: str) -> HmacKey:
+    """Get the prepared HMAC state for a secret, keying it on first use."""
+    return HmacKey(secret)
@@ -0,0 +1,234 @@
+"""Rolling per-second and per-minute event counts in fixed-size ring buckets."""
+
+import time
+from array import array
+from collections.abc import Callable
+from typing import Any
+
+from mesaya_partner_demo.config import config
+from mesaya_partner_demo.models import (
+    DeliveryStatus,
+    EventStatus,
+    EventStore,
+    SentEvent,
+    WebhookEvent,
+    event_store,
+)
+
+# Counters kept for every bucket (per-event-type counts are added as seen)
+COUNTS = (
+    "received",
+    "invalid_signature",
+    "processing_errors",
+    "sent",
+    "delivered",
+    "delivery_failures",
+)
+# Latencies are kept as a sum and a count per bucket
+LATENCIES = ("webhook", "delivery")
+
+
+class BucketRing:
+    """
+    Counters over the last ``size`` buckets of ``width`` seconds each.
+
+    Every series is an ``array`` with one preallocated slot per bucket, and
+    ``_stamps`` records which bucket (``int(t // width)``) each slot holds.
+    A slot still holding an old bucket is zeroed when first written again,
+    so the ring never needs a sweep and every update is O(1).
+    """
+
+    def __init__(self, width: int, size: int):
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        self.width = width
+        self.size = size
+        self._stamps = array("q", [-1]) * size
+        self._series: dict[str, array] = {}
+
+    def _slot(self, now: float) -> int:
+        bucket = int(now // self.width)
+        slot = bucket % self.size
+        if self._stamps[slot] != bucket:
+            for values in self._series.values():
+                values[slot] = 0.0
+            self._stamps[slot] = bucket
+        return slot
+
+    def add(self, names: tuple[str, ...], now: float, amount: float = 1.0) -> None:
+        """Add ``amount`` to each series in ``names``, in the bucket holding ``now``."""
+        slot = self._slot(now)
+        for name in names:
+            values = self._series.get(name)
+            if values is None:
+                values = self._series[name] = array("d", [0.0]) * self.size
+            values[slot] += amount
+
+    def window(self, count: int, now: float) -> tuple[float, dict[str, list[float]]]:
+        """
+        Get every series over the ``count`` buckets ending with ``now``'s.
+
+        Returns:
+            Start time of the first bucket, and each series oldest first
+            (buckets nothing was recorded in are 0)
+        """
+        count = min(count, self.size)
+        last = int(now // self.width)
+        first = last - count + 1
+        slots = [
+            bucket % self.size if self._stamps[bucket % self.size] == bucket else -1
+            for bucket in range(first, last + 1)
+        ]
+        series = {
+            name: [values[slot] if slot >= 0 else 0.0 for slot in slots]
+            for name, values in list(self._series.items())
+        }
+        return first * self.width, series
+
+
+def _ratio(part: float, whole: float) -> float:
+    return round(part / whole, 4) if whole else 0.0
+
+
+def _average_ms(total: float, count: float) -> float | None:
+    return round(total / count * 1000, 3) if count else None
+
+
+class TimeSeries:
+    """
+    Event rates over time: a per-second and a per-minute ring of buckets.
+
+    Counts come from the EventStore's change notifications, so with shared
+    state they include the events of every worker; latencies are observed
+    by this process (``observe_latency``). Per-type series are created for
+    the first ``max_types`` event types per direction; later types are
+    counted under "other".
+    """
+
+    def __init__(
+        self,
+        store: EventStore,
+        seconds: int = 900,
+        minutes: int = 1440,
+        max_types: int = 32,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.resolutions = {
+            "second": BucketRing(1, seconds),
+            "minute": BucketRing(60, minutes),
+        }
+        self._rings = tuple(self.resolutions.values())
+        self.max_types = max_types
+        self.clock = clock
+        self._type_series: dict[str, dict[str, str]] = {"received": {}, "sent": {}}
+        store.add_listener(self.on_store_change)
+
+    def _add(self, now: float, *names: str, amount: float = 1.0) -> None:
+        for ring in self._rings:
+            ring.add(names, now, amount)
+
+    def _type_name(self, kind: str, event_type: str) -> str:
+        names = self._type_series[kind]
+        name = names.get(event_type)
+        if name is None:
+            if len(names) >= self.max_types:
+                return f"{kind}:other"
+            name = names[event_type] = f"{kind}:{event_type}"
+        return name
+
+    def observe_latency(self, name: str, seconds: float) -> None:
+        """Record one latency sample for ``name`` (see ``LATENCIES``)."""
+        now = self.clock()
+        self._add(now, f"{name}_latency_sum", amount=seconds)
+        self._add(now, f"{name}_latency_count")
+
+    def on_store_change(
+        self, change: str, event: WebhookEvent | SentEvent | None
+    ) -> None:
+        if change == "received":
+            type_name = self._type_name("received", event.event_type)
+            if event.status == EventStatus.INVALID_SIGNATURE:
+                self._add(self.clock(), "received", type_name, "invalid_signature")
+            else:
+                self._add(self.clock(), "received", type_name)
+        elif change == "sent":
+            self._add(self.clock(), "sent", self._type_name("sent", event.event_type))
+        elif change == "received_update":
+            if event.status == EventStatus.ERROR:
+                self._add(self.clock(), "processing_errors")
+        elif change == "sent_update":
+            # Every delivery attempt ends in exactly one of these
+            if event.status == DeliveryStatus.DELIVERED:
+                self._add(self.clock(), "delivered")
+            elif event.status in (DeliveryStatus.RETRYING, DeliveryStatus.FAILED):
+                self._add(self.clock(), "delivery_failures")
+
+    def snapshot(self, resolution: str = "second", window: int | None = None) -> dict[str, Any]:
+        """
+        Get the series over the last ``window`` buckets of a resolution.
+
+        Args:
+            resolution: "second" or "minute"
+            window: Number of buckets (default and maximum: all retained)
+
+        Returns:
+            Counts and average latencies per bucket, oldest first, plus a
+            summary (rates, failure ratios) over the whole window
+
+        Raises:
+            ValueError: If the resolution is unknown
+        """
+        ring = self.resolutions.get(resolution)
+        if ring is None:
+            raise ValueError(f"Unknown resolution: {resolution}")
+        count = min(window or ring.size, ring.size)
+        start, raw = ring.window(count, self.clock())
+        zeros = [0.0] * count
+
+        series: dict[str, list[Any]] = {
+            name: [int(v) for v in raw.get(name, zeros)] for name in COUNTS
+        }
+        totals = {name: sum(values) for name, values in series.items()}
+        latency_totals: dict[str, float | None] = {}
+        for name in LATENCIES:
+            sums = raw.get(f"{name}_latency_sum", zeros)
+            counts = raw.get(f"{name}_latency_count", zeros)
+            series[f"{name}_latency_ms"] = [_average_ms(s, c) for s, c in zip(sums, counts)]
+            latency_totals[f"{name}_latency_ms"] = _average_ms(sum(sums), sum(counts))
+
+        by_type: dict[str, dict[str, list[int]]] = {"received": {}, "sent": {}}
+        for name, values in raw.items():
+            kind, _, event_type = name.partition(":")
+            if event_type and kind in by_type:
+                by_type[kind][event_type] = [int(v) for v in values]
+
+        seconds = count * ring.width
+        attempts = totals["delivered"] + totals["delivery_failures"]
+        return {
+            "resolution": resolution,
+            "step_seconds": ring.width,
+            "start": start,
+            "buckets": count,
+            "series": series,
+            "received_by_type": by_type["received"],
+            "sent_by_type": by_type["sent"],
+            "summary": {
+                **totals,
+                "received_per_sec": round(totals["received"] / seconds, 3),
+                "sent_per_sec": round(totals["sent"] / seconds, 3),
+                "invalid_signature_rate": _ratio(
+                    totals["invalid_signature"], totals["received"]
+                ),
+                "delivery_failure_rate": _ratio(totals["delivery_failures"], attempts),
+                **latency_totals,
+            },
+        }
+
+
+# Global time series, fed by the event store
+timeseries = TimeSeries(
+    event_store,
+    seconds=config.timeseries_seconds,
+    minutes=config.timeseries_minutes,
+    max_types=config.timeseries_max_types,
+)
@@ -1,158 +1,430 @@
-"""Webhook service for HMAC verification and processing."""
-
-import hashlib
-import hmac
-import time
-from datetime import datetime
-from typing import Any
-from uuid import uuid4
-
-from mesaya_partner_demo.config import config
-from mesaya_partner_demo.models import EventStatus, WebhookEvent, event_store
-
-
-class WebhookService:
-    """Service for handling webhook verification and processing."""
-
-    # Signature validity window in seconds (5 minutes)
-    SIGNATURE_VALIDITY_SECONDS = 5 * 60
-
-    @staticmethod
-    def generate_signature(payload: str, secret: str) -> tuple[str, int]:
-        """
-        Generate HMAC-SHA256 signature for a payload.
-
-        Returns:
-            Tuple of (signature_header, timestamp)
-        """
-        timestamp = int(time.time())
-        signed_payload = f"{timestamp}.{payload}"
-
-        signature = hmac.new(
-            secret.encode(),
-            signed_payload.encode(),
-            hashlib.sha256,
-        ).hexdigest()
-
-        return f"t={timestamp},v1={signature}", timestamp
-
-    @staticmethod
-    def verify_signature(
-        signature_header: str | None,
-        payload: str,
-        secret: str,
-    ) -> tuple[bool, str | None]:
-        """
-        Verify HMAC-SHA256 signature from webhook.
-
-        Args:
-            signature_header: The X-Webhook-Signature header value
-            payload: The raw request body
-            secret: The partner's webhook secret
-
-        Returns:
-            Tuple of (is_valid, error_message)
-        """
-        if not signature_header:
-            return False, "Missing signature header"
-
-        if not secret:
-            # If we don't have a secret yet, we can't verify
-            return True, None  # Accept but note it's unverified
-
-        try:
-            # Parse signature header: "t=timestamp,v1=signature"
-            parts = signature_header.split(",")
-            timestamp_part = next((p for p in parts if p.startswith("t=")), None)
-            signature_part = next((p for p in parts if p.startswith("v1=")), None)
-
-            if not timestamp_part or not signature_part:
-                return False, "Invalid signature format"
-
-            timestamp = int(timestamp_part[2:])
-            received_signature = signature_part[3:]
-
-            # Check timestamp is within validity window
-            now = int(time.time())
-            if abs(now - timestamp) > WebhookService.SIGNATURE_VALIDITY_SECONDS:
-                return False, f"Signature expired (age: {abs(now - timestamp)}s)"
-
-            # Compute expected signature
-            signed_payload = f"{timestamp}.{payload}"
-            expected_signature = hmac.new(
-                secret.encode(),
-                signed_payload.encode(),
-                hashlib.sha256,
-            ).hexdigest()
-
-            # Constant-time comparison
-            if hmac.compare_digest(expected_signature, received_signature):
-                return True, None
-            else:
-                return False, "Signature mismatch"
-
-        except (ValueError, IndexError) as e:
-            return False, f"Error parsing signature: {e}"
-
-    @staticmethod
-    def process_webhook(
-        payload: dict[str, Any],
-        signature_header: str | None,
-        partner_id: str | None = None,
-    ) -> WebhookEvent:
-        """
-        Process an incoming webhook event.
-
-        Args:
-            payload: The parsed JSON payload
-            signature_header: The X-Webhook-Signature header
-            partner_id: The X-Partner-Id header
-
-        Returns:
-            The created WebhookEvent
-        """
-        event_id = str(uuid4())
-        event_type = payload.get("event", "unknown")
-        timestamp = datetime.utcnow()
-
-        # Try to parse timestamp from payload
-        if "timestamp" in payload:
-            try:
-                timestamp = datetime.fromisoformat(
-                    payload["timestamp"].replace("Z", "+00:00")
-                )
-            except (ValueError, AttributeError):
-                pass
-
-        # Verify signature
-        payload_str = str(payload)  # For verification purposes
-        is_valid, error_msg = WebhookService.verify_signature(
-            signature_header,
-            payload_str,
-            config.partner_secret or "",
-        )
-
-        status = EventStatus.VERIFIED if is_valid else EventStatus.INVALID_SIGNATURE
-        if not config.partner_secret:
-            # If not registered yet, just mark as received
-            status = EventStatus.RECEIVED
-
-        event = WebhookEvent(
-            id=event_id,
-            event_type=event_type,
-            timestamp=timestamp,
-            payload=payload,
-            status=status,
-            signature=signature_header,
-            partner_id=partner_id,
-            error_message=error_msg if not is_valid else None,
-        )
-
-        # Store the event
-        event_store.add_received(event)
-
-        return event
-
-
-# Singleton instance
-webhook_service = WebhookService()
+"""Webhook service for HMAC verification and processing."""
+
+import time
+from collections.abc import Callable
+from datetime import datetime
+from typing import Any
+from uuid import uuid4
+
+from mesaya_partner_demo import json_codec
+from mesaya_partner_demo.config import config
+from mesaya_partner_demo.dedup import ReplayGuard
+from mesaya_partner_demo.metrics import (
+    DECODE_STAGE,
+    STORE_STAGE,
+    VERIFY_STAGE,
+    webhooks_received_total,
+)
+from mesaya_partner_demo.models import EventStatus, WebhookEvent, event_store
+from mesaya_partner_demo.partners import partner_registry
+from mesaya_partner_demo.signing import hmac_key
+
+
+class WebhookService:
+    """Service for handling webhook verification and processing."""
+
+    # Signature validity window in seconds (5 minutes)
+    SIGNATURE_VALIDITY_SECONDS = 5 * 60
+
+    # Deliveries seen within the validity window, for replay protection
+    replay_guard = ReplayGuard(
+        window_seconds=SIGNATURE_VALIDITY_SECONDS,
+        max_entries=config.replay_guard_max_entries,
+    )
+
+    @staticmethod
+    def replay_keys(
+        signature_header: str | None,
+        webhook_id: str | None = None,
+    ) -> list[tuple[str, int | None]]:
+        """
+        Get the dedup keys for a delivery from its headers alone.
+
+        The ``v1`` signature always identifies the delivery, bucketed by its
+        ``t`` timestamp. The ``X-Webhook-Id`` header is not signed, so it is
+        only an extra key: a resend with a new id still matches on its
+        signature.
+
+        Returns:
+            List of (key, signature timestamp), empty if nothing identifies it
+        """
+        timestamp: int | None = None
+        signature: str | None = None
+        for part in (signature_header or "").split(","):
+            if part.startswith("t="):
+                try:
+                    timestamp = int(part[2:])
+                except ValueError:
+                    pass
+            elif part.startswith("v1="):
+                signature = part[3:]
+
+        keys: list[tuple[str, int | None]] = []
+        if signature and timestamp is not None:
+            keys.append((f"sig:{signature}", timestamp))
+        if webhook_id:
+            keys.append((f"id:{webhook_id}", None))
+        return keys
+
+    @staticmethod
+    def is_replay(signature_header: str | None, webhook_id: str | None = None) -> bool:
+        """Check whether a delivery was already accepted, before any decoding."""
+        guard = WebhookService.replay_guard
+        return any(
+            guard.is_duplicate(*key)
+            for key in WebhookService.replay_keys(signature_header, webhook_id)
+        )
+
+    @staticmethod
+    def remember_delivery(signature_header: str | None, webhook_id: str | None = None) -> None:
+        """Remember every key of an accepted delivery."""
+        for key in WebhookService.replay_keys(signature_header, webhook_id):
+            WebhookService.replay_guard.remember(*key)
+
+    @staticmethod
+    def _sign(timestamp: int, payload: bytes | str, secret: str) -> str:
+        """HMAC-SHA256 over ``"{timestamp}." + payload`` without joining them."""
+        if isinstance(payload, str):
+            payload = payload.encode()
+        return hmac_key(secret).hexdigest(b"%d." % timestamp, payload)
+
+    @staticmethod
+    def generate_signature(payload: bytes | str, secret: str) -> tuple[str, int]:
+        """
+        Generate HMAC-SHA256 signature for a payload.
+
+        Returns:
+            Tuple of (signature_header, timestamp)
+        """
+        timestamp = int(time.time())
+        signature = WebhookService._sign(timestamp, payload, secret)
+        return f"t={timestamp},v1={signature}", timestamp
+
+    @staticmethod
+    def verify_signature(
+        signature_header: str | None,
+        payload: bytes | str,
+        secret: str,
+        previous_secret: str | None = None,
+    ) -> tuple[bool, str | None]:
+        """
+        Verify HMAC-SHA256 signature from webhook.
+
+        Args:
+            signature_header: The X-Webhook-Signature header value
+            payload: The raw request body bytes
+            secret: The partner's webhook secret
+            previous_secret: The secret in use before the last rotation,
+                still accepted so rotation needs no downtime
+
+        Returns:
+            Tuple of (is_valid, error_message)
+        """
+        if not signature_header:
+            return False, "Missing signature header"
+
+        if not secret:
+            # If we don't have a secret yet, we can't verify
+            return True, None  # Accept but note it's unverified
+
+        try:
+            # Parse signature header: "t=timestamp,v1=signature"
+            timestamp_part = signature_part = None
+            for part in signature_header.split(","):
+                if part.startswith("t="):
+                    timestamp_part = part
+                elif part.startswith("v1="):
+                    signature_part = part
+
+            if not timestamp_part or not signature_part:
+                return False, "Invalid signature format"
+
+            timestamp = int(timestamp_part[2:])
+            received_signature = signature_part[3:]
+
+            # Check timestamp is within validity window
+            now = int(time.time())
+            if abs(now - timestamp) > WebhookService.SIGNATURE_VALIDITY_SECONDS:
+                return False, f"Signature expired (age: {abs(now - timestamp)}s)"
+
+            # Compare against the current secret, then the previous one
+            if isinstance(payload, str):
+                payload = payload.encode()
+            prefix = b"%d." % timestamp
+            for candidate in (secret, previous_secret):
+                if candidate and hmac_key(candidate).matches(
+                    received_signature, prefix, payload
+                ):
+                    return True, None
+            return False, "Signature mismatch"
+
+        except (ValueError, IndexError, TypeError) as e:
+            return False, f"Error parsing signature: {e}"
+
+    @staticmethod
+    def secrets_for(partner_id: str | None) -> tuple[str | None, str | None]:
+        """
+        Get the (current, previous) secrets to verify a partner's webhooks with.
+
+        A partner in the registry is found by its ``X-Partner-Id`` with one
+        dict lookup; any other sender is checked against the configured
+        partner secret.
+        """
+        partner = partner_registry.get(partner_id) if partner_id else None
+        if partner is not None:
+            return partner.secret, partner.previous_secret
+        return config.partner_secret, config.previous_partner_secret
+
+    @staticmethod
+    def _status(is_valid: bool, secret: str | None) -> EventStatus:
+        """Status of an event whose signature check returned ``is_valid``."""
+        if not secret:
+            # If not registered yet, just mark as received
+            return EventStatus.RECEIVED
+        return EventStatus.VERIFIED if is_valid else EventStatus.INVALID_SIGNATURE
+
+    @staticmethod
+    def _build_event(
+        payload: dict[str, Any],
+        status: EventStatus,
+        signature_header: str | None,
+        partner_id: str | None,
+        error_msg: str | None,
+        raw_payload: bytes | None = None,
+    ) -> WebhookEvent:
+        """
+        Create the WebhookEvent for a decoded payload.
+
+        ``raw_payload`` is the body the payload was decoded from; the event
+        keeps it as-is instead of encoding the payload again.
+        """
+        timestamp = datetime.utcnow()
+
+        # Try to parse timestamp from payload
+        if "timestamp" in payload:
+            try:
+                timestamp = datetime.fromisoformat(
+                    payload["timestamp"].replace("Z", "+00:00")
+                )
+            except (ValueError, AttributeError):
+                pass
+
+        # Indexed, counted and serialized as a key, so it must be a string
+        event_type = payload.get("event")
+        if event_type is None:
+            event_type = "unknown"
+        elif not isinstance(event_type, str):
+            event_type = json_codec.dumps(event_type).decode()
+
+        return WebhookEvent(
+            id=str(uuid4()),
+            event_type=event_type,
+            timestamp=timestamp,
+            payload=payload,
+            status=status,
+            signature=signature_header,
+            partner_id=partner_id,
+            error_message=error_msg,
+            raw_payload=raw_payload,
+        )
+
+    @staticmethod
+    def process_webhook(
+        body: bytes,
+        signature_header: str | None,
+        partner_id: str | None = None,
+        webhook_id: str | None = None,
+        admit: Callable[[list[WebhookEvent]], None] | None = None,
+    ) -> WebhookEvent:
+        """
+        Process an incoming webhook event.
+
+        The signature is verified over the raw body bytes, and the body is
+        decoded as JSON exactly once. Accepted deliveries are remembered so
+        replays within the validity window can be rejected by ``is_replay``.
+
+        Args:
+            body: The raw request body
+            signature_header: The X-Webhook-Signature header
+            partner_id: The X-Partner-Id header; selects the secret to verify with
+            webhook_id: The X-Webhook-Id header, if the sender provides one
+            admit: Called with the event before it is remembered or stored;
+                raising refuses the delivery without side effects
+
+        Returns:
+            The created WebhookEvent
+
+        Raises:
+            ValueError: If the body is not a JSON object
+        """
+        # Verify signature
+        start = time.perf_counter()
+        secret, previous_secret = WebhookService.secrets_for(partner_id)
+        is_valid, error_msg = WebhookService.verify_signature(
+            signature_header, body, secret or "", previous_secret
+        )
+        verified = time.perf_counter()
+        VERIFY_STAGE.observe(verified - start)
+
+        payload = json_codec.loads(body)
+        DECODE_STAGE.observe(time.perf_counter() - verified)
+        if not isinstance(payload, dict):
+            raise ValueError("Webhook body must be a JSON object")
+
+        status = WebhookService._status(is_valid, secret)
+        error_msg = None if is_valid else error_msg
+        # Kept verbatim unless it spans lines (records are exported as NDJSON)
+        raw = body if b"\n" not in body and b"\r" not in body else None
+        event = WebhookService._build_event(
+            payload, status, signature_header, partner_id, error_msg, raw
+        )
+        if admit is not None:
+            admit([event])
+
+        if status != EventStatus.INVALID_SIGNATURE:
+            WebhookService.remember_delivery(signature_header, webhook_id)
+
+        # Store the event
+        start = time.perf_counter()
+        event_store.add_received(event)
+        STORE_STAGE.observe(time.perf_counter() - start)
+        RECEIVED_BY_STATUS[status].inc()
+
+        return event
+
+    @staticmethod
+    def _split_batch(body: bytes) -> list[Any]:
+        """
+        Split a batch body into items: a JSON array, or NDJSON lines.
+
+        NDJSON lines that are not valid JSON become ``ValueError`` items so
+        only that line is rejected.
+
+        Raises:
+            ValueError: If the body is a JSON array that does not parse
+        """
+        if body.lstrip()[:1] == b"[":
+            items = json_codec.loads(body)
+            if not isinstance(items, list):
+                raise ValueError("Batch body must be a JSON array or NDJSON")
+            return items
+
+        items: list[Any] = []
+        for line in body.splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append(json_codec.loads(line))
+            except ValueError as e:
+                items.append(ValueError(f"Invalid JSON: {e}"))
+        return items
+
+    @staticmethod
+    def process_batch(
+        body: bytes,
+        signature_header: str | None,
+        partner_id: str | None = None,
+        webhook_id: str | None = None,
+        max_items: int = 1000,
+        admit: Callable[[list[WebhookEvent]], None] | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Process a batch of webhook events sent in one request.
+
+        The signature covers the whole raw body and is verified once; every
+        item gets the resulting status. Each item is then checked on its
+        own: items that are not JSON objects are rejected, and items with
+        an ``id`` already accepted (in this batch or an earlier delivery)
+        are skipped as duplicates. The accepted events are stored in a
+        single ``EventStore`` operation.
+
+        Args:
+            body: The raw request body (JSON array or NDJSON)
+            signature_header: The X-Webhook-Signature header
+            partner_id: The X-Partner-Id header; selects the secret to verify with
+            webhook_id: The X-Webhook-Id header of the batch, if any
+            max_items: Largest batch accepted
+            admit: Called with the events to store before any of them is
+                remembered or stored; raising refuses the whole batch
+
+        Returns:
+            One result per item, in order, with its ``status`` and either
+            ``event_id`` (and the stored ``event``) or ``error``
+
+        Raises:
+            ValueError: If the body cannot be split into items or is too large
+        """
+        start = time.perf_counter()
+        secret, previous_secret = WebhookService.secrets_for(partner_id)
+        is_valid, error_msg = WebhookService.verify_signature(
+            signature_header, body, secret or "", previous_secret
+        )
+        verified = time.perf_counter()
+        VERIFY_STAGE.observe(verified - start)
+
+        items = WebhookService._split_batch(body)
+        DECODE_STAGE.observe(time.perf_counter() - verified)
+        if len(items) > max_items:
+            raise ValueError(f"Batch has {len(items)} items (max {max_items})")
+
+        status = WebhookService._status(is_valid, secret)
+        error_msg = None if is_valid else error_msg
+        guard = WebhookService.replay_guard
+        results: list[dict[str, Any]] = []
+        events: list[WebhookEvent] = []
+        # Item ids to remember once the batch is admitted
+        keys: set[str] = set()
+        for index, item in enumerate(items):
+            if isinstance(item, ValueError):
+                results.append({"index": index, "status": "rejected", "error": str(item)})
+                continue
+            if not isinstance(item, dict):
+                results.append(
+                    {"index": index, "status": "rejected", "error": "Item must be a JSON object"}
+                )
+                continue
+
+            key = f"id:{item['id']}" if item.get("id") is not None else None
+            if key is not None and (key in keys or guard.is_duplicate(key)):
+                results.append({"index": index, "status": "duplicate"})
+                continue
+
+            event = WebhookService._build_event(
+                item, status, signature_header, partner_id, error_msg
+            )
+            if key is not None and status != EventStatus.INVALID_SIGNATURE:
+                keys.add(key)
+            events.append(event)
+            results.append(
+                {
+                    "index": index,
+                    "status": status.value,
+                    "event_id": event.id,
+                    "event_type": event.event_type,
+                    "event": event,
+                }
+            )
+
+        if admit is not None:
+            admit(events)
+        for key in keys:
+            guard.remember(key)
+        if status != EventStatus.INVALID_SIGNATURE:
+            WebhookService.remember_delivery(signature_header, webhook_id)
+
+        start = time.perf_counter()
+        event_store.add_received_many(events)
+        STORE_STAGE.observe(time.perf_counter() - start)
+        if events:
+            RECEIVED_BY_STATUS[status].inc(len(events))
+
+        return results
+
+
+# Received counters by status, bound once for the webhook hot path
+RECEIVED_BY_STATUS = {
+    status: webhooks_received_total.labels(status.value) for status in EventStatus
+}
+
+# Singleton instance
+webhook_service = WebhookService()
@@ -0,0 +1,30 @@
+"""Shared fixtures: a test client and a clean service state per test."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from mesaya_partner_demo import app as partner_app
+from mesaya_partner_demo.config import config
+from mesaya_partner_demo.models import event_store
+from mesaya_partner_demo.webhook_service import WebhookService
+
+SECRET = "whsec_test_0123456789abcdef"
+
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    """Start every test with an empty store, no seen deliveries and a known secret."""
+    event_store.clear()
+    WebhookService.replay_guard.clear()
+    saved = config.partner_secret, config.previous_partner_secret
+    config.partner_secret, config.previous_partner_secret = SECRET, None
+    yield
+    config.partner_secret, config.previous_partner_secret = saved
+    event_store.clear()
+    WebhookService.replay_guard.clear()
+
+
+@pytest.fixture
+def client():
+    with TestClient(partner_app) as test_client:
+        yield test_client
@@ -0,0 +1,37 @@
+"""Circuit breaker outcomes arriving after a state change."""
+
+from mesaya_partner_demo.circuit_breaker import BreakerState, CircuitBreaker
+
+
+def _open(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.min_calls):
+        breaker.record(False, breaker.allow())
+    assert breaker.state is BreakerState.OPEN
+
+
+def test_late_failure_does_not_extend_open_period():
+    breaker = CircuitBreaker(window=4, min_calls=2, open_seconds=60.0)
+    slow = breaker.allow()
+    _open(breaker)
+    opened_at = breaker._opened_at
+
+    breaker.record(False, slow)
+    assert breaker.times_opened == 1
+    assert breaker._opened_at == opened_at
+
+
+def test_stale_result_is_not_taken_for_the_trial():
+    breaker = CircuitBreaker(window=4, min_calls=2, open_seconds=0.0)
+    slow = breaker.allow()
+    _open(breaker)
+
+    trial = breaker.allow()
+    assert breaker.state is BreakerState.HALF_OPEN
+    breaker.record(True, slow)
+    breaker.abandon(slow)
+    assert breaker.state is BreakerState.HALF_OPEN
+    # The trial is still in flight: nothing else gets through
+    assert breaker.allow() is None
+
+    breaker.record(True, trial)
+    assert breaker.state is BreakerState.CLOSED
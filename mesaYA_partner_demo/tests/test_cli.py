@@ -0,0 +1,108 @@
+"""``export`` and ``replay``: an event log exported and re-sent."""
+
+import asyncio
+import gzip
+import json
+from datetime import datetime, timezone
+
+import httpx
+import pytest
+
+from mesaya_partner_demo import main
+from mesaya_partner_demo.cli import event_data, read_export
+from mesaya_partner_demo.config import config
+from mesaya_partner_demo.event_log import SegmentedEventLog
+from mesaya_partner_demo.models import DeliveryStatus, EventStatus, SentEvent, WebhookEvent
+from mesaya_partner_demo.signing import hmac_key
+
+from conftest import SECRET
+
+
+@pytest.fixture
+def log_dir(tmp_path):
+    """An event log with two received and three sent events."""
+    log = SegmentedEventLog(tmp_path / "log")
+    now = datetime.now(timezone.utc)
+    for seq in range(2):
+        received = WebhookEvent(
+            id=f"in-{seq}",
+            event_type="payment.created",
+            timestamp=now,
+            payload={"event": "payment.created", "amount": seq},
+            status=EventStatus.PROCESSED,
+        )
+        log.append("received", seq, received.to_dict())
+    for seq in range(3):
+        sent = SentEvent(
+            id=f"out-{seq}",
+            event_type="reservation.created",
+            timestamp=now,
+            payload={"event": "reservation.created", "timestamp": "x", "data": {"table": seq}},
+            target_url="http://mesaya.test/api/v1/webhooks/partner/p-1",
+            success=True,
+            status=DeliveryStatus.DELIVERED,
+        )
+        log.append("sent", seq, sent.to_dict())
+    asyncio.run(log.close())
+    return tmp_path / "log"
+
+
+def run_cli(*argv: str) -> int:
+    with pytest.raises(SystemExit) as exit_info:
+        main(list(argv))
+    return exit_info.value.code
+
+
+def test_export_writes_gzip_ndjson_oldest_first(log_dir, tmp_path):
+    output = tmp_path / "events.ndjson.gz"
+    assert run_cli("export", "--log-dir", str(log_dir), "-o", str(output)) == 0
+
+    with gzip.open(output, "rb") as f:
+        lines = [json.loads(line) for line in f]
+    assert [(line["kind"], line["seq"]) for line in lines] == [
+        ("received", 0), ("received", 1), ("sent", 0), ("sent", 1), ("sent", 2),
+    ]
+    assert [record["id"] for _, record in read_export(str(output))][-1] == "out-2"
+
+
+def test_replay_resends_signed_events_and_reports(log_dir, tmp_path, monkeypatch):
+    export = tmp_path / "sent.ndjson"
+    run_cli("export", "--log-dir", str(log_dir), "--kind", "sent", "-o", str(export))
+
+    received: list[dict] = []
+
+    def target(request: httpx.Request) -> httpx.Response:
+        expected = hmac_key(SECRET).hexdigest(
+            request.headers["X-Webhook-Timestamp"].encode() + b".", request.content
+        )
+        assert request.headers["X-Webhook-Signature"] == expected
+        received.append(json.loads(request.content))
+        return httpx.Response(202 if len(received) < 3 else 503, text="busy")
+
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(
+        httpx,
+        "AsyncClient",
+        lambda **kwargs: real_client(transport=httpx.MockTransport(target), **kwargs),
+    )
+    monkeypatch.setattr(config, "mesa_ya_res_url", config.mesa_ya_res_url)
+    monkeypatch.setattr(config, "partner_id", config.partner_id)
+    report = tmp_path / "report.json"
+
+    code = run_cli(
+        "replay", str(export), "--target", "http://staging.test/",
+        "--partner-id", "p-9", "--rate", "0", "--report", str(report),
+    )
+
+    assert code == 1
+    assert sorted(item["data"]["table"] for item in received) == [0, 1, 2]
+    assert all(item["timestamp"] != "x" for item in received)
+    results = json.loads(report.read_text())
+    assert (results["events"], results["ok"], results["errors"]) == (3, 2, {"503": 1})
+    assert results["target"] == "http://staging.test"
+
+
+def test_event_data_unwraps_either_payload_shape():
+    assert event_data({"event_type": "a", "payload": {"data": {"x": 1}}}) == ("a", {"x": 1})
+    flat = {"payload": {"event": "b", "timestamp": "t", "y": 2}}
+    assert event_data(flat) == ("b", {"y": 2})
@@ -0,0 +1,79 @@
+"""Outbound coalescing: batch sizes and targets without a batch endpoint."""
+
+import asyncio
+import json
+
+import httpx
+
+from mesaya_partner_demo.coalescer import DeliveryCoalescer
+from mesaya_partner_demo.delivery import DeliveryQueue
+from mesaya_partner_demo.http_pool import CallStats, HTTPClientPool
+from mesaya_partner_demo.mesa_ya_client import MesaYAClient
+from mesaya_partner_demo.models import EventStore
+
+TARGET = "http://mesaya.test/api/v1/webhooks/partner/p-1"
+
+
+def test_batches_fall_back_to_single_requests_on_404():
+    paths: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        paths.append(request.url.path)
+        if request.url.path.endswith("/batch"):
+            return httpx.Response(404, text="Not Found")
+        return httpx.Response(202)
+
+    async def run() -> tuple[list, list]:
+        pool = HTTPClientPool()
+        key = pool.origin(TARGET)
+        pool._clients[key] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        pool._stats[key] = CallStats()
+        client = MesaYAClient(pool=pool)
+        coalescer = DeliveryCoalescer(client, window=0.01, max_batch=10)
+        events = [client.build_event("reservation.created", {"n": n}, TARGET) for n in range(3)]
+        first = await asyncio.gather(*(coalescer.deliver(e) for e in events))
+        again = await asyncio.gather(*(coalescer.deliver(e) for e in events[:2]))
+        await pool.close()
+        return events, first + again
+
+    events, outcomes = asyncio.run(run())
+    assert outcomes == [(202, None)] * 5
+    # One rejected batch, then only single requests
+    assert paths.count("/api/v1/webhooks/partner/p-1/batch") == 1
+    assert paths.count("/api/v1/webhooks/partner/p-1") == 5
+    assert [e.attempts for e in events] == [2, 2, 1]
+
+
+def test_few_workers_still_fill_whole_batches():
+    sizes: list[int] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        batched = request.url.path.endswith("/batch")
+        sizes.append(len(json.loads(request.content)) if batched else 1)
+        return httpx.Response(202)
+
+    async def run() -> DeliveryQueue:
+        pool = HTTPClientPool()
+        key = pool.origin(TARGET)
+        pool._clients[key] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        pool._stats[key] = CallStats()
+        client = MesaYAClient(pool=pool)
+        queue = DeliveryQueue(
+            deliver=client.deliver,
+            store=EventStore(max_events=100),
+            workers=2,
+            coalescer=DeliveryCoalescer(client, window=0.05, max_batch=10),
+        )
+        await queue.start()
+        for n in range(25):
+            queue.enqueue(client.build_event("reservation.created", {"n": n}, TARGET))
+        while queue.delivered < 25:
+            await asyncio.sleep(0.01)
+        await queue.close()
+        await pool.close()
+        return queue
+
+    queue = asyncio.run(run())
+    assert sorted(sizes) == [5, 10, 10]
+    assert queue.in_flight == 0
+    assert queue.coalescer.largest_batch == 10
@@ -0,0 +1,80 @@
+"""Outbound delivery queue: retries with backoff and the dead-letter list."""
+
+import asyncio
+from datetime import datetime, timezone
+
+from mesaya_partner_demo.delivery import DeliveryQueue
+from mesaya_partner_demo.models import DeliveryStatus, EventStore, SentEvent
+
+
+class ScriptedTarget:
+    """Answers each event's attempts from a list of (code, error) outcomes."""
+
+    def __init__(self, script: dict[str, list[tuple[int | None, str | None]]]):
+        self.script = script
+
+    async def deliver(self, event: SentEvent) -> tuple[int | None, str | None]:
+        event.attempts += 1
+        return self.script[event.id][event.attempts - 1]
+
+
+def outbound(event_id: str) -> SentEvent:
+    return SentEvent(
+        id=event_id,
+        event_type="reservation.created",
+        timestamp=datetime.now(timezone.utc),
+        payload={"reservation": event_id},
+        target_url="http://mesaya.test/api/webhooks",
+        success=False,
+        status=DeliveryStatus.QUEUED,
+        attempts=0,
+    )
+
+
+def drain(queue: DeliveryQueue, events: list[SentEvent]) -> None:
+    async def run() -> None:
+        await queue.start()
+        for event in events:
+            queue.enqueue(event)
+        waiting = (DeliveryStatus.QUEUED, DeliveryStatus.RETRYING)
+        while any(event.status in waiting for event in events):
+            await asyncio.sleep(0.005)
+        await queue.close()
+
+    asyncio.run(run())
+
+
+def test_retryable_failures_are_retried_until_delivered():
+    target = ScriptedTarget({
+        "flaky": [(503, "Service Unavailable"), (429, "Too Many Requests"), (202, None)],
+    })
+    store = EventStore(max_events=10)
+    queue = DeliveryQueue(target.deliver, store, workers=1, backoff_base=0.001)
+    event = outbound("flaky")
+
+    drain(queue, [event])
+
+    assert event.status == DeliveryStatus.DELIVERED
+    assert event.attempts == 3
+    assert (queue.retries, queue.delivered, queue.dead_lettered) == (2, 1, 0)
+    assert store.get_stats()["sent_success"] == 1
+
+
+def test_client_errors_and_exhausted_attempts_are_dead_lettered():
+    target = ScriptedTarget({
+        "rejected": [(400, "Bad Request")],
+        "down": [(None, "Connection refused")] * 2,
+    })
+    store = EventStore(max_events=10)
+    queue = DeliveryQueue(
+        target.deliver, store, workers=2, max_attempts=2, backoff_base=0.001
+    )
+    rejected, down = outbound("rejected"), outbound("down")
+
+    drain(queue, [rejected, down])
+
+    assert (rejected.attempts, down.attempts) == (1, 2)
+    assert {e["id"] for e in queue.get_dead_letters()} == {"rejected", "down"}
+    assert queue.get_stats()["dead_lettered"] == 2
+    assert store.get_stats()["sent_failed"] == 2
+    assert store.get_stats()["sent_pending"] == 0
@@ -0,0 +1,110 @@
+"""Segmented event log: upserts read back from any later segment."""
+
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from mesaya_partner_demo.event_log import SegmentedEventLog
+from mesaya_partner_demo.models import DeliveryStatus, EventStore, SentEvent
+
+
+def make_sent(number: int) -> SentEvent:
+    return SentEvent(
+        id=f"evt-{number}",
+        event_type="reservation.created",
+        timestamp=datetime.now(timezone.utc),
+        payload={"n": number},
+        target_url="http://mesaya.test/api/webhooks",
+        success=False,
+        status=DeliveryStatus.QUEUED,
+    )
+
+
+@pytest.fixture
+def logged_store(tmp_path):
+    """A store keeping 5 events in memory over a log with tiny segments."""
+    log = SegmentedEventLog(tmp_path, segment_max_bytes=200)
+    store = EventStore(max_events=5)
+    store.attach_backend(log, replay=5)
+    events = [make_sent(n) for n in range(20)]
+    for event in events:
+        store.add_sent(event)
+    log.flush()
+    # Delivered long after its segment was rotated out
+    store.update_sent(events[2], DeliveryStatus.DELIVERED, response_code=200)
+    for n in range(20, 30):
+        store.add_sent(make_sent(n))
+    log.flush()
+    return store, log
+
+
+def status_of(records, seq):
+    return next(record["status"] for s, record in records if s == seq)
+
+
+def test_upsert_several_segments_later_wins_everywhere(logged_store, tmp_path):
+    store, log = logged_store
+    assert len(log._stream("sent").segments) > 3
+
+    assert status_of(log.replay("sent", 30), 2) == "delivered"
+    assert status_of(log.read_before("sent", 5, 5), 2) == "delivered"
+    exported = list(log.iter_records("sent"))
+    assert [seq for seq, _ in exported] == list(range(30))
+    assert status_of(exported, 2) == "delivered"
+
+    # A reader opening the log afresh builds the same view
+    reopened = SegmentedEventLog(tmp_path, segment_max_bytes=200)
+    assert status_of(reopened.iter_records("sent"), 2) == "delivered"
+    assert reopened.next_seq("sent") == 30
+
+
+def test_store_pages_past_memory_off_the_event_loop(logged_store):
+    store, _ = logged_store
+    events, cursor = asyncio.run(store.aquery("sent", None, 30))
+    assert [e.seq for e in events] == list(range(29, -1, -1))
+    assert cursor is None
+    assert next(e for e in events if e.seq == 2).status == DeliveryStatus.DELIVERED
+
+
+def test_clear_hides_older_segments(logged_store):
+    store, log = logged_store
+    store.clear()
+    store.add_sent(make_sent(99))
+    log.flush()
+    assert [seq for seq, _ in log.iter_records("sent")] == [30]
+    assert log.read_before("sent", 30, 10) == []
+
+
+def test_reopening_reads_only_the_active_segment(logged_store, tmp_path, monkeypatch):
+    _, log = logged_store
+    segments = log._stream("sent").segments
+    asyncio.run(log.close())
+
+    reopened = SegmentedEventLog(tmp_path, segment_max_bytes=200)
+    scanned = []
+    original = reopened._stream("sent")._scan
+    monkeypatch.setattr(
+        reopened._stream("sent"),
+        "_scan",
+        lambda first_seq: scanned.append(first_seq) or original(first_seq),
+    )
+    assert reopened.next_seq("sent") == 30
+    assert scanned == [segments[-1]]
+    assert status_of(reopened.read_before("sent", 5, 5), 2) == "delivered"
+
+
+def test_retention_drops_the_oldest_segments(tmp_path):
+    log = SegmentedEventLog(tmp_path, segment_max_bytes=200, max_segments=3)
+    store = EventStore(max_events=5)
+    store.attach_backend(log, replay=5)
+    for n in range(40):
+        store.add_sent(make_sent(n))
+    log.flush()
+
+    stream = log._stream("sent")
+    assert len(stream.segments) == 3
+    assert len(list((tmp_path / "sent").glob("*.ndjson"))) == 3
+    seqs = [seq for seq, _ in log.iter_records("sent")]
+    assert seqs == list(range(stream.segments[0], 40))
+    assert log.next_seq("sent") == 40
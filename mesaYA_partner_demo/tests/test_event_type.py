@@ -0,0 +1,63 @@
+"""Webhooks whose "event" field is not a string."""
+
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from mesaya_partner_demo.models import EventStatus, EventStore, WebhookEvent, event_store
+from mesaya_partner_demo.webhook_service import WebhookService
+
+from conftest import SECRET
+
+
+def _post(client, payload):
+    body = json.dumps(payload).encode()
+    header, _ = WebhookService.generate_signature(body, SECRET)
+    return client.post("/api/webhook", content=body, headers={"X-Webhook-Signature": header})
+
+
+def test_object_event_type_is_stored_as_string(client):
+    response = _post(client, {"event": {"a": 1}, "n": 1})
+    assert response.status_code == 200
+
+    (event,) = event_store.received_events
+    assert event.event_type == '{"a":1}'
+    assert client.get("/api/events").status_code == 200
+
+
+def test_unindexable_event_leaves_store_untouched():
+    store = EventStore(max_events=5)
+    event = WebhookEvent(
+        id="evt-1",
+        event_type={"a": 1},
+        timestamp=datetime.now(timezone.utc),
+        payload={},
+        status=EventStatus.VERIFIED,
+    )
+    with pytest.raises(TypeError):
+        store.add_received(event)
+    assert len(store.received_events) == 0
+    assert store.received_events.next_seq == 0
+
+
+def test_numeric_event_type_keeps_events_endpoint_working(client):
+    assert _post(client, {"event": 5}).status_code == 200
+
+    response = client.get("/api/events")
+    assert response.status_code == 200
+    assert response.json()["stats"]["events_by_type"] == {"5": 1}
+
+
+def test_stats_encode_with_non_string_event_types():
+    store = EventStore(max_events=5)
+    store.add_received(
+        WebhookEvent(
+            id="evt-1",
+            event_type=5,
+            timestamp=datetime.now(timezone.utc),
+            payload={},
+            status=EventStatus.VERIFIED,
+        )
+    )
+    assert json.loads(store.stats_json())["events_by_type"] == {"5": 1}
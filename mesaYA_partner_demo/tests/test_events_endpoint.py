@@ -0,0 +1,58 @@
+"""/api/events: the original response and cursor pages."""
+
+from datetime import datetime, timezone
+
+from mesaya_partner_demo.models import (
+    DeliveryStatus,
+    EventStatus,
+    SentEvent,
+    WebhookEvent,
+    event_store,
+)
+
+
+def fill_store() -> None:
+    for number in range(3):
+        event_store.add_received(
+            WebhookEvent(
+                id=f"in-{number}",
+                event_type="payment.created",
+                timestamp=datetime.now(timezone.utc),
+                payload={"n": number},
+                status=EventStatus.VERIFIED,
+            )
+        )
+    event_store.add_sent(
+        SentEvent(
+            id="out-0",
+            event_type="reservation.created",
+            timestamp=datetime.now(timezone.utc),
+            payload={},
+            target_url="http://mesaya.test/api/webhooks",
+            success=True,
+            status=DeliveryStatus.DELIVERED,
+        )
+    )
+
+
+def test_no_parameters_keeps_the_original_shape(client):
+    fill_store()
+    body = client.get("/api/events").json()
+    assert set(body) == {"received", "sent", "stats"}
+    assert [e["id"] for e in body["received"]] == ["in-2", "in-1", "in-0"]
+    assert [e["id"] for e in body["sent"]] == ["out-0"]
+    assert body["stats"]["total_received"] == 3
+
+
+def test_paging_parameters_switch_to_cursor_pages(client):
+    fill_store()
+    first = client.get("/api/events", params={"limit": 2}).json()
+    assert first["kind"] == "received"
+    assert [e["id"] for e in first["events"]] == ["in-2", "in-1"]
+
+    rest = client.get("/api/events", params={"cursor": first["next_cursor"]}).json()
+    assert [e["id"] for e in rest["events"]] == ["in-0"]
+    assert rest["next_cursor"] is None
+
+    sent = client.get("/api/events", params={"kind": "sent"}).json()
+    assert [e["id"] for e in sent["events"]] == ["out-0"]
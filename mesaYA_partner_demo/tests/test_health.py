@@ -0,0 +1,80 @@
+"""Background health probes: concurrency, shared rounds and cached results."""
+
+import asyncio
+import time
+
+import httpx
+
+from mesaya_partner_demo.health import HealthProber
+from mesaya_partner_demo.http_pool import CallStats, HTTPClientPool
+
+SERVICES = {
+    "res": "http://res.test/health",
+    "payment": "http://payment.test/health",
+    "ws": "http://ws.test/health",
+}
+
+
+async def answer(request: httpx.Request) -> httpx.Response:
+    """Every probe takes 100 ms: res is up, payment answers 503, ws refuses."""
+    await asyncio.sleep(0.1)
+    host = request.url.host
+    if host == "ws.test":
+        raise httpx.ConnectError("Connection refused", request=request)
+    return httpx.Response(200 if host == "res.test" else 503)
+
+
+def mocked_pool() -> tuple[HTTPClientPool, list[str]]:
+    pool = HTTPClientPool()
+    hits: list[str] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        hits.append(request.url.host)
+        return await answer(request)
+
+    for url in SERVICES.values():
+        key = pool.origin(url)
+        pool._clients[key] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        pool._stats[key] = CallStats()
+    return pool, hits
+
+
+def test_services_are_probed_at_once_and_callers_share_the_round():
+    async def run():
+        pool, hits = mocked_pool()
+        prober = HealthProber(lambda: SERVICES, pool=pool, timeout=1.0)
+        assert {r["status"] for r in prober.get_results().values()} == {"unknown"}
+
+        start = time.perf_counter()
+        first, second = await asyncio.gather(prober.probe_all(), prober.probe_all())
+        elapsed = time.perf_counter() - start
+        await prober.close()
+        await pool.close()
+        return first, second, elapsed, hits, prober.get_results()
+
+    first, second, elapsed, hits, cached = asyncio.run(run())
+
+    # Three 100 ms probes in one round, not one after another
+    assert elapsed < 0.25
+    assert sorted(hits) == ["payment.test", "res.test", "ws.test"]
+    assert first is second is cached
+    assert cached["res"]["status"] == "online"
+    assert (cached["payment"]["status"], cached["payment"]["http_status"]) == ("error", 503)
+    assert (cached["ws"]["status"], cached["ws"]["error"]) == ("offline", "ConnectError")
+    assert all(result["checked_at"] for result in cached.values())
+
+
+def test_background_loop_refreshes_until_closed():
+    async def run() -> int:
+        pool, hits = mocked_pool()
+        prober = HealthProber(lambda: SERVICES, pool=pool, interval=0.01)
+        await prober.start()
+        await asyncio.sleep(0.35)
+        await prober.close()
+        rounds = len(hits)
+        await asyncio.sleep(0.15)
+        assert len(hits) == rounds
+        await pool.close()
+        return rounds
+
+    assert asyncio.run(run()) >= 6
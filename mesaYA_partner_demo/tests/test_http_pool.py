@@ -0,0 +1,59 @@
+"""HTTP pool statistics."""
+
+import asyncio
+
+import httpx
+
+from mesaya_partner_demo.http_pool import CallStats, HTTPClientPool
+
+URL = "http://mesaya.test/api/health"
+
+
+def test_stats_do_not_create_breakers_or_timeouts():
+    async def run() -> tuple[dict, dict, HTTPClientPool]:
+        pool = HTTPClientPool()
+        pool.client_for(URL)
+        stats = pool.get_stats()
+        breakers = pool.get_breaker_stats()
+        await pool.close()
+        return stats, breakers, pool
+
+    stats, breakers, pool = asyncio.run(run())
+    target = stats["targets"][pool.origin(URL)]
+    assert target["breaker"] is None
+    assert target["timeout_seconds"] is None
+    assert breakers == {}
+    assert pool._breakers == {} and pool._timeouts == {}
+
+
+def test_in_flight_counts_requests_until_they_settle():
+    async def run() -> tuple[list[int], dict]:
+        pool = HTTPClientPool()
+        key = pool.origin(URL)
+        release = asyncio.Event()
+        seen: list[int] = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            seen.append(pool._stats[key].in_flight)
+            await release.wait()
+            if request.url.params.get("fail"):
+                raise httpx.ReadError("reset", request=request)
+            return httpx.Response(200)
+
+        pool._clients[key] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        pool._stats[key] = CallStats()
+        calls = [
+            asyncio.create_task(pool.request("GET", URL)),
+            asyncio.create_task(pool.request("GET", URL, params={"fail": "1"})),
+        ]
+        while len(seen) < 2:
+            await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(*calls, return_exceptions=True)
+        stats = pool.get_stats()["targets"][key]
+        await pool.close()
+        return seen, stats
+
+    seen, stats = asyncio.run(run())
+    assert seen == [1, 2]
+    assert (stats["in_flight"], stats["calls"], stats["errors"]) == (0, 2, 1)
@@ -0,0 +1,79 @@
+"""Live dashboard feed: record pushes, stats deltas and slow clients."""
+
+import asyncio
+import json
+from datetime import datetime, timezone
+
+from mesaya_partner_demo.live_feed import LiveFeed, Subscriber, format_sse
+from mesaya_partner_demo.models import EventStatus, EventStore, WebhookEvent
+
+
+def parse(batch: list[bytes]) -> list[tuple[str, dict]]:
+    messages = []
+    for message in batch:
+        name, data = message.decode().strip().split("\n")
+        payload = json.loads(data.removeprefix("data: "))
+        messages.append((name.removeprefix("event: "), payload))
+    return messages
+
+
+def incoming(event_id: str) -> WebhookEvent:
+    return WebhookEvent(
+        id=event_id,
+        event_type="table.reserved",
+        timestamp=datetime.now(timezone.utc),
+        payload={"table": 4},
+        status=EventStatus.VERIFIED,
+    )
+
+
+def test_changes_are_pushed_with_a_coalesced_stats_delta():
+    async def run() -> list[tuple[str, dict]]:
+        store = EventStore(max_events=10)
+        feed = LiveFeed(store, stats_interval=0.01)
+        subscriber = feed.subscribe()
+        event = incoming("evt-1")
+        store.add_received(event)
+        store.update_received(event, EventStatus.PROCESSED)
+        await asyncio.sleep(0.05)
+        return parse(await subscriber.next_batch(0.1))
+
+    messages = asyncio.run(run())
+
+    assert [name for name, _ in messages] == ["stats", "received", "received_update", "stats"]
+    assert messages[0][1]["total_received"] == 0
+    assert messages[2][1]["status"] == "processed"
+    # Only the keys that moved since the snapshot, in one message
+    assert messages[3][1] == {
+        "total_received": 1,
+        "received_verified": 1,
+        "received_processed": 1,
+        "events_by_type": {"table.reserved": 1},
+    }
+
+
+def test_a_lagging_client_is_told_to_resync():
+    async def run() -> list[tuple[str, dict]]:
+        subscriber = Subscriber(buffer_size=2)
+        for n in range(5):
+            subscriber.push(format_sse("sent", {"n": n}))
+        return parse(await subscriber.next_batch(0.1))
+
+    assert asyncio.run(run()) == [
+        ("resync", {"dropped": 3}),
+        ("sent", {"n": 3}),
+        ("sent", {"n": 4}),
+    ]
+
+
+def test_idle_wait_returns_nothing_and_unsubscribed_stores_cost_nothing():
+    async def run() -> list[bytes]:
+        store = EventStore(max_events=10)
+        feed = LiveFeed(store)
+        subscriber = feed.subscribe()
+        feed.unsubscribe(subscriber)
+        await subscriber.next_batch(0.01)  # the initial snapshot
+        store.add_received(incoming("evt-2"))
+        return await subscriber.next_batch(0.01)
+
+    assert asyncio.run(run()) == []
@@ -0,0 +1,57 @@
+"""Prometheus exposition and the per-route request metrics."""
+
+import pytest
+
+from mesaya_partner_demo.metrics import MetricsRegistry
+
+
+def sample(text: str, series: str) -> float:
+    """Value of one series in an exposition, 0 if it is not there yet."""
+    for line in text.splitlines():
+        name, _, value = line.rpartition(" ")
+        if name == series:
+            return float(value)
+    return 0.0
+
+
+def test_histogram_buckets_render_cumulatively():
+    registry = MetricsRegistry()
+    latency = registry.histogram("op_seconds", "Op latency.", ("op",), buckets=(0.1, 1.0))
+    child = latency.labels("read")
+    for value in (0.05, 0.1, 0.5, 3.0):
+        child.observe(value)
+
+    text = registry.render()
+    assert sample(text, 'op_seconds_bucket{op="read",le="0.1"}') == 2
+    assert sample(text, 'op_seconds_bucket{op="read",le="1"}') == 3
+    assert sample(text, 'op_seconds_bucket{op="read",le="+Inf"}') == 4
+    assert sample(text, 'op_seconds_count{op="read"}') == 4
+    assert sample(text, 'op_seconds_sum{op="read"}') == pytest.approx(3.65)
+    assert "# TYPE op_seconds histogram" in text
+
+
+def test_label_values_are_escaped_and_checked():
+    registry = MetricsRegistry()
+    calls = registry.counter("calls_total", "Calls.", ("target",))
+    calls.labels('say "hi"\n').inc(2)
+
+    assert sample(registry.render(), 'calls_total{target="say \\"hi\\"\\n"}') == 2
+    with pytest.raises(ValueError):
+        calls.labels("a", "b")
+    with pytest.raises(ValueError):
+        registry.counter("calls_total", "Again.")
+
+
+def test_requests_are_labelled_with_the_route_template(client):
+    series = (
+        "partner_http_requests_total"
+        '{method="DELETE",route="/api/partners/{partner_id}",status="404"}'
+    )
+    before = sample(client.get("/metrics").text, series)
+
+    for partner_id in ("nobody", "no-one"):
+        assert client.delete(f"/api/partners/{partner_id}").status_code == 404
+
+    text = client.get("/metrics").text
+    assert sample(text, series) == before + 2
+    assert "/api/partners/nobody" not in text
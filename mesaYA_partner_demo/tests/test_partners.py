@@ -0,0 +1,78 @@
+"""Multi-partner registry: secret lookup by X-Partner-Id and rotation."""
+
+import itertools
+
+import pytest
+
+from mesaya_partner_demo.partners import Partner, PartnerRegistry, partner_registry
+from mesaya_partner_demo.webhook_service import WebhookService
+
+from conftest import SECRET
+
+# Every delivery gets its own body, so none is taken for a replay
+NONCES = itertools.count()
+
+
+@pytest.fixture
+def partners(client):
+    """Two partners registered through the API, removed afterwards."""
+    for partner_id, secret in (("bistro", "whsec_bistro"), ("cafe", "whsec_cafe")):
+        response = client.post(
+            "/api/partners",
+            json={
+                "partner_id": partner_id,
+                "secret": secret,
+                "mesa_ya_url": "http://mesaya.test/",
+                "events": ["reservation.created"],
+            },
+        )
+        assert response.status_code == 201
+    yield client
+    partner_registry.replace_all([])
+
+
+def deliver(client, secret: str, partner_id: str | None = None) -> str:
+    body = b'{"event": "reservation.created", "n": %d}' % next(NONCES)
+    header, _ = WebhookService.generate_signature(body, secret)
+    headers = {"X-Webhook-Signature": header}
+    if partner_id is not None:
+        headers["X-Partner-Id"] = partner_id
+    return client.post("/api/webhook", content=body, headers=headers).json()["status"]
+
+
+def test_each_partner_is_verified_with_its_own_secret(partners):
+    assert deliver(partners, "whsec_bistro", "bistro") == "verified"
+    assert deliver(partners, "whsec_bistro", "cafe") == "invalid_signature"
+    # Unknown ids and unlabelled webhooks fall back to the configured secret
+    assert deliver(partners, SECRET, "nobody") == "verified"
+    assert deliver(partners, SECRET) == "verified"
+
+    listed = partners.get("/api/partners").json()
+    assert [p["partner_id"] for p in listed] == ["bistro", "cafe"]
+    assert "secret" not in listed[0]
+    assert listed[0]["mesa_ya_res_url"] == "http://mesaya.test"
+
+
+def test_partner_rotation_and_removal(partners):
+    rotated = partners.post("/api/partners/cafe/rotate", json={"secret": "whsec_cafe_2"})
+    assert rotated.json()["previous_secret_set"] is True
+    assert deliver(partners, "whsec_cafe", "cafe") == "verified"
+    assert deliver(partners, "whsec_cafe_2", "cafe") == "verified"
+    assert deliver(partners, "whsec_cafe_2", "bistro") == "invalid_signature"
+
+    assert partners.delete("/api/partners/cafe").json()["removed"] is True
+    assert partners.post("/api/partners/cafe/rotate", json={"secret": "x"}).status_code == 404
+
+
+def test_readers_keep_the_snapshot_they_looked_up():
+    registry = PartnerRegistry()
+    registry.upsert(Partner("p-1", "s1", "http://mesaya.test"))
+    before = registry.get("p-1")
+
+    registry.rotate("p-1", "s2")
+
+    assert (before.secret, before.previous_secret) == ("s1", None)
+    after = registry.get("p-1")
+    assert (after.secret, after.previous_secret) == ("s2", "s1")
+    assert after.webhook_target == "http://mesaya.test/api/v1/webhooks/partner/p-1"
+    assert Partner.from_dict(after.to_dict(include_secrets=True)) == after
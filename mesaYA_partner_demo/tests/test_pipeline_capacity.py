@@ -0,0 +1,51 @@
+"""503s from a full processing pipeline."""
+
+import json
+
+import pytest
+
+from mesaya_partner_demo.models import event_store
+from mesaya_partner_demo.pipeline import pipeline
+from mesaya_partner_demo.webhook_service import WebhookService
+
+from conftest import SECRET
+
+
+@pytest.fixture
+def full_pipeline(monkeypatch):
+    monkeypatch.setattr(pipeline, "full", lambda: True)
+    rejected = pipeline.rejected
+    yield
+    pipeline.rejected = rejected
+
+
+def _post(client, payload, signature=None):
+    body = json.dumps(payload).encode()
+    if signature is None:
+        signature, _ = WebhookService.generate_signature(body, SECRET)
+    return client.post("/api/webhook", content=body, headers={"X-Webhook-Signature": signature})
+
+
+def test_events_without_handlers_are_accepted_while_full(client, full_pipeline):
+    before = pipeline.rejected
+    response = _post(client, {"event": "reservation.updated", "id": "r-1"})
+    assert response.status_code == 200
+    invalid = _post(client, {"event": "payment.created", "id": "p-1"}, f"t=1,v1={'0' * 64}")
+    assert invalid.json()["status"] == "invalid_signature"
+    assert pipeline.rejected == before
+    assert len(event_store.received_events) == 2
+
+
+def test_refused_webhook_is_not_stored_or_remembered(client, full_pipeline, monkeypatch):
+    before = pipeline.rejected
+    payload = {"event": "payment.created", "id": "p-2"}
+    body = json.dumps(payload).encode()
+    signature, _ = WebhookService.generate_signature(body, SECRET)
+
+    assert _post(client, payload, signature).status_code == 503
+    assert pipeline.rejected == before + 1
+    assert len(event_store.received_events) == 0
+
+    # MesaYA's retry is processed once there is room again
+    monkeypatch.setattr(pipeline, "full", lambda: False)
+    assert _post(client, payload, signature).json()["status"] == "verified"
@@ -0,0 +1,86 @@
+"""Per-type concurrency limits in the processing pipeline."""
+
+import asyncio
+from datetime import datetime, timezone
+
+from mesaya_partner_demo.models import EventStatus, EventStore, WebhookEvent
+from mesaya_partner_demo.pipeline import ProcessingPipeline
+
+
+def verified(number: int, event_type: str) -> WebhookEvent:
+    return WebhookEvent(
+        id=f"evt-{number}",
+        event_type=event_type,
+        timestamp=datetime.now(timezone.utc),
+        payload={"n": number},
+        status=EventStatus.VERIFIED,
+    )
+
+
+def test_other_types_progress_while_a_slow_type_is_saturated():
+    async def run() -> None:
+        pipeline = ProcessingPipeline(EventStore(max_events=20), workers=2, max_size=10)
+        gate = asyncio.Event()
+        slow_running = 0
+        fast_done: list[str] = []
+
+        @pipeline.handler("report.generated", concurrency=1)
+        async def slow(event: WebhookEvent) -> None:
+            nonlocal slow_running
+            slow_running += 1
+            await gate.wait()
+            slow_running -= 1
+
+        @pipeline.handler("payment.created")
+        async def fast(event: WebhookEvent) -> None:
+            fast_done.append(event.id)
+
+        await pipeline.start()
+        for n in range(5):
+            pipeline.submit(verified(n, "report.generated"))
+        pipeline.submit(verified(5, "payment.created"))
+        for _ in range(50):
+            if fast_done:
+                break
+            await asyncio.sleep(0.01)
+
+        assert fast_done == ["evt-5"]
+        assert slow_running == 1
+        assert pipeline.parked == 4
+        pipeline.submit(verified(6, "payment.created"))
+
+        gate.set()
+        while pipeline.processed < 7:
+            await asyncio.sleep(0.01)
+        assert pipeline.parked == 0
+        assert pipeline.in_flight == 0
+        await pipeline.close()
+
+    asyncio.run(run())
+
+
+def test_parked_events_count_towards_capacity():
+    async def run() -> None:
+        pipeline = ProcessingPipeline(EventStore(max_events=20), workers=3, max_size=3)
+        gate = asyncio.Event()
+
+        @pipeline.handler("report.generated", concurrency=1)
+        async def slow(event: WebhookEvent) -> None:
+            await gate.wait()
+
+        await pipeline.start()
+        for n in range(3):
+            pipeline.submit(verified(n, "report.generated"))
+        await asyncio.sleep(0.01)
+        # One running, two parked by the idle workers: room for one more
+        assert pipeline.parked == 2
+        assert not pipeline.full()
+        pipeline.submit(verified(3, "report.generated"))
+        assert pipeline.full()
+        gate.set()
+        while pipeline.processed < 4:
+            await asyncio.sleep(0.01)
+        assert not pipeline.full()
+        await pipeline.close()
+
+    asyncio.run(run())
@@ -0,0 +1,48 @@
+"""Signatures are checked over the exact bytes received."""
+
+import hashlib
+import hmac
+import time
+
+from mesaya_partner_demo.models import event_store
+
+from conftest import SECRET
+
+# Formatting a re-encoded payload would not reproduce
+BODY = b'{ "event" : "payment.created",\t"amount": 12.50, "note": "caf\\u00e9" }'
+
+
+def sign(body: bytes, secret: str = SECRET) -> str:
+    timestamp = int(time.time())
+    digest = hmac.new(secret.encode(), b"%d." % timestamp + body, hashlib.sha256)
+    return f"t={timestamp},v1={digest.hexdigest()}"
+
+
+def test_signature_over_the_raw_body_verifies(client):
+    response = client.post(
+        "/api/webhook", content=BODY, headers={"X-Webhook-Signature": sign(BODY)}
+    )
+    assert response.status_code == 200
+    assert response.json()["status"] == "verified"
+
+    (event,) = event_store.received_events.latest()
+    assert event.payload == {"event": "payment.created", "amount": 12.5, "note": "café"}
+    # The stored body is the one that was signed, not a re-encoding
+    assert event.raw_payload == BODY
+
+
+def test_one_changed_byte_fails_verification(client):
+    tampered = BODY.replace(b"12.50", b"12.5 ")
+    response = client.post(
+        "/api/webhook", content=tampered, headers={"X-Webhook-Signature": sign(BODY)}
+    )
+    assert response.json()["status"] == "invalid_signature"
+
+
+def test_bodies_that_are_not_objects_are_refused(client):
+    for body in (b"[1, 2]", b"not json"):
+        response = client.post(
+            "/api/webhook", content=body, headers={"X-Webhook-Signature": sign(body)}
+        )
+        assert response.status_code == 400
+    assert len(event_store.received_events) == 0
@@ -0,0 +1,70 @@
+"""Replay protection of /api/webhook."""
+
+import json
+import time
+
+from mesaya_partner_demo.dedup import ReplayGuard
+from mesaya_partner_demo.models import event_store
+from mesaya_partner_demo.webhook_service import WebhookService
+
+from conftest import SECRET
+
+
+def _signed(body: bytes) -> str:
+    header, _ = WebhookService.generate_signature(body, SECRET)
+    return header
+
+
+def test_new_webhook_id_does_not_bypass_signature_key(client):
+    body = json.dumps({"event": "payment.created", "payment_id": "pay-1"}).encode()
+    signature = _signed(body)
+
+    first = client.post("/api/webhook", content=body, headers={"X-Webhook-Signature": signature})
+    assert first.json()["status"] == "verified"
+
+    for webhook_id in ("a", "b", "c"):
+        resent = client.post(
+            "/api/webhook",
+            content=body,
+            headers={"X-Webhook-Signature": signature, "X-Webhook-Id": webhook_id},
+        )
+        assert resent.json().get("duplicate") is True
+
+    assert len(event_store.received_events) == 1
+
+
+def test_webhook_id_still_dedupes_resigned_delivery(client):
+    body = json.dumps({"event": "payment.created", "payment_id": "pay-2"}).encode()
+    headers = {"X-Webhook-Signature": _signed(body), "X-Webhook-Id": "evt-1"}
+    assert client.post("/api/webhook", content=body, headers=headers).json()["status"] == "verified"
+
+    # Same delivery id, signed again (e.g. a retry with a new timestamp)
+    retry = dict(headers, **{"X-Webhook-Signature": f"t=1,v1={'0' * 64}"})
+    assert client.post("/api/webhook", content=body, headers=retry).json().get("duplicate") is True
+    assert len(event_store.received_events) == 1
+
+
+def test_guard_buckets_expire_when_their_slot_comes_round():
+    guard = ReplayGuard(window_seconds=30, bucket_seconds=10)
+    signed_at = int(time.time())
+    guard.remember("sig-a", signed_at)
+    assert guard.is_duplicate("sig-a", signed_at)
+    assert guard.is_duplicate("sig-a")
+
+    # A key signed one full ring later lands in the same slot and resets it
+    later = signed_at + guard._slots * guard.bucket_seconds
+    guard.remember("sig-b", later)
+    assert not guard.is_duplicate("sig-a", signed_at)
+    assert guard.get_stats()["entries"] == 1
+
+
+def test_guard_drops_the_oldest_bucket_past_its_cap():
+    guard = ReplayGuard(window_seconds=60, bucket_seconds=10, max_entries=2)
+    now = int(time.time())
+    guard.remember("old", now - 20)
+    guard.remember("mid", now - 10)
+    guard.remember("new", now)
+
+    assert not guard.is_duplicate("old", now - 20)
+    assert guard.is_duplicate("mid", now - 10) and guard.is_duplicate("new", now)
+    assert guard.get_stats()["evicted_early"] == 1
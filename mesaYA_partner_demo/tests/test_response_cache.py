@@ -0,0 +1,68 @@
+"""Bodies cached per store version and revalidated with ETags."""
+
+import json
+
+from mesaya_partner_demo.models import event_store
+from mesaya_partner_demo.response_cache import CachedBody, ResponseCache
+from mesaya_partner_demo.webhook_service import WebhookService
+
+from conftest import SECRET
+
+
+class Renderer:
+    """Counts how often a body had to be built."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def __call__(self) -> bytes:
+        self.calls += 1
+        return b'{"render": %d}' % self.calls
+
+
+def test_entries_last_until_the_version_moves():
+    cache = ResponseCache(max_entries=2)
+    render = Renderer()
+
+    first = cache.get(1, "page", render)
+    assert cache.get(1, "page", render) is first
+    assert render.calls == 1
+
+    assert cache.get(2, "page", render).body == b'{"render": 2}'
+    assert cache.get_stats() == {"version": 2, "entries": 1, "hits": 1, "misses": 2}
+
+
+def test_least_recently_used_key_goes_first():
+    cache = ResponseCache(max_entries=2)
+    render = Renderer()
+    for key in ("a", "b", "a", "c"):
+        cache.get(1, key, render)
+
+    # "b" was evicted by "c"; "a" was touched after it and is kept
+    cache.get(1, "a", render)
+    cache.get(1, "b", render)
+    assert render.calls == 4
+
+
+def test_if_none_match_forms():
+    cached = CachedBody(b"{}")
+    assert cached.matches(cached.etag)
+    assert cached.matches(f'"other", W/{cached.etag}')
+    assert cached.matches("*")
+    assert not cached.matches('"other"')
+    assert not cached.matches(None)
+
+
+def test_dashboard_revalidates_until_an_event_arrives(client):
+    first = client.get("/")
+    etag = first.headers["ETag"]
+    assert client.get("/", headers={"If-None-Match": etag}).status_code == 304
+
+    body = json.dumps({"event": "payment.created"}).encode()
+    header, _ = WebhookService.generate_signature(body, SECRET)
+    client.post("/api/webhook", content=body, headers={"X-Webhook-Signature": header})
+    assert len(event_store.received_events) == 1
+
+    changed = client.get("/", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
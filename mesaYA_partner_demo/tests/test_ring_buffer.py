@@ -0,0 +1,64 @@
+"""Ring-buffer retention and the store counters kept alongside it."""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from mesaya_partner_demo.models import EventStatus, EventStore, WebhookEvent
+from mesaya_partner_demo.ring_buffer import RingBuffer
+
+
+def test_buffer_overwrites_the_oldest_item_and_keeps_seqs():
+    buffer: RingBuffer[str] = RingBuffer(3)
+    evicted = [buffer.append(letter) for letter in "abcde"]
+
+    assert evicted == [None, None, None, "a", "b"]
+    assert len(buffer) == 3
+    assert (buffer.first_seq, buffer.next_seq) == (2, 5)
+    assert buffer.latest() == ["e", "d", "c"]
+    assert buffer.get(1) is None
+    assert buffer.get(2) == "c"
+    assert list(buffer.iter_before(4)) == [(3, "d"), (2, "c")]
+
+
+def test_cleared_buffer_keeps_counting():
+    buffer: RingBuffer[int] = RingBuffer(2, start_seq=10)
+    buffer.append(1)
+    buffer.clear()
+    assert not buffer
+    buffer.append(2)
+    assert (buffer.first_seq, buffer.get(11)) == (11, 2)
+
+
+def test_zero_capacity_is_rejected():
+    with pytest.raises(ValueError):
+        RingBuffer(0)
+
+
+def test_counters_follow_status_changes_and_eviction():
+    store = EventStore(max_events=2)
+    events = [
+        WebhookEvent(
+            id=f"evt-{n}",
+            event_type=event_type,
+            timestamp=datetime.now(timezone.utc),
+            payload={},
+            status=EventStatus.VERIFIED,
+        )
+        for n, event_type in enumerate(["payment.created", "payment.created", "table.freed"])
+    ]
+    store.add_received(events[0])
+    store.add_received(events[1])
+    store.update_received(events[1], EventStatus.ERROR, "boom")
+    assert store.get_stats()["events_by_type"] == {"payment.created": 2}
+    assert store.get_stats()["received_errors"] == 1
+
+    store.add_received(events[2])
+    stats = store.get_stats()
+    assert stats["total_received"] == 2
+    assert stats["events_by_type"] == {"payment.created": 1, "table.freed": 1}
+    assert stats["received_errors"] == 1
+
+    # Updating an evicted event leaves the counters alone
+    store.update_received(events[0], EventStatus.PROCESSED)
+    assert store.get_stats()["received_processed"] == 0
@@ -0,0 +1,49 @@
+"""Keyed HMAC state and zero-downtime secret rotation."""
+
+import hashlib
+import hmac
+
+from mesaya_partner_demo.config import config
+from mesaya_partner_demo.signing import hmac_key
+from mesaya_partner_demo.webhook_service import WebhookService
+
+from conftest import SECRET
+
+NEW_SECRET = "whsec_rotated_fedcba9876543210"
+
+
+def test_prepared_key_matches_a_fresh_hmac():
+    key = hmac_key(SECRET)
+    expected = hmac.new(SECRET.encode(), b"1700000000.{}", hashlib.sha256).hexdigest()
+
+    assert key.hexdigest(b"1700000000.", b"{}") == expected
+    # Copying the template leaves it unchanged for the next message
+    assert key.hexdigest(b"1700000000.", b"{}") == expected
+    assert key.matches(expected, b"1700000000.{}")
+    assert hmac_key(SECRET) is key
+
+
+def test_previous_secret_verifies_until_the_next_rotation(client):
+    body = b'{"event": "payment.created"}'
+    old_header, _ = WebhookService.generate_signature(body, SECRET)
+
+    response = client.post("/api/secret/rotate", json={"secret": NEW_SECRET})
+    assert response.json() == {"rotated": True, "previous_secret_set": True}
+    assert (config.partner_secret, config.previous_partner_secret) == (NEW_SECRET, SECRET)
+
+    new_header, _ = WebhookService.generate_signature(body, NEW_SECRET)
+    for header in (old_header, new_header):
+        assert WebhookService.verify_signature(
+            header, body, config.partner_secret, config.previous_partner_secret
+        ) == (True, None)
+
+    config.rotate_secret("whsec_third")
+    assert WebhookService.verify_signature(
+        old_header, body, config.partner_secret, config.previous_partner_secret
+    ) == (False, "Signature mismatch")
+
+
+def test_rotating_to_the_same_secret_keeps_the_previous_one():
+    config.rotate_secret(NEW_SECRET)
+    config.rotate_secret(NEW_SECRET)
+    assert config.previous_partner_secret == SECRET
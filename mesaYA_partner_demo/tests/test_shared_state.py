@@ -0,0 +1,85 @@
+"""State shared by worker processes: seq allocation and lock waits."""
+
+import asyncio
+import sqlite3
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from mesaya_partner_demo.config import PartnerConfig
+from mesaya_partner_demo.models import EventStatus, EventStore, WebhookEvent
+from mesaya_partner_demo.partners import PartnerRegistry
+from mesaya_partner_demo.shared_state import SharedState
+
+
+def received(event_id: str) -> WebhookEvent:
+    return WebhookEvent(
+        id=event_id,
+        event_type="payment.created",
+        timestamp=datetime.now(timezone.utc),
+        payload={"id": event_id},
+        status=EventStatus.VERIFIED,
+    )
+
+
+@pytest.fixture
+def workers(tmp_path):
+    """Two workers' stores sharing one state file."""
+    path = str(tmp_path / "state.db")
+    pairs = []
+    for _ in range(2):
+        store = EventStore(max_events=10)
+        state = SharedState(path, store, PartnerConfig(), PartnerRegistry())
+        store.attach_backend(state, replay=10)
+        pairs.append((store, state))
+    yield pairs
+    for _, state in pairs:
+        asyncio.run(state.close())
+
+
+def test_failed_append_hands_out_no_seq(workers, monkeypatch):
+    (first, first_state), (second, second_state) = workers
+
+    def broken(*args):
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(first_state, "append", broken)
+    with pytest.raises(sqlite3.OperationalError):
+        first.add_received(received("lost"))
+    assert first.received_events.next_seq == 0
+    monkeypatch.undo()
+
+    second.add_received(received("kept"))
+    first.add_received(received("next"))
+    asyncio.run(second_state.refresh())
+
+    for store in (first, second):
+        assert [(e.seq, e.id) for e in store.received_events.latest()] == [
+            (1, "next"),
+            (0, "kept"),
+        ]
+
+
+def test_waiting_for_the_write_lock_leaves_the_loop_running(workers):
+    (store, _), _ = workers
+    blocker = sqlite3.connect(workers[0][1].path, isolation_level=None)
+    blocker.execute("BEGIN IMMEDIATE")
+
+    async def scenario():
+        async def write():
+            async with store.writing():
+                store.add_received(received("late"))
+
+        writer = asyncio.create_task(write())
+        start = time.perf_counter()
+        await asyncio.sleep(0.05)
+        # The loop kept running while the writer waited for the lock
+        assert time.perf_counter() - start < 0.5
+        assert not writer.done()
+        blocker.execute("COMMIT")
+        await writer
+
+    asyncio.run(scenario())
+    blocker.close()
+    assert store.received_events.get(0).id == "late"
@@ -0,0 +1,58 @@
+"""Startup: the lazily imported app and the default production server."""
+
+import subprocess
+import sys
+
+import pytest
+import uvicorn
+
+from mesaya_partner_demo import main
+
+CHECK_LAZY_IMPORT = """
+import sys
+import mesaya_partner_demo
+import mesaya_partner_demo.cli
+
+heavy = {"fastapi", "pydantic", "jinja2", "httpx", "mesaya_partner_demo.app"}
+assert not heavy & set(sys.modules), heavy & set(sys.modules)
+
+app = mesaya_partner_demo.app
+assert type(app).__name__ == "FastAPI"
+assert mesaya_partner_demo.__dict__["app"] is app
+try:
+    mesaya_partner_demo.missing
+except AttributeError:
+    pass
+else:
+    raise AssertionError("unknown attributes must raise")
+"""
+
+
+def test_cli_imports_without_the_app():
+    # A fresh interpreter: this one already imported the app for the fixtures
+    result = subprocess.run(
+        [sys.executable, "-c", CHECK_LAZY_IMPORT], capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+
+
+@pytest.fixture
+def server_calls(monkeypatch):
+    calls: list[dict] = []
+    monkeypatch.setattr(uvicorn, "run", lambda app, **kwargs: calls.append(kwargs))
+    return calls
+
+
+def test_default_server_has_no_reload_and_no_access_log(server_calls):
+    main(["--port", "9001"])
+    assert server_calls == [
+        {"host": server_calls[0]["host"], "port": 9001, "workers": None, "access_log": False}
+    ]
+
+
+def test_reload_is_opt_in_and_single_process(server_calls):
+    main(["--reload"])
+    assert server_calls[0]["reload"] is True
+    with pytest.raises(SystemExit):
+        main(["--reload", "--workers", "2"])
+    assert len(server_calls) == 1
@@ -0,0 +1,38 @@
+"""Dashboard counters that must not move when events are processed."""
+
+from datetime import datetime, timezone
+
+from mesaya_partner_demo.models import EventStatus, EventStore, WebhookEvent
+
+
+def arrival(number: int, status: EventStatus) -> WebhookEvent:
+    return WebhookEvent(
+        id=f"evt-{number}",
+        event_type="payment.succeeded",
+        timestamp=datetime.now(timezone.utc),
+        payload={"n": number},
+        status=status,
+        signature=f"t=1,v1={number:064d}",
+    )
+
+
+def test_verified_count_survives_processing_and_follows_eviction():
+    store = EventStore(max_events=3)
+    first = arrival(0, EventStatus.VERIFIED)
+    store.add_received(first)
+    store.add_received(arrival(1, EventStatus.INVALID_SIGNATURE))
+    store.add_received(arrival(2, EventStatus.VERIFIED))
+    assert store.get_stats()["received_verified"] == 2
+
+    store.update_received(first, EventStatus.PROCESSED)
+    store.update_received(store.received_events.get(2), EventStatus.ERROR, "boom")
+    stats = store.get_stats()
+    assert stats["received_verified"] == 2
+    assert stats["received_processed"] == 1
+
+    # The processed event is the one evicted
+    store.add_received(arrival(3, EventStatus.RECEIVED))
+    assert store.get_stats()["received_verified"] == 1
+
+    store.clear()
+    assert store.get_stats()["received_verified"] == 0
@@ -0,0 +1,76 @@
+"""Rolling time series: ring rollover and counts fed by the store."""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from mesaya_partner_demo.models import EventStatus, EventStore, WebhookEvent
+from mesaya_partner_demo.timeseries import BucketRing, TimeSeries
+
+
+class Clock:
+    """A clock the test moves by hand."""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_ring_reuses_slots_and_zeroes_stale_buckets():
+    ring = BucketRing(width=1, size=3)
+    for t in (0.2, 1.5, 2.9, 2.1):
+        ring.add(("hits",), t)
+
+    assert ring.window(3, 2.5) == (0, {"hits": [1.0, 1.0, 2.0]})
+
+    # Bucket 3 takes over bucket 0's slot; bucket 5 leaves 4 empty
+    ring.add(("hits",), 3.0)
+    ring.add(("hits", "misses"), 5.0, amount=2.0)
+    start, series = ring.window(3, 5.0)
+    assert start == 3
+    assert series == {"hits": [1.0, 0.0, 2.0], "misses": [0.0, 0.0, 2.0]}
+
+    # Far past every retained bucket: nothing left to report
+    assert ring.window(3, 100.0)[1] == {"hits": [0.0] * 3, "misses": [0.0] * 3}
+
+
+def test_store_changes_are_counted_per_second_and_per_minute():
+    clock = Clock()
+    store = EventStore(max_events=10)
+    series = TimeSeries(store, seconds=10, minutes=5, max_types=2, clock=clock)
+
+    for n, (event_type, status) in enumerate([
+        ("payment.created", EventStatus.VERIFIED),
+        ("payment.created", EventStatus.INVALID_SIGNATURE),
+        ("table.freed", EventStatus.VERIFIED),
+        ("menu.updated", EventStatus.VERIFIED),
+    ]):
+        store.add_received(
+            WebhookEvent(
+                id=f"evt-{n}",
+                event_type=event_type,
+                timestamp=datetime.now(timezone.utc),
+                payload={},
+                status=status,
+            )
+        )
+        clock.now += 1
+    series.observe_latency("webhook", 0.002)
+    series.observe_latency("webhook", 0.004)
+
+    seconds = series.snapshot("second", window=5)
+    assert seconds["series"]["received"] == [1, 1, 1, 1, 0]
+    assert seconds["series"]["webhook_latency_ms"][-1] == 3.0
+    assert seconds["summary"]["invalid_signature_rate"] == 0.25
+    assert seconds["summary"]["webhook_latency_ms"] == 3.0
+    # Types past max_types are folded into "other"
+    assert set(seconds["received_by_type"]) == {"payment.created", "table.freed", "other"}
+
+    minutes = series.snapshot("minute", window=1)
+    assert minutes["series"]["received"] == [4]
+    assert minutes["summary"]["received_per_sec"] == round(4 / 60, 3)
+
+    with pytest.raises(ValueError):
+        series.snapshot("hour")
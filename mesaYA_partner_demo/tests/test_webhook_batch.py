@@ -0,0 +1,71 @@
+"""Batch webhook endpoint: JSON arrays, NDJSON and per-item results."""
+
+import json
+
+import pytest
+
+from mesaya_partner_demo.config import config
+from mesaya_partner_demo.models import event_store
+from mesaya_partner_demo.webhook_service import WebhookService
+
+from conftest import SECRET
+
+
+def post_batch(client, body: bytes):
+    header, _ = WebhookService.generate_signature(body, SECRET)
+    return client.post(
+        "/api/webhook/batch", content=body, headers={"X-Webhook-Signature": header}
+    )
+
+
+def test_json_array_items_are_stored_in_order(client):
+    body = json.dumps(
+        [{"id": f"res-{n}", "event": "reservation.created"} for n in range(3)]
+    ).encode()
+
+    result = post_batch(client, body).json()
+
+    assert (result["items"], result["accepted"], result["rejected"]) == (3, 3, 0)
+    assert [item["status"] for item in result["results"]] == ["verified"] * 3
+    stored = [e.payload["id"] for e in event_store.received_events.latest()]
+    assert stored == ["res-2", "res-1", "res-0"]
+
+
+def test_bad_ndjson_lines_only_reject_themselves(client):
+    body = b"\n".join([
+        b'{"id": "a", "event": "table.freed"}',
+        b"{not json",
+        b"",
+        b'"just a string"',
+        b'{"id": "a", "event": "table.freed"}',
+        b'{"event": "table.freed"}',
+    ])
+
+    result = post_batch(client, body).json()
+
+    statuses = [item["status"] for item in result["results"]]
+    assert statuses == ["verified", "rejected", "rejected", "duplicate", "verified"]
+    assert result["results"][1]["error"].startswith("Invalid JSON")
+    assert (result["accepted"], result["duplicates"], result["rejected"]) == (2, 1, 2)
+    assert len(event_store.received_events) == 2
+
+
+def test_ids_from_an_earlier_batch_are_duplicates(client):
+    post_batch(client, b'[{"id": "pay-9", "event": "payment.created"}]')
+    again = post_batch(client, b'[{"id": "pay-9"}, {"id": "pay-10"}]')
+
+    assert [item["status"] for item in again.json()["results"]] == ["duplicate", "verified"]
+    assert len(event_store.received_events) == 2
+
+
+@pytest.mark.parametrize("body", [b'[{"id": 1}', b'  [1, 2,'])
+def test_malformed_arrays_are_refused(client, body):
+    assert post_batch(client, body).status_code == 400
+    assert len(event_store.received_events) == 0
+
+
+def test_oversized_batches_are_refused(client, monkeypatch):
+    monkeypatch.setattr(config, "webhook_batch_max_items", 2)
+    body = b"\n".join(b'{"id": "%d"}' % n for n in range(3))
+    assert post_batch(client, body).status_code == 400
+    assert len(event_store.received_events) == 0